@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+离线性能基准：使用模拟适配器/合成数据测量各环节吞吐，不连接 AgentBay 服务。
+用法：
+  python scripts/bench.py crawl [--keywords 20] [--concurrency 4]
+  python scripts/bench.py stop [--keywords 6] [--startup 1.0] [--finish 2.0]
+  python scripts/bench.py parser [--lines 100000]
+  python scripts/bench.py report [--reports 24] [--items 500] [--workers 4]
+  python scripts/bench.py topics [--items 30000]
+  python scripts/bench.py select [--items 100000]
+"""
+import sys
+import json
+import time
+import asyncio
+import random
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+_scripts_dir = Path(__file__).resolve().parent
+if str(_scripts_dir) not in sys.path:
+    sys.path.insert(0, str(_scripts_dir))
+
+from crawler import (
+    SocialMediaCrawler,
+    ConcurrentKeywordCrawler,
+    MockAgentBayAdapter,
+    SessionPool,
+    get_platform_config,
+)
+from crawler.results_parser import ResultsParser, JSON_BACKEND
+from reporter import generate_reports_batch
+from reporter.appendix import write_detail_appendix
+from reporter.digest import processed_footer, processed_header
+from reporter.selection import select_top_items
+from reporter.topics import TOKENIZER, TopicExtractor, rank_keywords
+
+
+def _mock_provider(platform_config, startup_seconds: float, seconds_per_item: float):
+    @asynccontextmanager
+    async def provider():
+        adapter = MockAgentBayAdapter(startup_seconds=startup_seconds, seconds_per_item=seconds_per_item)
+        await adapter.create_session(platform_config)
+        try:
+            yield adapter
+        finally:
+            await adapter.close()
+    return provider
+
+
+async def bench_crawl(args) -> None:
+    """串行 vs 并发多关键词爬取吞吐对比"""
+    platform_config = get_platform_config(args.platform)
+    keywords = [f"关键词{i + 1}" for i in range(args.keywords)]
+    provider = _mock_provider(platform_config, args.startup, args.per_item)
+
+    start = time.perf_counter()
+    async with provider() as adapter:
+        crawler = SocialMediaCrawler(adapter, platform_config)
+        # 串行与并发使用相同的任务间隔，只比较并发本身带来的差异
+        serial = await crawler.crawl_multiple_keywords(
+            keywords, args.max_results, timeout=600, interval=args.interval
+        )
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    concurrent = await ConcurrentKeywordCrawler(
+        provider, platform_config, concurrency=args.concurrency, min_task_interval=args.interval,
+    ).crawl(keywords, args.max_results, timeout=600)
+    concurrent_time = time.perf_counter() - start
+
+    assert [r["title"] for r in serial["results"]] == [r["title"] for r in concurrent["results"]], "合并顺序不一致"
+    print(f"\n串行: {serial['total_count']} 条，{serial_time:.2f} 秒（{serial['total_count'] / serial_time:.1f} 条/秒）")
+    print(f"并发: {concurrent['total_count']} 条，{concurrent_time:.2f} 秒（{concurrent['total_count'] / concurrent_time:.1f} 条/秒）")
+    print(f"加速比: {serial_time / concurrent_time:.2f}x")
+
+
+def _check_keyword_results(keywords: list, results: dict, max_results: int) -> None:
+    """每个关键词恰好得到 max_results 条、且全部来自本关键词的任务"""
+    expected = {f"{k} 模拟结果 {i + 1}" for k in keywords for i in range(max_results)}
+    titles = [r["title"] for r in results["results"]]
+    assert len(titles) == len(expected) and set(titles) == expected, "结果混入了其他关键词或缺失条目"
+
+
+async def _serial_stop_run(platform_config, keywords: list, max_results: int, early_stop: bool, options: dict):
+    """在一个模拟会话上串行爬取全部关键词，返回 (耗时, 适配器)"""
+    adapter = MockAgentBayAdapter(**options)
+    await adapter.create_session(platform_config)
+    start = time.perf_counter()
+    try:
+        crawler = SocialMediaCrawler(adapter, platform_config, early_stop=early_stop, watch_interval=0.02)
+        results = await crawler.crawl_multiple_keywords(keywords, max_results, timeout=600, interval=0)
+    finally:
+        await adapter.close()
+    _check_keyword_results(keywords, results, max_results)
+    return time.perf_counter() - start, adapter
+
+
+async def bench_stop(args) -> None:
+    """
+    提前结束的收益：不提前结束 vs 按任务 ID 终止 vs 无法终止（task_detached，每个关键词前重建会话）；
+    并检查 task_detached 后下一个关键词不得在原会话上执行
+    """
+    platform_config = get_platform_config(args.platform)
+    keywords = [f"关键词{i + 1}" for i in range(args.keywords)]
+
+    timing = {"startup_seconds": args.startup, "seconds_per_item": 0.01, "finish_seconds": args.finish}
+    baseline, _ = await _serial_stop_run(platform_config, keywords, args.max_results, False, timing)
+    print(f"不提前结束: {baseline:.2f} 秒")
+    for label, detach in (("按任务 ID 终止", False), ("无法终止（重建会话）", True)):
+        elapsed, adapter = await _serial_stop_run(
+            platform_config, keywords, args.max_results, True, {**timing, "detach_on_stop": detach}
+        )
+        assert adapter.stopped_tasks == len(keywords), "任务未被提前结束"
+        print(f"提前结束（{label}）: {elapsed:.2f} 秒，重建会话 {adapter.sessions_created - 1} 次，"
+              f"相对不提前结束 {baseline / elapsed:.2f}x")
+    print()
+
+    # 收尾耗时远大于轮询间隔：每个关键词都会在写满目标条数后被提前结束
+    options = {"startup_seconds": 0.05, "seconds_per_item": 0.01, "finish_seconds": 5.0, "detach_on_stop": True}
+    crawler_options = {"watch_interval": 0.02}
+
+    adapter = MockAgentBayAdapter(**options)
+    await adapter.create_session(platform_config)
+    start = time.perf_counter()
+    try:
+        crawler = SocialMediaCrawler(adapter, platform_config, **crawler_options)
+        serial = await crawler.crawl_multiple_keywords(keywords, args.max_results, timeout=600, interval=0)
+    finally:
+        await adapter.close()
+    assert adapter.stopped_tasks == len(keywords), "任务未被提前结束"
+    assert adapter.tasks_on_detached == 0, "下一个关键词在未终止 Agent 的会话上执行"
+    _check_keyword_results(keywords, serial, args.max_results)
+    print(f"串行: {len(keywords)} 个关键词均提前结束并重建会话，{time.perf_counter() - start:.2f} 秒")
+
+    adapters = []
+
+    def factory(context_name, image_id):
+        adapters.append(MockAgentBayAdapter(context_name, image_id, **options))
+        return adapters[-1]
+
+    start = time.perf_counter()
+    async with SessionPool(adapter_factory=factory) as pool:
+        concurrent = await ConcurrentKeywordCrawler(
+            lambda: pool.acquire(platform_config), platform_config,
+            concurrency=args.concurrency, min_task_interval=0, crawler_options=crawler_options,
+        ).crawl(keywords, args.max_results, timeout=600)
+        idle = pool.idle_count()
+    assert sum(a.tasks_on_detached for a in adapters) == 0, "下一个关键词在未终止 Agent 的会话上执行"
+    assert idle == 0 and len(adapters) == len(keywords), "未终止 Agent 的会话被放回会话池"
+    _check_keyword_results(keywords, concurrent, args.max_results)
+    print(f"并发: {len(adapters)} 个会话，未终止的会话均已关闭、未放回会话池，{time.perf_counter() - start:.2f} 秒")
+
+
+def _synthetic_results(lines: int, fmt: str) -> str:
+    """生成合成结果文件：jsonl / header / array，末行故意截断"""
+    records = [
+        json.dumps({
+            "title": f"合成标题 {i}",
+            "content": "合成正文内容，" * 20,
+            "author": f"作者{i % 97}",
+            "publish_time": "2026-01-01 12:00",
+            "likes": i % 1000,
+            "shares": i % 50,
+            "comments": i % 80,
+            "comment_list": [],
+            "url": f"https://example.com/post/{i}",
+            "content_type": "图文",
+        }, ensure_ascii=False)
+        for i in range(lines)
+    ]
+    if fmt == "array":
+        return "[" + ",\n".join(records) + "]"
+    body = "\n".join(records[:-1]) + "\n" + records[-1][: len(records[-1]) // 2]
+    if fmt == "header":
+        return '{"platform":"bench","results":[\n' + body
+    return body
+
+
+def _legacy_parse(raw: str) -> list:
+    """重构前 crawl_by_keyword 中的整份解析逻辑（对照组）"""
+    raw = raw.strip()
+    if raw.strip().startswith("["):
+        return json.loads(raw)
+    lines = [ln.strip() for ln in raw.split("\n") if ln.strip()]
+    out = []
+    body = lines[1:] if lines and lines[0].rstrip().endswith('"results":[') else lines
+    for line in body:
+        try:
+            out.append(json.loads(line))
+        except json.JSONDecodeError:
+            pass
+    return out
+
+
+def bench_parser(args) -> None:
+    """结果文件解析：旧实现 vs 增量解析器（标准库 json 与最快可用后端）"""
+    for fmt in ("jsonl", "header", "array"):
+        text = _synthetic_results(args.lines, fmt)
+        print(f"\n[{fmt}] {args.lines} 行，{len(text) / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        try:
+            legacy = _legacy_parse(text)
+            legacy_msg = f"{len(legacy)} 条"
+        except json.JSONDecodeError:
+            legacy_msg = "整份解析失败"
+        print(f"  旧实现:            {time.perf_counter() - start:.3f} 秒（{legacy_msg}）")
+
+        backends = [("json", json.loads)]
+        if JSON_BACKEND != "json":
+            backends.append((JSON_BACKEND, None))
+        for name, loads in backends:
+            start = time.perf_counter()
+            parser = ResultsParser(loads)
+            count = 0
+            for i in range(0, len(text), args.chunk_size):
+                count += len(parser.feed(text[i:i + args.chunk_size]))
+            count += len(parser.close())
+            stats = parser.stats()
+            print(f"  增量解析({name:>6}): {time.perf_counter() - start:.3f} 秒（{count} 条，"
+                  f"拒绝 {stats['rejected_lines']} 行，修复截断 {stats['recovered']} 条）")
+
+
+_LABELS = (("正面", 0.7), ("负面", -0.6), ("中性", 0.0))
+
+
+def _synthetic_processed(items: int, seed: int = 0) -> dict:
+    """生成合成 processed 结果（含 sentiment 与 sentiment_statistics）"""
+    rng = random.Random(seed)
+    results = []
+    counts = {"正面": 0, "负面": 0, "中性": 0}
+    score_sum = 0.0
+    for i in range(items):
+        label, base = rng.choice(_LABELS)
+        score = max(-1.0, min(1.0, base + rng.uniform(-0.3, 0.3)))
+        counts[label] += 1
+        score_sum += score
+        results.append({
+            "title": f"合成标题 {seed}-{i}",
+            "content": "合成正文内容，用于报告生成基准。" * rng.randint(2, 12),
+            "author": f"作者{i % 97}",
+            "publish_time": f"2026-01-{1 + i % 28:02d} {i % 24:02d}:00",
+            "likes": rng.randint(0, 5000),
+            "shares": rng.randint(0, 500),
+            "comments": rng.randint(0, 800),
+            "url": f"https://example.com/{seed}/{i}",
+            "platform": "bench",
+            "sentiment": {"label": label, "score": round(score, 3), "confidence": round(rng.uniform(0.5, 1.0), 2)},
+        })
+    total = len(results) or 1
+    return {
+        "platform": "bench",
+        "platform_display": "基准",
+        "keywords": [f"关键词{seed}"],
+        "total_count": len(results),
+        "results": results,
+        "sentiment_statistics": {
+            "total_count": len(results),
+            "positive_count": counts["正面"],
+            "negative_count": counts["负面"],
+            "neutral_count": counts["中性"],
+            "positive_ratio": counts["正面"] / total,
+            "negative_ratio": counts["负面"] / total,
+            "neutral_ratio": counts["中性"] / total,
+            "average_score": round(score_sum / total, 3),
+            "sentiment_distribution": counts,
+        },
+        "agent_summary": "合成数据基准。",
+    }
+
+
+def bench_report(args) -> None:
+    """批量报告生成：逐份串行 vs 进程池并行（PDF 依赖 weasyprint，未安装时只计 Markdown/JSON）"""
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = []
+        for i in range(args.reports):
+            path = Path(tmp) / f"processed_{i}.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(_synthetic_processed(args.items, seed=i), f, ensure_ascii=False)
+            inputs.append(str(path))
+
+        timings = {}
+        for label, workers in (("串行", 1), (f"并行({args.workers} 进程)", args.workers)):
+            out_dir = Path(tmp) / f"out_{workers}"
+            start = time.perf_counter()
+            reports = generate_reports_batch(inputs, output_dir=str(out_dir), workers=workers, record_trends=False)
+            timings[label] = time.perf_counter() - start
+            ok = sum(1 for r in reports if r.get("success"))
+            pdfs = sum(1 for r in reports if r.get("pdf_path"))
+            print(f"{label}: {ok}/{len(inputs)} 份（PDF {pdfs} 份），{timings[label]:.2f} 秒")
+
+        serial, parallel = timings.values()
+        print(f"\n{args.reports} 份 × {args.items} 条，加速比: {serial / parallel:.2f}x")
+
+
+def bench_topics(args) -> None:
+    """话题提取：分词 + 词频统计 + MinHash 标题聚类的吞吐（合成标题中约 30% 为少量话题的改写转载）"""
+    rng = random.Random(0)
+    hot = ["新品发布会定档下周 售价公布", "暴雨预警升级多地停课", "新能源车企三季度交付创新高", "热门景区国庆客流再破纪录"]
+    vocab = "市场 政策 用户 价格 服务 质量 产品 技术 城市 交通 教育 医疗 消费 平台 数据 安全 发展 行业 企业 投资".split()
+    items = []
+    for i in range(args.items):
+        if rng.random() < 0.3:
+            title = rng.choice(hot) + rng.choice(["", "（转载）", "！", " 附现场图"])
+        else:
+            title = "，".join(rng.sample(vocab, rng.randint(3, 8)))
+        content = "，".join(rng.choice(vocab) for _ in range(rng.randint(20, 120)))
+        items.append({"title": title, "content": content})
+
+    start = time.perf_counter()
+    extractor = TopicExtractor.from_items(items)
+    snapshot = extractor.snapshot()
+    keywords = rank_keywords(snapshot, top_k=5)
+    elapsed = time.perf_counter() - start
+    print(f"分词方式: {TOKENIZER}，{args.items} 条，{elapsed:.2f} 秒（{args.items / elapsed:.0f} 条/秒）")
+    print(f"候选词 {len(snapshot['terms'])} 个，关键词: {'、'.join(k['term'] for k in keywords)}")
+    for cluster in snapshot["clusters"][:len(hot)]:
+        print(f"  话题「{cluster['title']}」: {cluster['size']} 条")
+
+
+def _legacy_select(results: list, label: str, max_items: int = 5) -> list:
+    filtered = [item for item in results if item.get("sentiment", {}).get("label", "") == label]
+    filtered.sort(key=lambda x: x.get("sentiment", {}).get("confidence", 0), reverse=True)
+    return filtered[:max_items]
+
+
+def bench_select(args) -> None:
+    """情感章节选条：逐情感筛选+全量排序 vs 一遍小顶堆；以及详细附录的流式写出（JSON Lines 输入）"""
+    processed = _synthetic_processed(args.items)
+    results = processed["results"]
+
+    start = time.perf_counter()
+    legacy = {label: _legacy_select(results, label) for label, _ in _LABELS}
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    selected = select_top_items(results)
+    heap_time = time.perf_counter() - start
+    same = all(legacy[label] == selected[label] for label in legacy)
+    print(f"{args.items} 条：筛选+排序 {legacy_time * 1000:.1f} ms，一遍小顶堆 {heap_time * 1000:.1f} ms，结果一致: {same}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "processed.jsonl"
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(json.dumps(processed_header({"platform": "bench"}), ensure_ascii=False) + "\n")
+            for item in results:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            f.write(json.dumps(processed_footer({}), ensure_ascii=False) + "\n")
+        del processed, results, legacy, selected
+
+        start = time.perf_counter()
+        count = write_detail_appendix({"source_path": str(source)}, Path(tmp) / "appendix.md")
+        elapsed = time.perf_counter() - start
+        # 峰值内存单独再跑一遍测量（tracemalloc 会显著拖慢计时）
+        tracemalloc.start()
+        write_detail_appendix({"source_path": str(source)}, Path(tmp) / "appendix.md")
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = (Path(tmp) / "appendix.md").stat().st_size
+        print(
+            f"详细附录: {count} 条，{elapsed:.2f} 秒（{count / elapsed:.0f} 条/秒），"
+            f"{size / 1e6:.1f} MB，峰值内存 {peak / 1e6:.2f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="舆情技能离线性能基准")
+    sub = parser.add_subparsers(dest="target", required=True)
+
+    p = sub.add_parser("crawl", help="多关键词爬取：串行 vs 并发（模拟适配器）")
+    p.add_argument("--platform", default="baidu")
+    p.add_argument("--keywords", type=int, default=20)
+    p.add_argument("--max-results", type=int, default=10)
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--interval", type=float, default=0.0, help="任务间隔（秒），串行与并发相同，默认 0")
+    p.add_argument("--startup", type=float, default=0.2, help="模拟会话创建耗时（秒）")
+    p.add_argument("--per-item", type=float, default=0.01, help="模拟每条结果耗时（秒）")
+
+    p = sub.add_parser("stop", help="提前结束：按任务 ID 终止 vs 无法终止时的会话回收（模拟适配器）")
+    p.add_argument("--platform", default="baidu")
+    p.add_argument("--keywords", type=int, default=6)
+    p.add_argument("--max-results", type=int, default=5)
+    p.add_argument("--concurrency", type=int, default=2)
+    p.add_argument("--startup", type=float, default=1.0, help="模拟会话创建耗时（秒）")
+    p.add_argument("--finish", type=float, default=2.0, help="模拟 Agent 写完结果后的收尾耗时（秒）")
+
+    p = sub.add_parser("parser", help="结果文件解析：旧实现 vs 增量解析器（合成数据）")
+    p.add_argument("--lines", type=int, default=100000)
+    p.add_argument("--chunk-size", type=int, default=64 * 1024, help="增量输入块大小（字符）")
+
+    p = sub.add_parser("report", help="批量报告生成：串行 vs 进程池（合成 processed 数据）")
+    p.add_argument("--reports", type=int, default=24)
+    p.add_argument("--items", type=int, default=500, help="每份报告的条数")
+    p.add_argument("--workers", type=int, default=4)
+
+    p = sub.add_parser("topics", help="话题提取：分词、TF-IDF 与近似重复标题聚类（合成数据）")
+    p.add_argument("--items", type=int, default=30000)
+
+    p = sub.add_parser("select", help="情感章节选条与详细附录：全量排序 vs 一遍小顶堆（合成数据）")
+    p.add_argument("--items", type=int, default=100000)
+
+    args = parser.parse_args()
+    if args.target == "crawl":
+        asyncio.run(bench_crawl(args))
+    elif args.target == "stop":
+        asyncio.run(bench_stop(args))
+    elif args.target == "parser":
+        bench_parser(args)
+    elif args.target == "report":
+        bench_report(args)
+    elif args.target == "topics":
+        bench_topics(args)
+    elif args.target == "select":
+        bench_select(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,7 +18,15 @@ import argparse
 import os
 from typing import List, Optional, Dict, Any
 
-from crawler import SocialMediaCrawler, get_platform_config, create_crawler_session
+from crawler import (
+    SocialMediaCrawler,
+    ConcurrentKeywordCrawler,
+    get_platform_config,
+    crawler_session,
+    SessionPool,
+    DedupIndex,
+)
+from crawler.telemetry import CrawlTelemetry, TimeoutModel, heuristic_timeout
 from reporter import ReportGenerator
 
 
@@ -49,6 +57,10 @@ def generate_report(
     processed_results: Dict[str, Any],
     output_dir: str = "output",
     title: Optional[str] = None,
+    trend_db: Optional[str] = None,
+    record_trends: bool = False,
+    rank_by: str = "confidence",
+    detail_appendix: bool = False,
 ) -> Dict[str, Any]:
     """
     根据情感分析结果生成报告（Markdown/JSON/可选 PDF），供主 Agent 调用。
@@ -57,18 +69,109 @@ def generate_report(
         processed_results: 主 Agent 按提示词完成情感分析后写入的 JSON（需符合 sentiment_instruction.md 中的输出格式）
         output_dir: 报告输出目录
         title: 报告标题，可选
+        trend_db: 趋势库路径，默认 AGENTBAY_TREND_DB 或 ~/.config/agentbay/trends.db
+        record_trends: 是否将本次结果累加到趋势库并在报告中展示跨运行趋势（定时监控时开启），默认否
+        rank_by: 各情感章节展示条目的排序依据：confidence / engagement / weighted
+        detail_appendix: 是否另外生成全部条目明细的附录文件
 
     Returns:
-        含 markdown_path、json_path、pdf_path（若有）等的字典
+        含 markdown_path、json_path、pdf_path（若有）、appendix_path（若有）、trend 等的字典
     """
-    generator = ReportGenerator(output_dir=output_dir)
+    generator = ReportGenerator(
+        output_dir=output_dir, trend_db=trend_db, record_trends=record_trends,
+        rank_by=rank_by, detail_appendix=detail_appendix,
+    )
     return generator.generate_report(processed_results=processed_results, title=title)
 
 
-def _compute_crawl_timeout(keywords: List[str], max_results_per_keyword: int) -> int:
-    """按「约 1 条/分钟」动态计算爬取超时（秒），至少 10 分钟。"""
-    total_max = len(keywords) * max_results_per_keyword
-    return max(1200, 180 + total_max * 60)
+def _compute_crawl_timeout(
+    keywords: List[str],
+    max_results_per_keyword: int,
+    platform: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    估算单个关键词任务的爬取超时（秒）。
+    该平台已有足够历史遥测时按「每条耗时」分位数计算，并给出停滞阈值 stall_timeout；
+    否则回退到「约 1 条/分钟、至少 20 分钟」的固定启发式。
+    """
+    if platform:
+        return TimeoutModel().suggest(platform, len(keywords), max_results_per_keyword)
+    return {
+        "timeout": heuristic_timeout(len(keywords), max_results_per_keyword),
+        "stall_timeout": None,
+        "source": "heuristic",
+        "samples": 0,
+    }
+
+
+async def _stream_keywords(
+    crawler: SocialMediaCrawler,
+    keywords: List[str],
+    max_results_per_keyword: int,
+    timeout: int,
+    partial_path: Path,
+    stall_timeout: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    流式依次爬取各关键词：结果一经写入会话文件即追加到本地 partial_path（JSON Lines，首行为平台与关键词等元信息），
+    下游可在任务结束前读取部分数据；任务超时也不会丢失已抓取的条目。
+    """
+    partial_path.parent.mkdir(parents=True, exist_ok=True)
+    print(f"📝 流式模式：增量结果实时写入 {partial_path}")
+    all_results = []
+    with open(partial_path, "w", encoding="utf-8") as f:
+        # 首行元信息：write_processed.py 直接以 .partial.jsonl 为输入时据此得知平台与关键词
+        header = {
+            "_type": "header",
+            "platform": crawler.platform_config.name,
+            "platform_display": crawler.platform_config.display_name,
+            "keywords": keywords,
+            "keyword": keywords[0] if len(keywords) == 1 else "",
+            "crawl_time": datetime.now().isoformat(),
+        }
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for i, keyword in enumerate(keywords, 1):
+            print(f"\n处理关键词 {i}/{len(keywords)}: {keyword}")
+            async for record in crawler.stream_by_keyword(
+                keyword=keyword,
+                max_results=max_results_per_keyword,
+                timeout=timeout,
+                stall_timeout=stall_timeout,
+            ):
+                record.setdefault("keyword", keyword)
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                all_results.append(record)
+            task_result = crawler.last_task_result or {}
+            if not task_result.get("success"):
+                print(f"   ⚠️ 关键词 {keyword} 任务未正常结束: {task_result.get('error')}（已保留已抓取条目）")
+
+    if not all_results and not (crawler.last_task_result or {}).get("success"):
+        return {"success": False, "error": (crawler.last_task_result or {}).get("error", "流式爬取未获得任何结果")}
+
+    return {
+        "success": True,
+        "platform": crawler.platform_config.name,
+        "platform_display": crawler.platform_config.display_name,
+        "keywords": keywords,
+        "keyword": keywords[0] if len(keywords) == 1 else "",
+        "total_count": len(all_results),
+        "results": all_results,
+        "partial_output_path": str(partial_path),
+        "crawl_time": datetime.now().isoformat(),
+    }
+
+
+def _write_raw_output(crawl_results: Dict[str, Any], path: Path) -> Optional[str]:
+    """写入原始爬取结果 JSON，失败时返回 None（不影响返回）"""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(crawl_results, f, ensure_ascii=False, indent=2)
+        return str(path)
+    except Exception as e:
+        print(f"   ⚠️ 写入原始数据文件失败（不影响返回）: {e}")
+        return None
 
 
 async def crawl_for_sentiment(
@@ -81,6 +184,13 @@ async def crawl_for_sentiment(
     agentbay_api_key: Optional[str] = None,
     context_name: str = "sentiment-analysis",
     crawl_timeout: Optional[int] = None,
+    concurrency: int = 1,
+    session_pool: Optional[SessionPool] = None,
+    stream: bool = False,
+    dedup_db: Optional[str] = None,
+    dedup_index: Optional[DedupIndex] = None,
+    since_last_run: bool = False,
+    write_raw: bool = True,
 ) -> Dict[str, Any]:
     """
     按关键词/平台爬取原始数据并返回。不在此做情感分析或报告生成，由主 Agent 基于返回数据完成。
@@ -93,17 +203,31 @@ async def crawl_for_sentiment(
         report_title: 用于生成输出文件名，可选
         agentbay_api_key: AgentBay API Key，未传则从环境变量 AGENTBAY_API_KEY 读取
         context_name: Browser Context 名称
-        crawl_timeout: 爬取超时（秒）；不传或为 None 时按「约 1 条/分钟」动态计算，至少 10 分钟
+        crawl_timeout: 单个关键词任务的爬取超时（秒）；不传或为 None 时按该平台历史遥测估算，无历史时按「约 1 条/分钟」计算，至少 20 分钟
+        concurrency: 多关键词时的并发会话数；大于 1 时每个会话独立爬取一部分关键词（受平台并发上限约束）
+        session_pool: 可选会话池；常驻进程中多次调用时传入同一个 SessionPool 以复用已初始化的会话
+        stream: 流式模式；任务执行期间轮询会话结果文件，新条目实时追加到 output_dir 下的 .partial.jsonl（不与 concurrency>1 同时生效）
+        dedup_db: 跨运行去重索引（SQLite）路径；传入后每条结果带 dedup_status（new/seen/duplicate）
+        since_last_run: 仅输出相对历史运行新增的条目（未传 dedup_db 时使用 output_dir/.dedup_index.sqlite）
+        dedup_index: 调用方打开的去重索引（优先于 dedup_db）；由调用方在写出原始结果后 commit_run 并关闭
+        write_raw: 是否把原始结果写入 output_dir（多平台合并时由调用方统一写入）
 
     Returns:
         含 success、crawl_results、raw_output_path（可选）的字典
     """
+    stall_timeout = None
     if crawl_timeout is None or crawl_timeout <= 0:
-        crawl_timeout = _compute_crawl_timeout(keywords, max_results_per_keyword)
-        print(f"⏱️ 爬取超时已动态设置为 {crawl_timeout} 秒（约 1 条/分钟，至少 10 分钟）\n")
+        suggestion = _compute_crawl_timeout(keywords, max_results_per_keyword, platform)
+        crawl_timeout = suggestion["timeout"]
+        stall_timeout = suggestion["stall_timeout"]
+        if suggestion["source"] == "history":
+            print(f"⏱️ 爬取超时已按 {suggestion['samples']} 条历史遥测设置为 {crawl_timeout} 秒/关键词"
+                  f"（停滞 {stall_timeout} 秒无新条目即提前结束）\n")
+        else:
+            print(f"⏱️ 爬取超时已动态设置为 {crawl_timeout} 秒（约 1 条/分钟，至少 20 分钟）\n")
 
     api_key = (agentbay_api_key or "").strip() or get_api_key()
-    if not api_key:
+    if not api_key and session_pool is None:
         return {
             "success": False,
             "error": "未提供 AGENTBAY_API_KEY（请设置环境变量 AGENTBAY_API_KEY 或创建 ~/.config/agentbay/api_key 文件）",
@@ -127,55 +251,94 @@ async def crawl_for_sentiment(
     print(f"🔍 关键词: {', '.join(keywords)}")
     print(f"📊 每个关键词最大结果数: {max_results_per_keyword}\n")
 
-    adapter = None
-    try:
-        print("=" * 60)
-        print("步骤1: 创建爬取会话")
-        print("=" * 60)
-        adapter = await create_crawler_session(
-            api_key=api_key,
-            context_name=context_name,
-            platform_config=platform_config,
-        )
-
-        print("\n" + "=" * 60)
-        print("步骤2: 执行内容爬取")
-        print("=" * 60)
-        crawler = SocialMediaCrawler(adapter, platform_config)
+    # 跨运行去重：标记或剔除历史已见过的条目，减少下游情感分析的重复开销
+    # 本次登记的条目在原始结果写出后才提交，运行失败时不会被之后的运行当作"已见过"
+    owns_index = dedup_index is None
+    if owns_index:
+        if since_last_run and not dedup_db:
+            dedup_db = str(Path(out_dir) / ".dedup_index.sqlite")
+        dedup_index = DedupIndex(dedup_db) if dedup_db else None
+    crawler_options = {
+        "dedup_index": dedup_index,
+        "drop_seen": since_last_run,
+        "telemetry": CrawlTelemetry(),
+    }
+
+    # 原始数据文件名（流式模式下的增量 .partial.jsonl 与最终 .json 共用同一前缀）
+    title_part = (report_title or f"{platform_config.display_name}_{','.join(keywords[:2])}").replace(" ", "_")[:50]
+    raw_stem = f"{platform}_{title_part}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    # 会话提供者：传入 session_pool 时复用池中常驻会话，否则每次新建并在结束时关闭
+    if session_pool is not None:
+        def session_provider():
+            return session_pool.acquire(platform_config, context_name=context_name)
+    else:
+        def session_provider():
+            return crawler_session(api_key, context_name, platform_config)
 
-        if len(keywords) == 1:
-            crawl_results = await crawler.crawl_by_keyword(
-                keyword=keywords[0],
-                max_results=max_results_per_keyword,
-                timeout=crawl_timeout,
+    try:
+        if concurrency > 1 and len(keywords) > 1:
+            print("=" * 60)
+            print("步骤1-2: 并发创建会话并执行内容爬取")
+            print("=" * 60)
+            crawler = ConcurrentKeywordCrawler(
+                session_provider=session_provider,
+                platform_config=platform_config,
+                concurrency=concurrency,
+                crawler_options=crawler_options,
             )
-        else:
-            crawl_results = await crawler.crawl_multiple_keywords(
+            crawl_results = await crawler.crawl(
                 keywords=keywords,
                 max_results_per_keyword=max_results_per_keyword,
                 timeout=crawl_timeout,
+                stall_timeout=stall_timeout,
             )
+        else:
+            print("=" * 60)
+            print("步骤1: 创建爬取会话")
+            print("=" * 60)
+            async with session_provider() as adapter:
+                print("\n" + "=" * 60)
+                print("步骤2: 执行内容爬取")
+                print("=" * 60)
+                crawler = SocialMediaCrawler(adapter, platform_config, **crawler_options)
+
+                if stream:
+                    crawl_results = await _stream_keywords(
+                        crawler,
+                        keywords,
+                        max_results_per_keyword,
+                        crawl_timeout,
+                        Path(out_dir) / f"{raw_stem}.partial.jsonl",
+                        stall_timeout=stall_timeout,
+                    )
+                elif len(keywords) == 1:
+                    crawl_results = await crawler.crawl_by_keyword(
+                        keyword=keywords[0],
+                        max_results=max_results_per_keyword,
+                        timeout=crawl_timeout,
+                        stall_timeout=stall_timeout,
+                    )
+                else:
+                    crawl_results = await crawler.crawl_multiple_keywords(
+                        keywords=keywords,
+                        max_results_per_keyword=max_results_per_keyword,
+                        timeout=crawl_timeout,
+                        stall_timeout=stall_timeout,
+                    )
 
         if not crawl_results.get("success"):
             return crawl_results
 
         crawl_results["data_sources"] = [crawl_results.get("platform_display", "浏览器爬取")]
+        if dedup_index is not None:
+            crawl_results["dedup_stats"] = dict(dedup_index.stats)
+            crawl_results["since_last_run"] = since_last_run
 
         # 将原始爬取结果写入 output_dir，供主 Agent 做情感分析/报告
-        raw_output_path = None
-        try:
-            out_path = Path(out_dir)
-            out_path.mkdir(parents=True, exist_ok=True)
-            platform_display = crawl_results.get("platform_display", platform)
-            title_part = (report_title or f"{platform_display}_{','.join(keywords[:2])}").replace(" ", "_")[:50]
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            raw_filename = f"{platform}_{title_part}_{ts}.json"
-            raw_output_path = out_path / raw_filename
-            with open(raw_output_path, "w", encoding="utf-8") as f:
-                json.dump(crawl_results, f, ensure_ascii=False, indent=2)
-            raw_output_path = str(raw_output_path)
-        except Exception as e:
-            print(f"   ⚠️ 写入原始数据文件失败（不影响返回）: {e}")
+        raw_output_path = _write_raw_output(crawl_results, Path(out_dir) / f"{raw_stem}.json") if write_raw else None
+        if dedup_index is not None and owns_index and (raw_output_path or not write_raw):
+            dedup_index.commit_run()
 
         print("\n" + "=" * 60)
         print("✅ 爬取完成，原始数据已返回（情感分析由主 Agent 完成）")
@@ -195,8 +358,150 @@ async def crawl_for_sentiment(
         return {"success": False, "error": error_msg}
 
     finally:
-        if adapter:
-            await adapter.close()
+        if dedup_index is not None and owns_index:
+            dedup_index.close()
+
+
+async def crawl_multi_platform(
+    platforms: List[str],
+    keywords: List[str],
+    *,
+    output_dir: Optional[str] = None,
+    report_title: Optional[str] = None,
+    context_name: str = "sentiment-analysis",
+    context_per_platform: bool = False,
+    **crawl_options: Any,
+) -> Dict[str, Any]:
+    """
+    多平台并发爬取：每个平台使用独立会话与浏览器（默认共用登录所用的 Browser Context，可选各平台独立 Context）同时执行，
+    合并为一份带平台标记的结果文件；部分平台失败时按平台报告，其余平台结果照常输出。
+
+    Args:
+        platforms: 平台标识列表（如 ["weibo", "xhs", "zhihu", "baidu"]）
+        keywords: 关键词列表
+        output_dir: 原始数据输出目录，默认 "output"
+        report_title: 用于生成输出文件名，可选
+        context_name: Browser Context 名称
+        context_per_platform: 为 True 时各平台使用 "<context_name>-<平台>" 作为独立 Context（需分别登录）；
+            默认各平台会话挂载同一个 Context，沿用 login.py 在该 Context 中保存的各平台登录状态，
+            关闭会话时的 Context 写回按 Context 串行
+        **crawl_options: 透传给 crawl_for_sentiment 的其余参数（max_results_per_keyword、crawl_timeout 等）；
+            未传 session_pool 时各平台共用本次运行内创建的会话池
+
+    Returns:
+        含 success、crawl_results（合并结果，含 platform_results）、raw_output_path 的字典
+    """
+    platforms = list(dict.fromkeys(platforms))
+    for p in platforms:
+        try:
+            get_platform_config(p)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+
+    # 各平台共用一个去重索引，合并结果写出后统一提交
+    dedup_db = crawl_options.pop("dedup_db", None)
+    if crawl_options.get("since_last_run") and not dedup_db:
+        dedup_db = str(Path(output_dir or "output") / ".dedup_index.sqlite")
+    dedup_index = DedupIndex(dedup_db) if dedup_db else None
+    # 调用方未传会话池时为本次运行建一个：各平台挂载同一 Context 时，先完成的平台归还的会话
+    # 可直接交给其他平台换用的新会话，免去重新创建与初始化浏览器；运行结束时全部关闭
+    owns_pool = crawl_options.get("session_pool") is None
+    if owns_pool:
+        api_key = (crawl_options.get("agentbay_api_key") or "").strip() or get_api_key()
+        if api_key:
+            crawl_options["session_pool"] = SessionPool(api_key=api_key)
+    try:
+        return await _crawl_platforms(
+            platforms, keywords, output_dir, report_title, context_name, context_per_platform,
+            dedup_index, crawl_options,
+        )
+    finally:
+        if dedup_index is not None:
+            dedup_index.close()
+        if owns_pool and crawl_options.get("session_pool") is not None:
+            await crawl_options["session_pool"].close_all()
+
+
+async def _crawl_platforms(
+    platforms: List[str],
+    keywords: List[str],
+    output_dir: Optional[str],
+    report_title: Optional[str],
+    context_name: str,
+    context_per_platform: bool,
+    dedup_index: Optional[DedupIndex],
+    crawl_options: Dict[str, Any],
+) -> Dict[str, Any]:
+    """crawl_multi_platform 的主体：并发爬取各平台、合并并写出结果，写出成功后提交去重索引"""
+    print(f"\n🌐 多平台并发爬取: {', '.join(platforms)}")
+    outcomes = await asyncio.gather(*[
+        crawl_for_sentiment(
+            platform=p,
+            keywords=keywords,
+            output_dir=output_dir,
+            context_name=f"{context_name}-{p}" if context_per_platform else context_name,
+            write_raw=False,
+            dedup_index=dedup_index,
+            **crawl_options,
+        )
+        for p in platforms
+    ], return_exceptions=True)
+
+    merged_results = []
+    platform_results = {}
+    for p, outcome in zip(platforms, outcomes):
+        display = get_platform_config(p).display_name
+        if isinstance(outcome, BaseException):
+            outcome = {"success": False, "error": str(outcome)}
+        if not outcome.get("success"):
+            platform_results[p] = {"platform_display": display, "success": False, "total_count": 0,
+                                   "error": outcome.get("error")}
+            continue
+        results = outcome["crawl_results"].get("results", [])
+        for item in results:
+            item["platform"] = p
+            item["platform_display"] = display
+        merged_results.extend(results)
+        platform_results[p] = {"platform_display": display, "success": True, "total_count": len(results),
+                               "error": None}
+
+    print("\n📊 各平台爬取结果:")
+    for p, info in platform_results.items():
+        if info["success"]:
+            print(f"   ✅ {info['platform_display']}: {info['total_count']} 条")
+        else:
+            print(f"   ❌ {info['platform_display']}: {info['error']}")
+
+    succeeded = [p for p, info in platform_results.items() if info["success"]]
+    if not succeeded:
+        return {"success": False, "error": "所有平台爬取均失败", "platform_results": platform_results}
+
+    displays = [platform_results[p]["platform_display"] for p in succeeded]
+    crawl_results = {
+        "success": True,
+        "platform": "multi",
+        "platform_display": "、".join(displays),
+        "platforms": platforms,
+        "keywords": keywords,
+        "keyword": keywords[0] if len(keywords) == 1 else "",
+        "total_count": len(merged_results),
+        "results": merged_results,
+        "platform_results": platform_results,
+        "partial_success": len(succeeded) < len(platforms),
+        "data_sources": displays,
+        "crawl_time": datetime.now().isoformat(),
+    }
+
+    title_part = (report_title or f"{'+'.join(platforms)}_{','.join(keywords[:2])}").replace(" ", "_")[:50]
+    raw_path = Path(output_dir or "output") / f"multi_{title_part}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    raw_output_path = _write_raw_output(crawl_results, raw_path)
+    if dedup_index is not None and raw_output_path:
+        dedup_index.commit_run()
+    return {
+        "success": True,
+        "crawl_results": crawl_results,
+        "raw_output_path": raw_output_path,
+    }
 
 
 def _parse_args():
@@ -204,7 +509,7 @@ def _parse_args():
         description="舆情爬取：除 AGENTBAY_API_KEY 外，其余参数由主 Agent 传入；情感分析由主 Agent 完成。",
     )
     parser.add_argument("--keywords", "-k", required=True, help="关键词，多个用逗号分隔")
-    parser.add_argument("--platform", "-p", default="baidu", help="平台: baidu/xhs/weibo/douyin/zhihu/bing（默认 baidu）")
+    parser.add_argument("--platform", "-p", default="baidu", help="平台: baidu/xhs/weibo/douyin/zhihu/bing（默认 baidu）；多个用逗号分隔时各平台并发爬取并合并输出")
     parser.add_argument("--max-results", type=int, default=10, help="每关键词最大结果数（默认10）")
     parser.add_argument("--output-dir", "-o", default="output", help="报告输出目录")
     parser.add_argument("--report-title", help="报告标题（可选）")
@@ -213,7 +518,33 @@ def _parse_args():
         "--crawl-timeout",
         type=int,
         default=None,
-        help="爬取超时（秒）；不传时按「约 1 条/分钟」动态计算，至少 10 分钟",
+        help="单个关键词任务的爬取超时（秒）；不传时按该平台历史遥测估算，无历史时按「约 1 条/分钟」动态计算",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="多关键词并发会话数（默认 1 即串行；实际不超过平台并发上限）",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="流式模式：任务执行期间实时把新抓取的条目写入 .partial.jsonl",
+    )
+    parser.add_argument(
+        "--dedup-db",
+        default=None,
+        help="跨运行去重索引（SQLite）路径；传入后每条结果标记 dedup_status（new/seen/duplicate）",
+    )
+    parser.add_argument(
+        "--since-last-run",
+        action="store_true",
+        help="仅输出相对历史运行新增的条目（未传 --dedup-db 时使用 <output-dir>/.dedup_index.sqlite）",
+    )
+    parser.add_argument(
+        "--context-per-platform",
+        action="store_true",
+        help="多平台时各平台使用独立 Browser Context「<context-name>-<平台>」（需分别用 login.py 登录）",
     )
     return parser.parse_args()
 
@@ -225,24 +556,40 @@ async def main():
         print("❌ 错误: --keywords 不能为空")
         sys.exit(1)
 
-    # 未传 --crawl-timeout 时由 crawl_for_sentiment 内部按「约 1 条/分钟」动态计算
+    platforms = [p.strip() for p in args.platform.split(",") if p.strip()]
+    if not platforms:
+        print("❌ 错误: --platform 不能为空")
+        sys.exit(1)
+
+    # 未传 --crawl-timeout 时由 crawl_for_sentiment 内部按历史遥测或「约 1 条/分钟」动态计算
     effective_timeout = args.crawl_timeout
     if effective_timeout is None:
-        effective_timeout = _compute_crawl_timeout(keywords, args.max_results)
-    print(f"\n📋 参数: 平台={args.platform}, 关键词={', '.join(keywords)}, 每关键词最大={args.max_results}, 输出={args.output_dir}, 爬取超时={effective_timeout} 秒")
+        effective_timeout = "、".join(
+            f"{p} {_compute_crawl_timeout(keywords, args.max_results, p)['timeout']}" for p in platforms
+        )
+    print(f"\n📋 参数: 平台={', '.join(platforms)}, 关键词={', '.join(keywords)}, 每关键词最大={args.max_results}, 输出={args.output_dir}, 爬取超时={effective_timeout} 秒")
     if args.report_title:
         print(f"   报告标题: {args.report_title}")
     print()
 
-    result = await crawl_for_sentiment(
-        platform=args.platform,
+    crawl_options = dict(
         keywords=keywords,
         max_results_per_keyword=args.max_results,
         output_dir=args.output_dir,
         report_title=args.report_title or None,
         context_name=args.context_name,
         crawl_timeout=args.crawl_timeout,
+        concurrency=args.concurrency,
+        stream=args.stream,
+        dedup_db=args.dedup_db,
+        since_last_run=args.since_last_run,
     )
+    if len(platforms) > 1:
+        result = await crawl_multi_platform(
+            platforms, context_per_platform=args.context_per_platform, **crawl_options
+        )
+    else:
+        result = await crawl_for_sentiment(platform=platforms[0], **crawl_options)
 
     if result.get("success"):
         print("\n✅ 爬取完成！")
@@ -3,18 +3,37 @@
 提供基于 wuying-agentbay-sdk 的社交媒体平台爬取功能
 """
 
-from .agentbay_adapter import AgentBayAdapter, create_crawler_session
+from .agentbay_adapter import AgentBayAdapter, create_crawler_session, crawler_session
 from .platform_config import PlatformConfig, get_platform_config, SUPPORTED_PLATFORMS
 from .crawler import SocialMediaCrawler
-from .prompts import build_search_prompt, get_search_prompt_template
+from .concurrent_crawler import ConcurrentKeywordCrawler, PlatformRateBudget
+from .mock_adapter import MockAgentBayAdapter
+from .session_pool import SessionPool
+from .results_parser import ResultsParser, parse_results_text
+from .dedup import DedupIndex, normalize_url
+from .telemetry import CrawlTelemetry, TimeoutModel
+from .prompts import build_search_prompt, get_search_prompt_template, PromptRegistry, get_prompt_registry
 
 __all__ = [
     "AgentBayAdapter",
     "create_crawler_session",
+    "crawler_session",
     "PlatformConfig",
     "get_platform_config",
     "SUPPORTED_PLATFORMS",
     "SocialMediaCrawler",
+    "ConcurrentKeywordCrawler",
+    "PlatformRateBudget",
+    "MockAgentBayAdapter",
+    "SessionPool",
+    "ResultsParser",
+    "parse_results_text",
+    "DedupIndex",
+    "normalize_url",
+    "CrawlTelemetry",
+    "TimeoutModel",
     "build_search_prompt",
+    "PromptRegistry",
+    "get_prompt_registry",
     "get_search_prompt_template",
 ]
@@ -4,7 +4,10 @@ AgentBay 适配器模块
 """
 import asyncio
 import json
-from typing import Dict, Any, Optional
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, AsyncIterator
 
 # AgentBay imports
 try:
@@ -17,26 +20,65 @@ except ImportError as e:
 
 from .platform_config import PlatformConfig
 
+# Agent 在会话中写入爬取结果的文件路径
+RESULTS_FILE_PATH = "/tmp/results.json"
+
+# 轮询 Agent 任务状态的间隔（秒）与任务的终态
+TASK_POLL_INTERVAL = 3.0
+TASK_TERMINAL_STATUSES = ("finished", "failed", "cancelled", "unsupported")
+# 连续查询任务状态失败的容忍次数（网络抖动等暂时性错误），超过后放弃等待并终止任务
+TASK_STATUS_RETRIES = 3
+
+# 每个事件循环内按 Context 名称的同步锁：多平台/多关键词并发时多个会话挂载同一 Context，
+# 关闭时依次写回，避免并发写回互相覆盖
+_context_sync_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _context_sync_lock(context_name: str) -> asyncio.Lock:
+    """当前事件循环中该 Context 的写回锁"""
+    locks = _context_sync_locks.setdefault(asyncio.get_running_loop(), {})
+    lock = locks.get(context_name)
+    if lock is None:
+        lock = locks[context_name] = asyncio.Lock()
+    return lock
+
 
 class AgentBayAdapter:
     """AgentBay适配器类"""
 
-    def __init__(self, api_key: str, context_name: str = "sentiment-analysis"):
+    def __init__(
+        self,
+        api_key: str,
+        context_name: str = "sentiment-analysis",
+        image_id: str = "linux_latest"
+    ):
         """
         初始化适配器
 
         Args:
             api_key: AgentBay API密钥
             context_name: Browser Context 名称
+            image_id: 会话镜像 ID
         """
         if not AGENTBAY_AVAILABLE:
             raise ImportError("wuying-agentbay-sdk 未安装，无法使用 AgentBay")
 
         self.api_key = api_key
         self.context_name = context_name
+        self.image_id = image_id
         self.agent_bay = None
         self.session = None
         self.context = None
+        # 最近一次创建会话的耗时（秒），供遥测读取；被读取后置为 None，复用会话时不再重复计入
+        self.session_startup_time: Optional[float] = None
+        # 任务被提前结束但未能确认终止时置为 True：Agent 可能仍在写结果文件，会话不再复用
+        self.task_detached = False
+        # execute_crawl_task 启动、尚未结束的 Agent 任务 ID，提前结束时传给 terminate_task
+        self.current_task_id: Optional[str] = None
+        # 最近一次确认终止的任务 ID：重复终止同一任务时直接返回成功，不再调用 terminate_task
+        self._terminated_task_id: Optional[str] = None
 
     async def create_session(self, platform_config: PlatformConfig) -> Dict[str, Any]:
         """
@@ -48,6 +90,7 @@ class AgentBayAdapter:
         Returns:
             包含 session、context、agent_bay 的字典，如果失败返回错误信息
         """
+        started = time.monotonic()
         try:
             self.agent_bay = AsyncAgentBay(api_key=self.api_key)
 
@@ -80,7 +123,7 @@ class AgentBayAdapter:
             # 创建浏览器会话
             print("📡 正在创建 AgentBay 浏览器会话...")
             params = CreateSessionParams(
-                image_id="linux_latest",
+                image_id=self.image_id,
                 browser_context=browser_context
             )
             session_result = await self.agent_bay.create(params)
@@ -92,6 +135,8 @@ class AgentBayAdapter:
                 }
 
             self.session = session_result.session
+            self.task_detached = False
+            self.current_task_id = None
             print(f"✅ 会话已创建: {self.session.session_id}\n")
 
             # 初始化浏览器
@@ -104,6 +149,7 @@ class AgentBayAdapter:
                     "error": "Browser initialization failed"
                 }
             print("✅ 浏览器已初始化\n")
+            self.session_startup_time = time.monotonic() - started
 
             return {
                 "success": True,
@@ -126,7 +172,8 @@ class AgentBayAdapter:
         timeout: int = 600
     ) -> Dict[str, Any]:
         """
-        执行爬取任务
+        执行爬取任务：以非阻塞方式启动 Agent 任务（任务 ID 记在 current_task_id）并轮询状态直到结束；
+        查询状态的暂时性失败会重试，超时、放弃等待或被取消时终止任务（无法终止则标记 task_detached）
 
         Args:
             task_prompt: 任务提示词
@@ -143,33 +190,22 @@ class AgentBayAdapter:
 
         try:
             print(f"🚀 正在执行爬取任务...")
-            result = await self.session.agent.browser.execute_task_and_wait(
-                task_prompt,
-                timeout,
-                True,
-                None
-            )
-
-            if not result.success:
-                return {
-                    "success": False,
-                    "error": result.error_message or result.task_status,
-                    "task_status": result.task_status
-                }
-
-            # 解析结果
-            task_result = result.task_result
-            if isinstance(task_result, str):
-                try:
-                    task_result = json.loads(task_result)
-                except json.JSONDecodeError:
-                    pass
-
-            return {
-                "success": True,
-                "result": task_result,
-                "raw_result": result.task_result
-            }
+            browser = self.session.agent.browser
+            if not hasattr(browser, "execute_task"):
+                result = await browser.execute_task_and_wait(task_prompt, timeout, True, None)
+                return self._task_outcome(result.success, result.task_status, result.task_result, result.error_message)
+
+            # 非阻塞启动以拿到任务 ID：提前结束时据此调用 terminate_task，会话可继续复用
+            started = await browser.execute_task(task_prompt, use_vision=True)
+            if not started.success:
+                return self._task_outcome(False, "failed", None, started.error_message)
+            self.current_task_id = started.task_id
+            try:
+                return await self._wait_task(browser, started.task_id, timeout)
+            finally:
+                # 未等到任务结束就停止观察（超时、状态查询持续失败、本地等待被取消）时终止任务
+                if self.current_task_id == started.task_id:
+                    await self.stop_current_task(started.task_id)
 
         except Exception as e:
             import traceback
@@ -181,15 +217,127 @@ class AgentBayAdapter:
                 "error": error_msg
             }
 
+    async def _wait_task(self, browser, task_id: str, timeout: int) -> Dict[str, Any]:
+        """轮询任务状态直到结束或超时；连续失败超过 TASK_STATUS_RETRIES 次时放弃"""
+        deadline = time.monotonic() + timeout
+        failures = 0
+        while True:
+            try:
+                status = await browser.get_task_status(task_id)
+                error_message = None if status.success else status.error_message
+            except Exception as e:
+                status, error_message = None, str(e)
+            if error_message is not None:
+                failures += 1
+                if failures > TASK_STATUS_RETRIES:
+                    return self._task_outcome(False, "failed", None, f"查询任务状态失败: {error_message}")
+                print(f"⚠️ 查询任务状态失败，稍后重试（{failures}/{TASK_STATUS_RETRIES}）: {error_message}")
+            else:
+                failures = 0
+                if status.task_status in TASK_TERMINAL_STATUSES:
+                    self.current_task_id = None
+                    return self._task_outcome(
+                        status.task_status == "finished", status.task_status,
+                        status.task_product, status.error_message
+                    )
+            if time.monotonic() >= deadline:
+                return self._task_outcome(False, "timeout", None, f"任务超时（{timeout} 秒）")
+            await asyncio.sleep(TASK_POLL_INTERVAL)
+
+    @staticmethod
+    def _task_outcome(
+        success: bool,
+        task_status: Optional[str],
+        task_result: Any,
+        error_message: Optional[str]
+    ) -> Dict[str, Any]:
+        """将 SDK 的任务结果整理为 execute_crawl_task 的返回格式"""
+        if not success:
+            return {
+                "success": False,
+                "error": error_message or task_status,
+                "task_status": task_status
+            }
+
+        # 解析结果
+        raw_result = task_result
+        if isinstance(task_result, str):
+            try:
+                task_result = json.loads(task_result)
+            except json.JSONDecodeError:
+                pass
+
+        return {
+            "success": True,
+            "result": task_result,
+            "raw_result": raw_result
+        }
+
+    async def stop_current_task(self, task_id: Optional[str] = None) -> bool:
+        """
+        尽力终止会话中正在运行的浏览器 Agent 任务（达到目标条数或停滞时提前结束用）。
+        已知任务 ID 时调用 SDK 的 terminate_task；无法终止时将会话标记为 task_detached，
+        爬取器与会话池不再在该会话上执行后续任务，关闭会话时 Agent 随之结束。
+
+        Args:
+            task_id: Agent 任务 ID，默认为 execute_crawl_task 最近启动、尚未结束的任务
+
+        Returns:
+            已确认终止时返回 True
+        """
+        task_id = task_id or self.current_task_id
+        if task_id and task_id == self._terminated_task_id:
+            # execute_crawl_task 停止观察时已终止过该任务
+            return True
+        browser = getattr(getattr(self.session, "agent", None), "browser", None)
+        terminate = getattr(browser, "terminate_task", None)
+        if terminate is not None and task_id:
+            try:
+                result = await terminate(task_id)
+                if getattr(result, "success", True):
+                    print("✅ 已终止 Agent 任务")
+                    self._terminated_task_id = task_id
+                    if self.current_task_id == task_id:
+                        self.current_task_id = None
+                    return True
+            except Exception as e:
+                print(f"⚠️ 终止 Agent 任务失败: {e}")
+        self.task_detached = True
+        return False
+
+    async def is_healthy(self) -> bool:
+        """
+        检查会话是否仍可用（复用前的健康检查）。
+        通过清空结果文件探测会话文件系统，探测成功的同时也完成了复用前的结果文件重置。
+
+        Returns:
+            会话可正常写入文件系统时返回 True；Agent 任务可能仍在运行时返回 False
+        """
+        if self.task_detached:
+            return False
+        return await self.reset_results_file()
+
+    async def reset_results_file(self) -> bool:
+        """清空会话中的结果文件，避免复用会话时读到上一次任务的结果"""
+        if not self.session:
+            return False
+        try:
+            result = await self.session.file_system.write_file(RESULTS_FILE_PATH, "", "overwrite")
+            return bool(getattr(result, "success", False))
+        except Exception as e:
+            print(f"⚠️ 清空 {RESULTS_FILE_PATH} 失败: {e}")
+            return False
+
     async def close(self):
         """关闭会话"""
         if self.session and self.agent_bay:
             try:
                 await asyncio.sleep(2)
 
-                # 显式同步 Context（保存浏览器状态）
+                # 显式同步 Context（保存浏览器状态）；同一 Context 的多个会话依次写回
                 try:
-                    sync_result = await self.session.context.sync()
+                    async with _context_sync_lock(self.context_name):
+                        sync_result = await self.session.context.sync()
                     if sync_result.success:
                         print("✅ Context 已同步")
                 except Exception as sync_error:
@@ -200,12 +348,14 @@ class AgentBayAdapter:
                 print("✅ 会话已关闭")
             except Exception as e:
                 print(f"⚠️ 关闭会话时出错: {e}")
+            self.session = None
 
 
 async def create_crawler_session(
     api_key: str,
     context_name: str,
-    platform_config: PlatformConfig
+    platform_config: PlatformConfig,
+    image_id: str = "linux_latest"
 ) -> AgentBayAdapter:
     """
     创建爬取会话的便捷函数
@@ -214,12 +364,37 @@ async def create_crawler_session(
         api_key: AgentBay API密钥
         context_name: Browser Context 名称
         platform_config: 平台配置
+        image_id: 会话镜像 ID
 
     Returns:
         AgentBayAdapter实例
     """
-    adapter = AgentBayAdapter(api_key, context_name)
+    adapter = AgentBayAdapter(api_key, context_name, image_id)
     result = await adapter.create_session(platform_config)
     if not result.get("success"):
         raise Exception(result.get("error", "创建会话失败"))
     return adapter
+
+
+@asynccontextmanager
+async def crawler_session(
+    api_key: str,
+    context_name: str,
+    platform_config: PlatformConfig
+) -> AsyncIterator[AgentBayAdapter]:
+    """
+    以异步上下文管理器形式创建爬取会话，退出时自动关闭
+
+    Args:
+        api_key: AgentBay API密钥
+        context_name: Browser Context 名称
+        platform_config: 平台配置
+
+    Yields:
+        AgentBayAdapter实例
+    """
+    adapter = await create_crawler_session(api_key, context_name, platform_config)
+    try:
+        yield adapter
+    finally:
+        await adapter.close()
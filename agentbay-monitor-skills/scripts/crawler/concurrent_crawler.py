@@ -0,0 +1,178 @@
+"""
+并发爬取模块
+将多个关键词分发到 N 个 AgentBay 会话上并发执行，每个会话拥有独立的 /tmp/results.json
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional
+
+from .platform_config import PlatformConfig
+from .crawler import SocialMediaCrawler
+
+
+# 会话提供者：调用后返回一个异步上下文管理器，进入时得到已初始化的适配器，退出时负责回收/关闭
+SessionProvider = Callable[[], AsyncContextManager[Any]]
+
+
+class PlatformRateBudget:
+    """平台速率预算：限制同一平台相邻两次任务启动的最小间隔"""
+
+    def __init__(self, min_interval: float):
+        """
+        初始化速率预算
+
+        Args:
+            min_interval: 相邻两次任务启动的最小间隔（秒）
+        """
+        self.min_interval = max(0.0, float(min_interval))
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def acquire(self):
+        """等待直到允许启动下一个任务"""
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = time.monotonic()
+            self._next_start = now + self.min_interval
+
+
+class ConcurrentKeywordCrawler:
+    """多关键词并发爬取器"""
+
+    def __init__(
+        self,
+        session_provider: SessionProvider,
+        platform_config: PlatformConfig,
+        concurrency: int = 2,
+        min_task_interval: Optional[float] = None,
+        crawler_options: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        初始化并发爬取器
+
+        Args:
+            session_provider: 会话提供者，每个工作协程调用一次以获得独立会话
+            platform_config: 平台配置
+            concurrency: 期望并发会话数，实际不超过平台的 max_concurrent_sessions
+            min_task_interval: 任务启动最小间隔（秒），不传时使用平台配置
+            crawler_options: 传给每个 SocialMediaCrawler 的额外参数（如 dedup_index、drop_seen）
+        """
+        self.session_provider = session_provider
+        self.platform_config = platform_config
+        self.concurrency = max(1, min(int(concurrency), platform_config.max_concurrent_sessions))
+        if min_task_interval is None:
+            min_task_interval = platform_config.min_task_interval
+        self.rate_budget = PlatformRateBudget(min_task_interval)
+        self.crawler_options = crawler_options or {}
+
+    async def _worker(
+        self,
+        worker_id: int,
+        queue: "asyncio.Queue[tuple]",
+        outcomes: List[Optional[Dict[str, Any]]],
+        max_results_per_keyword: int,
+        timeout: int,
+        stall_timeout: Optional[float] = None,
+    ):
+        """
+        单个工作协程：持有一个会话，依次处理队列中的关键词。
+        任务被提前结束但未能确认终止（adapter.task_detached）时交还该会话由提供者关闭，
+        换一个新会话继续处理剩余关键词。
+        """
+        try:
+            while not queue.empty():
+                async with self.session_provider() as adapter:
+                    crawler = SocialMediaCrawler(adapter, self.platform_config, **self.crawler_options)
+                    while not getattr(adapter, "task_detached", False):
+                        try:
+                            index, keyword = queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            return
+                        await self.rate_budget.acquire()
+                        print(f"\n[会话 {worker_id}] 处理关键词 {index + 1}/{len(outcomes)}: {keyword}")
+                        try:
+                            outcomes[index] = await crawler.crawl_by_keyword(
+                                keyword=keyword,
+                                max_results=max_results_per_keyword,
+                                timeout=timeout,
+                                stall_timeout=stall_timeout,
+                            )
+                        except Exception as e:
+                            outcomes[index] = {"success": False, "keyword": keyword, "error": str(e)}
+                if not queue.empty():
+                    print(f"♻️ [会话 {worker_id}] 上一个 Agent 任务未能确认终止，换用新会话")
+        except Exception as e:
+            # 会话创建失败：该工作协程不再领取关键词，剩余关键词由其他会话处理
+            print(f"⚠️ [会话 {worker_id}] 创建或关闭会话失败: {e}")
+
+    async def crawl(
+        self,
+        keywords: List[str],
+        max_results_per_keyword: int = 50,
+        timeout: int = 600,
+        stall_timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        并发爬取多个关键词，合并结果保持关键词原始顺序
+
+        Args:
+            keywords: 关键词列表
+            max_results_per_keyword: 每个关键词的最大结果数
+            timeout: 单个关键词任务的超时时间（秒）
+            stall_timeout: 停滞阈值（秒），传给每个关键词任务
+
+        Returns:
+            合并后的爬取结果，格式与 SocialMediaCrawler.crawl_multiple_keywords 一致，
+            另含 keyword_results（每个关键词的成功状态与条数）
+        """
+        outcomes: List[Optional[Dict[str, Any]]] = [None] * len(keywords)
+        queue: "asyncio.Queue[tuple]" = asyncio.Queue()
+        for item in enumerate(keywords):
+            queue.put_nowait(item)
+
+        workers = min(self.concurrency, len(keywords)) or 1
+        print(f"⚡ 并发爬取: {len(keywords)} 个关键词，{workers} 个会话，"
+              f"任务间隔 {self.rate_budget.min_interval:.1f} 秒")
+        await asyncio.gather(*[
+            self._worker(i + 1, queue, outcomes, max_results_per_keyword, timeout, stall_timeout)
+            for i in range(workers)
+        ])
+
+        all_results = []
+        keyword_results = []
+        for keyword, outcome in zip(keywords, outcomes):
+            if outcome is None:
+                outcome = {"success": False, "error": "没有可用会话处理该关键词"}
+            results = outcome.get("results") if outcome.get("success") else None
+            if isinstance(results, list):
+                all_results.extend(results)
+            keyword_results.append({
+                "keyword": keyword,
+                "success": bool(outcome.get("success")),
+                "total_count": len(results) if isinstance(results, list) else 0,
+                "error": outcome.get("error"),
+            })
+
+        if not any(k["success"] for k in keyword_results):
+            return {
+                "success": False,
+                "error": "所有关键词爬取均失败: " + "; ".join(
+                    f"{k['keyword']}: {k['error']}" for k in keyword_results
+                ),
+                "keyword_results": keyword_results,
+            }
+
+        return {
+            "success": True,
+            "platform": self.platform_config.name,
+            "platform_display": self.platform_config.display_name,
+            "keywords": keywords,
+            "total_count": len(all_results),
+            "results": all_results,
+            "keyword_results": keyword_results,
+            "crawl_time": datetime.now().isoformat(),
+        }
@@ -3,27 +3,53 @@
 使用 AgentBay 进行内容爬取
 """
 import json
-from typing import Dict, Any, List, Optional
+import time
+import asyncio
+from typing import Dict, Any, List, Optional, AsyncIterator
 from datetime import datetime
 
-from .agentbay_adapter import AgentBayAdapter
+from .agentbay_adapter import AgentBayAdapter, RESULTS_FILE_PATH
 from .platform_config import PlatformConfig, get_platform_config
 from .prompts import build_search_prompt
+from .results_parser import ResultsParser, parse_results_text
+from .dedup import DedupIndex, STATUS_NEW
+from .telemetry import CrawlTelemetry
 
 
 class SocialMediaCrawler:
     """社交媒体爬取器"""
 
-    def __init__(self, adapter: AgentBayAdapter, platform_config: PlatformConfig):
+    def __init__(
+        self,
+        adapter: AgentBayAdapter,
+        platform_config: PlatformConfig,
+        dedup_index: Optional[DedupIndex] = None,
+        drop_seen: bool = False,
+        telemetry: Optional[CrawlTelemetry] = None,
+        early_stop: bool = True,
+        watch_interval: float = 5.0
+    ):
         """
         初始化爬取器
 
         Args:
             adapter: AgentBay适配器
             platform_config: 平台配置
+            dedup_index: 可选的跨运行去重索引，传入后每条结果带 dedup_status（new/seen/duplicate）
+            drop_seen: 为 True 时丢弃已见过的条目，仅保留本次新增
+            telemetry: 可选的遥测存储，每个关键词任务结束后记录耗时与产出
+            early_stop: 为 True 时任务执行期间监视结果文件，条数达到 max_results 即提前结束任务
+            watch_interval: 监视结果文件的轮询间隔（秒）
         """
         self.adapter = adapter
         self.platform_config = platform_config
+        self.dedup_index = dedup_index
+        self.drop_seen = drop_seen
+        self.telemetry = telemetry
+        self.early_stop = early_stop
+        self.watch_interval = watch_interval
+        # 最近一次 stream_by_keyword 的任务返回值
+        self.last_task_result: Optional[Dict[str, Any]] = None
 
     def _build_search_prompt(self, keyword: str, max_results: int = 50) -> str:
         """
@@ -52,7 +78,8 @@ class SocialMediaCrawler:
         self,
         keyword: str,
         max_results: int = 50,
-        timeout: int = 600
+        timeout: int = 600,
+        stall_timeout: Optional[float] = None
     ) -> Dict[str, Any]:
         """
         根据关键词爬取内容
@@ -61,6 +88,7 @@ class SocialMediaCrawler:
             keyword: 搜索关键词
             max_results: 最大结果数
             timeout: 超时时间（秒）
+            stall_timeout: 停滞阈值（秒）；已有结果后连续这么久没有新条目写入即提前结束任务
 
         Returns:
             爬取结果
@@ -71,54 +99,45 @@ class SocialMediaCrawler:
         print(f"最大结果数: {max_results}")
         print(f"{'='*60}\n")
 
+        recycled = await self._recycle_detached_session()
+        if recycled is not None:
+            return {"success": False, "keyword": keyword, "error": recycled}
+
         # 结果文件由 Agent 按 JSON Lines 格式写入（每行一条，append 追加），无需预先创建
 
         # 构建搜索提示词
         prompt = self._build_search_prompt(keyword, max_results)
 
         # 执行爬取任务
-        result = await self.adapter.execute_crawl_task(prompt, timeout)
+        task_started = time.monotonic()
+        if self.early_stop or stall_timeout:
+            result = await self._run_watched_task(prompt, max_results, timeout, stall_timeout)
+        else:
+            result = await self.adapter.execute_crawl_task(prompt, timeout)
+        task_duration = time.monotonic() - task_started
 
         # 任务结束后从会话文件系统读取 /tmp/results.json（支持 JSON 数组或 JSON Lines）
         # 即使任务被标记为 success: false（如 Agent 因未满 30 条调用了 done(success: false)），
         # 仍尝试读取文件，若有数据则视为部分成功，避免丢弃已抓取内容
         results_from_file = None
+        parse_stats = None
         if self.adapter.session:
             try:
                 print("📂 正在从会话读取 /tmp/results.json ...")
-                file_result = await self.adapter.session.file_system.read_file("/tmp/results.json")
+                file_result = await self.adapter.session.file_system.read_file(RESULTS_FILE_PATH)
                 if file_result.success:
-                    raw = (file_result.content or "").strip()
-                    if raw:
-                        try:
-                            # 兼容多种格式：
-                            # 1) 整份为 JSON 数组 [ ... ]
-                            if raw.strip().startswith("["):
-                                results_from_file = json.loads(raw)
-                                if not isinstance(results_from_file, list):
-                                    results_from_file = None
-                            else:
-                                lines = [ln.strip() for ln in raw.split("\n") if ln.strip()]
-                                results_from_file = []
-                                # 2) 首行为 Agent 写的 header（以 "results":[ 结尾），其余每行一条 result JSON
-                                if lines and lines[0].rstrip().endswith('"results":['):
-                                    for line in lines[1:]:
-                                        try:
-                                            results_from_file.append(json.loads(line))
-                                        except json.JSONDecodeError:
-                                            pass
-                                else:
-                                    # 3) 纯 JSONL：每行一条完整 JSON
-                                    for line in lines:
-                                        try:
-                                            results_from_file.append(json.loads(line))
-                                        except json.JSONDecodeError:
-                                            pass
-                            if results_from_file is not None:
-                                print(f"📄 已读取 /tmp/results.json，共 {len(results_from_file)} 条结果")
-                        except json.JSONDecodeError as e:
-                            print(f"⚠️ /tmp/results.json 解析失败: {e}，将使用任务返回结果")
-                            results_from_file = None
+                    raw = file_result.content or ""
+                    if raw.strip():
+                        records, parser = parse_results_text(raw)
+                        stats = parse_stats = parser.stats()
+                        if stats["rejected_lines"] or stats["recovered"]:
+                            print(f"⚠️ /tmp/results.json 中 {stats['rejected_lines']} 行无法解析，"
+                                  f"修复截断记录 {stats['recovered']} 条，样本: {stats['rejected_samples'][:2]}")
+                        if records or stats["format"] != "array":
+                            results_from_file = records
+                            print(f"📄 已读取 /tmp/results.json（{stats['format']}），共 {len(records)} 条结果")
+                        else:
+                            print("⚠️ /tmp/results.json 解析失败，将使用任务返回结果")
                     else:
                         results_from_file = []
                         print("📄 已读取 /tmp/results.json，内容为空")
@@ -127,6 +146,13 @@ class SocialMediaCrawler:
             except Exception as e:
                 print(f"⚠️ 读取 /tmp/results.json 异常: {e}，将使用任务返回结果")
 
+        self._record_telemetry(
+            keyword, max_results, len(results_from_file or []), task_duration, bool(result.get("success")), timeout
+        )
+        # 提前结束时，Agent 在检查与终止之间可能又写入了若干条，按目标条数截断
+        if result.get("stopped_early") and results_from_file and len(results_from_file) > max_results:
+            results_from_file = results_from_file[:max_results]
+
         # 若任务标记为失败且未从文件读到任何结果，则直接返回失败
         if not result.get("success") and not (
             results_from_file is not None
@@ -179,9 +205,27 @@ class SocialMediaCrawler:
         task_result["platform"] = self.platform_config.name
         task_result["platform_display"] = self.platform_config.display_name
 
+        if parse_stats is not None:
+            task_result["parse_stats"] = parse_stats
+        if result.get("stopped_early"):
+            task_result["stopped_early"] = result.get("reason")
+
+        if self.dedup_index is not None and isinstance(task_result.get("results"), list):
+            task_result["results"], dedup_stats = self.dedup_index.filter_results(
+                self.platform_config.name, keyword, task_result["results"], drop_seen=self.drop_seen
+            )
+            task_result["total_count"] = len(task_result["results"])
+            task_result["dedup_stats"] = dedup_stats
+            print(f"🧹 去重: 新增 {dedup_stats['new']} 条，历史已见 {dedup_stats['seen']} 条，"
+                  f"本次重复 {dedup_stats['duplicate']} 条" + ("（已剔除非新增）" if self.drop_seen else ""))
+
         # 确保results是列表
         if "results" not in task_result or not isinstance(task_result["results"], list):
             task_result["results"] = []
+        # 每条带上来源关键词，多关键词合并后仍可按关键词统计
+        for item in task_result["results"]:
+            if isinstance(item, dict):
+                item.setdefault("keyword", keyword)
 
         print(f"✅ 爬取完成，共获取 {len(task_result.get('results', []))} 条结果\n")
 
@@ -190,11 +234,261 @@ class SocialMediaCrawler:
             **task_result
         }
 
+    async def stream_by_keyword(
+        self,
+        keyword: str,
+        max_results: int = 50,
+        timeout: int = 600,
+        poll_interval: float = 5.0,
+        stall_timeout: Optional[float] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式爬取：任务执行期间按间隔轮询会话中的 /tmp/results.json，逐条产出新追加的结果
+
+        只保留已消费的字符偏移量与未完整的末行，不累积已产出的记录；任务超时或失败时，
+        已写入文件的结果仍会全部产出。任务最终返回值保存在 self.last_task_result。
+
+        Args:
+            keyword: 搜索关键词
+            max_results: 最大结果数
+            timeout: 超时时间（秒）
+            poll_interval: 轮询间隔（秒）
+            stall_timeout: 停滞阈值（秒）；已有结果后连续这么久没有新条目写入即提前结束任务
+
+        Yields:
+            单条结果字典（early_stop 时最多 max_results 条）
+        """
+        print(f"\n{'='*60}")
+        print(f"🔍 开始流式爬取 {self.platform_config.display_name} 平台")
+        print(f"关键词: {keyword}")
+        print(f"最大结果数: {max_results}")
+        print(f"{'='*60}\n")
+
+        recycled = await self._recycle_detached_session()
+        if recycled is not None:
+            self.last_task_result = {"success": False, "error": recycled}
+            return
+        prompt = self._build_search_prompt(keyword, max_results)
+        # 任务开始前清空结果文件；无法清空时跳过文件中已有的内容（同一会话上一个关键词的结果）
+        stale = None
+        if not await self._reset_results_file():
+            stale = await self._read_results_file() or None
+        offset = len(stale or "")
+        task = asyncio.create_task(self.adapter.execute_crawl_task(prompt, timeout))
+
+        parser = ResultsParser()
+        emitted = 0
+        parsed = 0
+        task_started = last_progress = time.monotonic()
+        stop_reason = None
+        try:
+            while True:
+                finished = task.done()
+                content = await self._read_results_file()
+                if content is not None:
+                    if stale is not None and content != stale:
+                        if not content.startswith(stale):
+                            # 旧内容已被本次任务覆盖写入
+                            offset = 0
+                        stale = None
+                    if len(content) < offset:
+                        # 文件被 append=false 重写，从头开始消费
+                        offset = 0
+                        parser.reset()
+                    if len(content) > offset:
+                        last_progress = time.monotonic()
+                    for record in parser.feed(content[offset:]):
+                        parsed += 1
+                        if not (self.early_stop and emitted >= max_results) and self._accept_streamed(keyword, record):
+                            emitted += 1
+                            yield record
+                    offset = len(content)
+                if finished:
+                    break
+                if self.early_stop and parsed >= max_results:
+                    print(f"⏹️ 已写入 {parsed} 条，达到目标 {max_results} 条，提前结束任务")
+                    stop_reason = "target_reached"
+                    await self._stop_task(task)
+                    break
+                if stall_timeout and parsed and time.monotonic() - last_progress > stall_timeout:
+                    print(f"⏹️ 已 {stall_timeout:.0f} 秒无新条目写入，提前结束任务")
+                    stop_reason = "stalled"
+                    await self._stop_task(task)
+                    break
+                await asyncio.wait({task}, timeout=poll_interval)
+
+            # 任务结束后文件不再增长，解析末尾未换行（或被截断）的记录
+            for record in parser.close():
+                parsed += 1
+                if not (self.early_stop and emitted >= max_results) and self._accept_streamed(keyword, record):
+                    emitted += 1
+                    yield record
+            if stop_reason:
+                self.last_task_result = {"success": True, "stopped_early": True, "reason": stop_reason}
+            else:
+                self.last_task_result = task.result()
+            self._record_telemetry(
+                keyword, max_results, parsed, time.monotonic() - task_started,
+                bool(self.last_task_result.get("success")), timeout
+            )
+            stats = parser.stats()
+            print(f"✅ 流式爬取结束，共产出 {emitted} 条结果"
+                  f"（无法解析 {stats['rejected_lines']} 行，修复截断 {stats['recovered']} 条）\n")
+        finally:
+            if not task.done():
+                task.cancel()
+
+    async def _run_watched_task(
+        self,
+        prompt: str,
+        max_results: int,
+        timeout: int,
+        stall_timeout: Optional[float]
+    ) -> Dict[str, Any]:
+        """
+        执行爬取任务并按间隔监视结果文件中的条数：达到 max_results（early_stop 时）
+        或停滞超过 stall_timeout 即结束任务，不再等待 Agent 自行收尾
+
+        Args:
+            prompt: 任务提示词
+            max_results: 目标条数
+            timeout: 超时时间（秒）
+            stall_timeout: 停滞阈值（秒），None 表示不检查
+
+        Returns:
+            任务执行结果；提前结束时为 {"success": True, "stopped_early": True, "reason": ...}
+        """
+        # 先清空结果文件，避免把同一会话上一个关键词的结果计入本次条数；无法清空时跳过已有内容
+        offset = 0
+        if not await self._reset_results_file():
+            offset = len(await self._read_results_file() or "")
+        task = asyncio.create_task(self.adapter.execute_crawl_task(prompt, timeout))
+        parser = ResultsParser()
+        count = 0
+        last_progress = time.monotonic()
+        try:
+            while True:
+                done, _ = await asyncio.wait({task}, timeout=self.watch_interval)
+                if done:
+                    return task.result()
+                content = await self._read_results_file()
+                if content is not None:
+                    if len(content) < offset:
+                        offset = 0
+                        parser.reset()
+                        count = 0
+                    if len(content) > offset:
+                        last_progress = time.monotonic()
+                        count += len(parser.feed(content[offset:]))
+                        offset = len(content)
+                if self.early_stop and count >= max_results:
+                    print(f"⏹️ 结果文件已有 {count} 条，达到目标 {max_results} 条，提前结束任务")
+                    reason = "target_reached"
+                elif stall_timeout and count and time.monotonic() - last_progress > stall_timeout:
+                    print(f"⏹️ 已 {stall_timeout:.0f} 秒无新条目写入，提前结束任务")
+                    reason = "stalled"
+                else:
+                    continue
+                await self._stop_task(task)
+                return {"success": True, "stopped_early": True, "reason": reason}
+        finally:
+            if not task.done():
+                task.cancel()
+
+    async def _recycle_detached_session(self) -> Optional[str]:
+        """
+        上一个任务被提前结束但未能确认终止（adapter.task_detached）时，Agent 可能仍在该会话中
+        操作浏览器并写结果文件：关闭会话（随之结束 Agent）并重新创建，再执行下一个关键词
+
+        Returns:
+            重新创建会话失败时的错误信息，否则为 None
+        """
+        if not getattr(self.adapter, "task_detached", False):
+            return None
+        print("♻️ 上一个 Agent 任务未能确认终止，关闭会话并重新创建")
+        await self.adapter.close()
+        result = await self.adapter.create_session(self.platform_config)
+        if not result.get("success"):
+            return f"重新创建会话失败: {result.get('error')}"
+        return None
+
+    async def _stop_task(self, task: "asyncio.Task"):
+        """
+        取消本地等待并按任务 ID 终止会话中的 Agent 任务（适配器不支持时仅取消等待）；
+        终止成功时会话可直接执行下一个关键词，否则适配器标记 task_detached，下一个关键词前重建会话
+        """
+        task_id = getattr(self.adapter, "current_task_id", None)
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        stop = getattr(self.adapter, "stop_current_task", None)
+        if stop is not None:
+            await stop(task_id)
+
+    def _record_telemetry(
+        self,
+        keyword: str,
+        max_results: int,
+        items: int,
+        task_duration: float,
+        success: bool,
+        timeout: int
+    ):
+        """记录一次关键词任务的遥测；会话创建耗时只计入该会话上的第一个任务"""
+        if self.telemetry is None:
+            return
+        startup = getattr(self.adapter, "session_startup_time", None)
+        self.adapter.session_startup_time = None
+        self.telemetry.record(
+            platform=self.platform_config.name,
+            keyword=keyword,
+            max_results=max_results,
+            items=items,
+            task_duration=task_duration,
+            success=success,
+            session_startup=startup,
+            timeout=timeout,
+        )
+
+    def _accept_streamed(self, keyword: str, record: Dict[str, Any]) -> bool:
+        """流式模式下逐条查询去重索引，返回该条是否应产出"""
+        record.setdefault("keyword", keyword)
+        if self.dedup_index is None:
+            return True
+        status = self.dedup_index.check_and_add(self.platform_config.name, keyword, record)
+        if self.drop_seen and status != STATUS_NEW:
+            return False
+        record["dedup_status"] = status
+        return True
+
+    async def _reset_results_file(self) -> bool:
+        """任务开始前清空会话中的结果文件，返回是否已清空（适配器不支持时返回 False）"""
+        reset = getattr(self.adapter, "reset_results_file", None)
+        if reset is None or not self.adapter.session:
+            return False
+        return bool(await reset())
+
+    async def _read_results_file(self) -> Optional[str]:
+        """读取会话中的结果文件全文，文件不存在或读取失败时返回 None"""
+        if not self.adapter.session:
+            return None
+        try:
+            file_result = await self.adapter.session.file_system.read_file(RESULTS_FILE_PATH)
+        except Exception:
+            return None
+        if not file_result.success:
+            return None
+        return file_result.content or ""
+
     async def crawl_multiple_keywords(
         self,
         keywords: List[str],
         max_results_per_keyword: int = 50,
-        timeout: int = 600
+        timeout: int = 600,
+        stall_timeout: Optional[float] = None,
+        interval: float = 2.0
     ) -> Dict[str, Any]:
         """
         爬取多个关键词
@@ -203,6 +497,8 @@ class SocialMediaCrawler:
             keywords: 关键词列表
             max_results_per_keyword: 每个关键词的最大结果数
             timeout: 超时时间（秒）
+            stall_timeout: 停滞阈值（秒），传给每个关键词任务
+            interval: 相邻两个关键词任务之间的等待（秒），避免请求过快
 
         Returns:
             合并后的爬取结果
@@ -215,15 +511,16 @@ class SocialMediaCrawler:
             result = await self.crawl_by_keyword(
                 keyword=keyword,
                 max_results=max_results_per_keyword,
-                timeout=timeout
+                timeout=timeout,
+                stall_timeout=stall_timeout
             )
 
             if result.get("success") and "results" in result:
                 all_results.extend(result["results"])
 
             # 添加延迟，避免请求过快
-            import asyncio
-            await asyncio.sleep(2)
+            if interval > 0 and i < len(keywords):
+                await asyncio.sleep(interval)
 
         return {
             "success": True,
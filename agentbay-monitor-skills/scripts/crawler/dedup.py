@@ -0,0 +1,230 @@
+"""
+去重索引模块
+跨多次爬取持久化已见过的内容（SQLite），按「规范化 URL」与「标题/正文指纹」识别重复条目。
+本次运行登记的条目先暂存在内存中，原始结果写入成功后由 commit_run() 写入索引：
+运行失败、超时或未产出结果文件时，这些条目不会在之后的运行中被当作"已见过"而隐藏。
+"""
+import hashlib
+import re
+import sqlite3
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 不影响内容定位、但每次分享/会话都会变化的查询参数
+_TRACKING_PARAMS = {
+    "spm", "from", "share_from", "share_id", "share_source", "xsec_token",
+    "xsec_source", "app_platform", "app_version", "ref", "refer", "isappinstalled",
+    "sessionid", "timestamp", "_t",
+}
+_TRACKING_PREFIXES = ("utm_", "share_")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PUNCT_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+# 条目去重状态
+STATUS_NEW = "new"  # 首次出现
+STATUS_SEEN = "seen"  # 之前的运行中已出现
+STATUS_DUPLICATE = "duplicate"  # 本次运行中重复出现
+
+
+def normalize_url(url: Optional[str]) -> str:
+    """
+    规范化 URL：小写协议与域名、去掉片段与跟踪参数、查询参数排序、去掉末尾斜杠
+
+    Args:
+        url: 原始 URL
+
+    Returns:
+        规范化后的 URL，无效时返回空字符串
+    """
+    if not url or not isinstance(url, str):
+        return ""
+    url = url.strip()
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith(_TRACKING_PREFIXES)
+    )
+    netloc = parts.netloc.lower()
+    if netloc.startswith("www."):
+        netloc = netloc[4:]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(((parts.scheme or "https").lower(), netloc, path, urlencode(query), ""))
+
+
+def content_fingerprint(item: Dict[str, Any]) -> str:
+    """
+    标题 + 正文前 200 字的指纹（忽略空白与标点），用于识别 URL 不同但内容相同的转载
+
+    Args:
+        item: 爬取条目
+
+    Returns:
+        指纹字符串，标题与正文均为空时返回空字符串
+    """
+    title = _PUNCT_RE.sub("", _WHITESPACE_RE.sub("", str(item.get("title") or ""))).lower()
+    content = _PUNCT_RE.sub("", _WHITESPACE_RE.sub("", str(item.get("content") or "")))[:200].lower()
+    if not title and not content:
+        return ""
+    return hashlib.sha1(f"{title}\x1f{content}".encode("utf-8")).hexdigest()
+
+
+class DedupIndex:
+    """基于 SQLite 的跨运行去重索引"""
+
+    def __init__(self, db_path: str, run_id: Optional[str] = None):
+        """
+        初始化去重索引
+
+        Args:
+            db_path: SQLite 文件路径（不存在时自动创建）
+            run_id: 本次运行 ID，默认自动生成；同一运行内的重复条目标记为 duplicate
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.run_id = run_id or uuid.uuid4().hex
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS seen_items (
+                key TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                keyword TEXT,
+                url TEXT,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                run_id TEXT NOT NULL,
+                seen_count INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE INDEX IF NOT EXISTS idx_seen_platform ON seen_items(platform, keyword);
+            """
+        )
+        self.stats = {STATUS_NEW: 0, STATUS_SEEN: 0, STATUS_DUPLICATE: 0}
+        # 本次运行登记、尚未提交的键: key -> (platform, keyword, url)
+        self._pending: Dict[str, Tuple[str, str, Optional[str]]] = {}
+
+    @staticmethod
+    def item_keys(platform: str, item: Dict[str, Any]) -> List[str]:
+        """条目的去重键：规范化 URL 键与内容指纹键（各自带平台前缀）"""
+        keys = []
+        url = normalize_url(item.get("url"))
+        if url:
+            keys.append(f"{platform}:url:{hashlib.sha1(url.encode('utf-8')).hexdigest()}")
+        fingerprint = content_fingerprint(item)
+        if fingerprint:
+            keys.append(f"{platform}:fp:{fingerprint}")
+        return keys
+
+    def _lookup(self, keys: List[str]) -> Optional[str]:
+        """返回已存在记录中的 run_id（任一键命中即视为已见过）"""
+        if not keys:
+            return None
+        placeholders = ",".join("?" * len(keys))
+        row = self.conn.execute(
+            f"SELECT run_id FROM seen_items WHERE key IN ({placeholders}) "
+            f"ORDER BY run_id = ? DESC LIMIT 1",
+            (*keys, self.run_id),
+        ).fetchone()
+        return row[0] if row else None
+
+    def check_and_add(self, platform: str, keyword: str, item: Dict[str, Any]) -> str:
+        """
+        查询条目状态并暂存到本次运行（commit_run 后才写入索引）
+
+        Args:
+            platform: 平台标识
+            keyword: 关键词
+            item: 爬取条目
+
+        Returns:
+            new / seen / duplicate
+        """
+        keys = self.item_keys(platform, item)
+        if not keys:
+            return STATUS_NEW
+        if any(key in self._pending for key in keys):
+            status = STATUS_DUPLICATE
+        else:
+            previous_run = self._lookup(keys)
+            if previous_run is None:
+                status = STATUS_NEW
+            elif previous_run == self.run_id:
+                status = STATUS_DUPLICATE
+            else:
+                status = STATUS_SEEN
+
+        url = item.get("url") if isinstance(item.get("url"), str) else None
+        for key in keys:
+            self._pending.setdefault(key, (platform, keyword, url))
+        self.stats[status] += 1
+        return status
+
+    def commit_run(self) -> int:
+        """
+        把本次运行暂存的条目写入索引并提交（应在原始结果成功写出后调用）
+
+        Returns:
+            写入的键数
+        """
+        now = datetime.now().isoformat()
+        self.conn.executemany(
+            """
+            INSERT INTO seen_items (key, platform, keyword, url, first_seen, last_seen, run_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                last_seen = excluded.last_seen,
+                run_id = excluded.run_id,
+                seen_count = seen_count + (seen_items.run_id != excluded.run_id)
+            """,
+            [(key, platform, keyword, url, now, now, self.run_id)
+             for key, (platform, keyword, url) in self._pending.items()],
+        )
+        self.conn.commit()
+        count = len(self._pending)
+        self._pending.clear()
+        return count
+
+    def filter_results(
+        self,
+        platform: str,
+        keyword: str,
+        results: List[Dict[str, Any]],
+        drop_seen: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        标记或剔除已见过的条目
+
+        Args:
+            platform: 平台标识
+            keyword: 关键词
+            results: 爬取条目列表
+            drop_seen: True 时仅保留本次首次出现的条目；False 时保留全部并写入 dedup_status 字段
+
+        Returns:
+            (处理后的条目列表, 本批次各状态计数)
+        """
+        batch = {STATUS_NEW: 0, STATUS_SEEN: 0, STATUS_DUPLICATE: 0}
+        kept = []
+        for item in results:
+            if not isinstance(item, dict):
+                continue
+            status = self.check_and_add(platform, keyword, item)
+            batch[status] += 1
+            if drop_seen and status != STATUS_NEW:
+                continue
+            item["dedup_status"] = status
+            kept.append(item)
+        return kept, batch
+
+    def close(self):
+        """关闭数据库连接；未 commit_run 的暂存条目随之丢弃"""
+        self._pending.clear()
+        self.conn.close()
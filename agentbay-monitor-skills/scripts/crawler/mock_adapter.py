@@ -0,0 +1,158 @@
+"""
+模拟 AgentBay 适配器
+不连接 AgentBay 服务，按配置的耗时模拟会话创建与爬取任务，用于并发吞吐基准与离线调试
+"""
+import asyncio
+import itertools
+import json
+import re
+from typing import Any, Dict, Optional
+
+from .platform_config import PlatformConfig
+
+_session_ids = itertools.count(1)
+_task_ids = itertools.count(1)
+
+
+class _MockFileResult:
+    def __init__(self, success: bool, content: str = "", error_message: str = ""):
+        self.success = success
+        self.content = content
+        self.error_message = error_message
+
+
+class _MockFileSystem:
+    """模拟会话文件系统：每个会话独立，与真实会话中的 /tmp/results.json 隔离方式一致"""
+
+    def __init__(self):
+        self.files: Dict[str, str] = {}
+
+    async def read_file(self, path: str) -> _MockFileResult:
+        if path not in self.files:
+            return _MockFileResult(False, error_message=f"file not found: {path}")
+        return _MockFileResult(True, self.files[path])
+
+    async def write_file(self, path: str, content: str, mode: str = "overwrite") -> _MockFileResult:
+        if mode == "append":
+            self.files[path] = self.files.get(path, "") + content
+        else:
+            self.files[path] = content
+        return _MockFileResult(True)
+
+
+class _MockSession:
+    def __init__(self):
+        self.session_id = f"mock-session-{next(_session_ids)}"
+        self.file_system = _MockFileSystem()
+
+
+class MockAgentBayAdapter:
+    """模拟适配器，接口与 AgentBayAdapter 保持一致"""
+
+    def __init__(
+        self,
+        context_name: str = "sentiment-analysis",
+        image_id: str = "linux_latest",
+        startup_seconds: float = 0.5,
+        seconds_per_item: float = 0.05,
+        finish_seconds: float = 0.0,
+        detach_on_stop: bool = False,
+    ):
+        """
+        初始化模拟适配器
+
+        Args:
+            context_name: Browser Context 名称（仅记录）
+            image_id: 会话镜像 ID（仅记录）
+            startup_seconds: 模拟会话创建耗时（秒）
+            seconds_per_item: 模拟每条结果的爬取耗时（秒）
+            finish_seconds: 模拟 Agent 写完结果后收尾（汇总、调用 done）的耗时（秒）
+            detach_on_stop: 为 True 时模拟无法终止任务的 SDK：stop_current_task 返回 False 并标记
+                task_detached，Agent 在会话关闭前继续写结果文件；为 False 时与真实适配器一致，
+                只有给出（或记录了）当前任务 ID 才能终止
+        """
+        self.context_name = context_name
+        self.image_id = image_id
+        self.startup_seconds = startup_seconds
+        self.seconds_per_item = seconds_per_item
+        self.finish_seconds = finish_seconds
+        self.detach_on_stop = detach_on_stop
+        self.stopped_tasks = 0
+        self.sessions_created = 0
+        # 在 task_detached 的会话上启动的任务数（应始终为 0）
+        self.tasks_on_detached = 0
+        self.session: Optional[_MockSession] = None
+        self.session_startup_time: Optional[float] = None
+        self.task_detached = False
+        self.current_task_id: Optional[str] = None
+        self._agent: Optional[asyncio.Task] = None
+
+    async def create_session(self, platform_config: PlatformConfig) -> Dict[str, Any]:
+        await asyncio.sleep(self.startup_seconds)
+        self.session = _MockSession()
+        self.sessions_created += 1
+        self.session_startup_time = self.startup_seconds
+        self.task_detached = False
+        return {"success": True, "session": self.session}
+
+    async def execute_crawl_task(self, task_prompt: str, timeout: int = 600) -> Dict[str, Any]:
+        if not self.session:
+            return {"success": False, "error": "Session 未创建，请先调用 create_session"}
+
+        if self.task_detached:
+            self.tasks_on_detached += 1
+
+        match = re.search(r'"([^"]+)"', task_prompt)
+        keyword = match.group(1) if match else "mock"
+        count_match = re.search(r"(\d+) 条", task_prompt)
+        count = int(count_match.group(1)) if count_match else 10
+
+        # Agent 在会话中独立运行：取消本地等待不会结束它，只有 stop_current_task 或关闭会话才会
+        self._agent = asyncio.ensure_future(self._run_agent(self.session.file_system, keyword, count))
+        self.current_task_id = f"mock-task-{next(_task_ids)}"
+        result = await asyncio.shield(self._agent)
+        self.current_task_id = None
+        return result
+
+    async def _run_agent(self, fs: _MockFileSystem, keyword: str, count: int) -> Dict[str, Any]:
+        for i in range(count):
+            await asyncio.sleep(self.seconds_per_item)
+            line = json.dumps({
+                "title": f"{keyword} 模拟结果 {i + 1}",
+                "content": f"{keyword} 的模拟内容",
+                "author": "mock",
+                "url": f"https://example.com/{keyword}/{i + 1}",
+            }, ensure_ascii=False)
+            await fs.write_file("/tmp/results.json", line + "\n", mode="append" if i else "overwrite")
+        await asyncio.sleep(self.finish_seconds)
+        return {"success": True, "result": {"total_count": count}}
+
+    async def stop_current_task(self, task_id: Optional[str] = None) -> bool:
+        self.stopped_tasks += 1
+        task_id = task_id or self.current_task_id
+        if self.detach_on_stop or task_id is None or task_id != self.current_task_id:
+            self.task_detached = True
+            return False
+        self._cancel_agent()
+        self.current_task_id = None
+        return True
+
+    def _cancel_agent(self):
+        if self._agent is not None and not self._agent.done():
+            self._agent.cancel()
+        self._agent = None
+
+    async def is_healthy(self) -> bool:
+        if self.task_detached:
+            return False
+        return await self.reset_results_file()
+
+    async def reset_results_file(self) -> bool:
+        if not self.session:
+            return False
+        await self.session.file_system.write_file("/tmp/results.json", "")
+        return True
+
+    async def close(self):
+        self._cancel_agent()
+        self.session = None
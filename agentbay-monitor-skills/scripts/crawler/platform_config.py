@@ -25,6 +25,10 @@ class PlatformConfig:
     author_selector: Optional[str] = None  # 作者选择器
     time_selector: Optional[str] = None  # 时间选择器
 
+    # 并发与速率预算（多关键词并发爬取时使用）
+    max_concurrent_sessions: int = 2  # 该平台同时运行的会话数上限
+    min_task_interval: float = 2.0  # 相邻两次任务启动的最小间隔（秒）
+
     def __post_init__(self):
         """初始化后处理"""
         if self.search_button_text is None:
@@ -56,7 +60,9 @@ PLATFORM_CONFIGS = {
         content_selector=".note-item",
         title_selector=".title",
         author_selector=".author",
-        time_selector=".time"
+        time_selector=".time",
+        max_concurrent_sessions=2,
+        min_task_interval=5.0
     ),
 
     "weibo": PlatformConfig(
@@ -69,7 +75,9 @@ PLATFORM_CONFIGS = {
         content_selector=".card-wrap",
         title_selector=".txt",
         author_selector=".name",
-        time_selector=".from"
+        time_selector=".from",
+        max_concurrent_sessions=2,
+        min_task_interval=3.0
     ),
 
     "douyin": PlatformConfig(
@@ -82,7 +90,9 @@ PLATFORM_CONFIGS = {
         content_selector=".video-item",
         title_selector=".title",
         author_selector=".author",
-        time_selector=".time"
+        time_selector=".time",
+        max_concurrent_sessions=2,
+        min_task_interval=5.0
     ),
 
     "zhihu": PlatformConfig(
@@ -95,7 +105,9 @@ PLATFORM_CONFIGS = {
         content_selector=".ContentItem",
         title_selector=".ContentItem-title",
         author_selector=".AuthorInfo-name",
-        time_selector=".ContentItem-time"
+        time_selector=".ContentItem-time",
+        max_concurrent_sessions=2,
+        min_task_interval=3.0
     ),
 
     "bing": PlatformConfig(
@@ -108,7 +120,9 @@ PLATFORM_CONFIGS = {
         content_selector="li.b_algo",
         title_selector="h2 a",
         author_selector=None,
-        time_selector=None
+        time_selector=None,
+        max_concurrent_sessions=4,
+        min_task_interval=1.0
     ),
 
     "baidu": PlatformConfig(
@@ -121,7 +135,9 @@ PLATFORM_CONFIGS = {
         content_selector=".result-op, .c-container",
         title_selector="h3 a, .c-title a",
         author_selector=None,
-        time_selector=None
+        time_selector=None,
+        max_concurrent_sessions=4,
+        min_task_interval=1.0
     ),
 }
 
@@ -1,15 +1,246 @@
 """
 提示词管理模块
-从 YAML 文件加载提示词模板
+从 YAML 文件加载提示词模板，按平台预编译并缓存渲染结果；文件修改后自动热加载
 """
 import os
-import yaml
+import re
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, List, Optional, Tuple
+
+import yaml
 
+# 默认提示词文件
+DEFAULT_PROMPTS_FILE = Path(__file__).parent / "prompts.yaml"
+
+# 模板中允许出现的占位符
+KNOWN_PLACEHOLDERS = ("platform_name", "keyword", "base_url", "search_url", "max_results")
+
+# 平台标识 → 模板名；未列出的平台使用社交媒体通用模板
+_PLATFORM_TEMPLATES = {
+    "bing": "bing_search_prompt_template",
+    "baidu": "baidu_search_prompt_template",
+}
+_DEFAULT_TEMPLATE = "search_prompt_template"
+
+# 形如 {keyword} 的占位符；{{ }} 为 JSON 示例的转义写法，不视为占位符
+_PLACEHOLDER_RE = re.compile(r"(?<!\{)\{([A-Za-z_][A-Za-z0-9_]*)\}(?!\})")
+
+
+class CompiledTemplate:
+    """预编译的提示词模板：拆分为字面量片段与占位符，渲染时只做一次拼接"""
+
+    def __init__(self, name: str, text: str):
+        """
+        编译模板并校验占位符
+
+        Args:
+            name: 模板名
+            text: 模板原文
+
+        Raises:
+            ValueError: 模板包含未知占位符
+        """
+        self.name = name
+        self.parts: List[Tuple[bool, str]] = []  # (是否为占位符, 字面量或占位符名)
+        pos = 0
+        unknown = []
+        for match in _PLACEHOLDER_RE.finditer(text):
+            field = match.group(1)
+            if field not in KNOWN_PLACEHOLDERS:
+                unknown.append(field)
+                continue
+            self.parts.append((False, self._unescape(text[pos:match.start()])))
+            self.parts.append((True, field))
+            pos = match.end()
+        self.parts.append((False, self._unescape(text[pos:])))
+        if unknown:
+            raise ValueError(f"提示词模板 {name} 包含未知占位符: {', '.join(sorted(set(unknown)))}")
+        self.placeholders = {value for is_field, value in self.parts if is_field}
+
+    @staticmethod
+    def _unescape(literal: str) -> str:
+        # 还原 YAML 中为转义写的双花括号为单花括号（用于 JSON 示例）
+        return literal.replace("{{", "{").replace("}}", "}")
+
+    def render(self, values: Dict[str, str]) -> str:
+        """按占位符取值拼接出完整提示词"""
+        return "".join(values[value] if is_field else value for is_field, value in self.parts)
+
+
+class PromptRegistry:
+    """提示词注册表：加载时预编译并校验模板，按参数缓存渲染结果，提示词文件修改后自动重新加载"""
+
+    def __init__(
+        self,
+        prompts_file: Optional[str] = None,
+        cache_size: int = 1024,
+        check_interval: float = 2.0,
+    ):
+        """
+        初始化注册表（首次使用时才加载文件）
+
+        Args:
+            prompts_file: 提示词 YAML 路径，默认 crawler/prompts.yaml
+            cache_size: 渲染结果 LRU 缓存条数，0 表示不缓存
+            check_interval: 检查文件修改时间的最小间隔（秒），0 表示每次都检查
+        """
+        self.prompts_file = Path(prompts_file) if prompts_file else DEFAULT_PROMPTS_FILE
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._raw: Dict[str, str] = {}
+        self._compiled: Dict[str, CompiledTemplate] = {}
+        self._rendered: "OrderedDict[tuple, str]" = OrderedDict()
+        self._mtime: Optional[float] = None
+        self._last_check = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _load(self):
+        """读取、解析并编译全部模板；任一模板校验失败时保留旧版本"""
+        if not self.prompts_file.exists():
+            raise FileNotFoundError(f"提示词文件不存在: {self.prompts_file}")
+        try:
+            mtime = self.prompts_file.stat().st_mtime
+            with open(self.prompts_file, "r", encoding="utf-8") as f:
+                prompts_data = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise ValueError(f"解析提示词 YAML 文件失败: {e}")
+        except OSError as e:
+            raise RuntimeError(f"加载提示词文件失败: {e}")
+
+        if not prompts_data or not isinstance(prompts_data, dict):
+            raise ValueError("提示词文件为空或格式错误")
 
-# 提示词缓存
-_prompts_cache: Dict[str, str] = {}
+        compiled = {
+            name: CompiledTemplate(name, text)
+            for name, text in prompts_data.items()
+            if name.endswith("_template") and isinstance(text, str)
+        }
+        self._raw = prompts_data
+        self._compiled = compiled
+        self._rendered.clear()
+        if self._mtime is not None:
+            self.reloads += 1
+        self._mtime = mtime
+
+    def _ensure_fresh(self):
+        """首次加载，或距上次检查超过 check_interval 且文件 mtime 变化时重新加载"""
+        now = time.monotonic()
+        if self._mtime is not None and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        if self._mtime is None:
+            self._load()
+            return
+        try:
+            mtime = self.prompts_file.stat().st_mtime
+        except OSError:
+            return  # 文件暂时不可读时继续使用已加载版本
+        if mtime != self._mtime:
+            try:
+                self._load()
+            except (ValueError, RuntimeError, FileNotFoundError) as e:
+                print(f"⚠️ 提示词文件热加载失败，继续使用旧版本: {e}")
+                self._mtime = mtime
+
+    def raw_prompts(self) -> Dict[str, str]:
+        """返回原始提示词字典"""
+        with self._lock:
+            self._ensure_fresh()
+            return self._raw
+
+    def get_template(self, name: str) -> CompiledTemplate:
+        """
+        按模板名获取预编译模板
+
+        Args:
+            name: 模板名，如 search_prompt_template
+
+        Returns:
+            预编译模板
+        """
+        with self._lock:
+            self._ensure_fresh()
+            template = self._compiled.get(name)
+        if template is None:
+            raise ValueError(f"未找到 {name} 提示词模板")
+        return template
+
+    def template_for_platform(self, platform_id: Optional[str]) -> CompiledTemplate:
+        """按平台标识选择模板：bing/baidu 使用搜索引擎模板，其余使用社交媒体模板"""
+        return self.get_template(_PLATFORM_TEMPLATES.get(platform_id, _DEFAULT_TEMPLATE))
+
+    def render(
+        self,
+        platform_name: str,
+        keyword: str,
+        base_url: str,
+        search_url: str,
+        max_results: int = 50,
+        platform_id: Optional[str] = None,
+    ) -> str:
+        """
+        渲染搜索提示词（相同参数直接命中缓存）
+
+        Args:
+            platform_name: 平台名称
+            keyword: 搜索关键词
+            base_url: 平台基础URL
+            search_url: 构造好的搜索URL（已包含关键词）
+            max_results: 最大结果数
+            platform_id: 平台标识
+
+        Returns:
+            格式化后的提示词
+        """
+        template = self.template_for_platform(platform_id)
+        key = (template.name, platform_name, keyword, base_url, search_url, max_results)
+        with self._lock:
+            cached = self._rendered.get(key)
+            if cached is not None:
+                self._rendered.move_to_end(key)
+                self.hits += 1
+                return cached
+        prompt = template.render({
+            "platform_name": platform_name,
+            "keyword": keyword,
+            "base_url": base_url,
+            "search_url": search_url,
+            "max_results": str(max_results),
+        })
+        with self._lock:
+            self.misses += 1
+            if self.cache_size > 0:
+                self._rendered[key] = prompt
+                if len(self._rendered) > self.cache_size:
+                    self._rendered.popitem(last=False)
+        return prompt
+
+    def stats(self) -> Dict[str, int]:
+        """缓存命中统计"""
+        return {
+            "templates": len(self._compiled),
+            "cached": len(self._rendered),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reloads": self.reloads,
+        }
+
+
+_registry: Optional[PromptRegistry] = None
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """获取进程级默认提示词注册表（AGENTBAY_PROMPTS_FILE 可指定提示词文件）"""
+    global _registry
+    if _registry is None:
+        _registry = PromptRegistry(os.environ.get("AGENTBAY_PROMPTS_FILE"))
+    return _registry
 
 
 def _load_prompts() -> Dict[str, str]:
@@ -19,32 +250,7 @@ def _load_prompts() -> Dict[str, str]:
     Returns:
         提示词字典
     """
-    global _prompts_cache
-
-    if _prompts_cache:
-        return _prompts_cache
-
-    # 获取当前文件所在目录
-    current_dir = Path(__file__).parent
-    prompts_file = current_dir / "prompts.yaml"
-
-    if not prompts_file.exists():
-        raise FileNotFoundError(f"提示词文件不存在: {prompts_file}")
-
-    try:
-        with open(prompts_file, "r", encoding="utf-8") as f:
-            prompts_data = yaml.safe_load(f)
-
-        if not prompts_data:
-            raise ValueError("提示词文件为空或格式错误")
-
-        _prompts_cache = prompts_data
-        return _prompts_cache
-
-    except yaml.YAMLError as e:
-        raise ValueError(f"解析提示词 YAML 文件失败: {e}")
-    except Exception as e:
-        raise RuntimeError(f"加载提示词文件失败: {e}")
+    return get_prompt_registry().raw_prompts()
 
 
 def get_search_prompt_template() -> str:
@@ -117,20 +323,6 @@ def build_search_prompt(
     Returns:
         格式化后的提示词
     """
-    if platform_id == "bing":
-        template = get_bing_search_prompt_template()
-    elif platform_id == "baidu":
-        template = get_baidu_search_prompt_template()
-    else:
-        template = get_search_prompt_template()
-
-    # 只替换已知占位符，避免模板中 JSON 示例的 { } 被 str.format() 误解析
-    out = (
-        template.replace("{platform_name}", platform_name)
-        .replace("{keyword}", keyword)
-        .replace("{base_url}", base_url)
-        .replace("{search_url}", search_url)
-        .replace("{max_results}", str(max_results))
+    return get_prompt_registry().render(
+        platform_name, keyword, base_url, search_url, max_results, platform_id
     )
-    # 还原 YAML 中为转义写的双花括号为单花括号（用于 JSON 示例）
-    return out.replace("{{", "{").replace("}}", "}")
@@ -0,0 +1,263 @@
+"""
+结果文件解析模块
+增量解析 Agent 写入的 /tmp/results.json，兼容三种格式：
+1) 整份为 JSON 数组 [ ... ]
+2) 首行为 header（以 "results":[ 结尾），其余每行一条 result JSON
+3) 纯 JSON Lines：每行一条完整 JSON
+"""
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _default_loads() -> Tuple[str, Callable[[str], Any]]:
+    """选择可用的最快 JSON 后端：orjson → ujson → 标准库 json"""
+    try:
+        import orjson
+        return "orjson", orjson.loads
+    except ImportError:
+        pass
+    try:
+        import ujson
+        return "ujson", ujson.loads
+    except ImportError:
+        pass
+    return "json", json.loads
+
+
+JSON_BACKEND, _fast_loads = _default_loads()
+
+# 头部/尾部的结构行，不计为被拒绝的行
+_STRUCTURAL_LINES = {"[", "]", "]}", "],", "{", "}"}
+
+# 记录被拒绝行的样本数量上限
+_MAX_REJECTED_SAMPLES = 5
+
+
+def repair_truncated_json(text: str) -> Optional[Any]:
+    """
+    尝试修复被截断的单个 JSON 对象（如任务超时时 Agent 写了一半的末行）
+
+    依次尝试：补齐未闭合的字符串与括号；从最后一个顶层以下的逗号处截断不完整字段后再补齐。
+
+    Args:
+        text: 被截断的 JSON 文本
+
+    Returns:
+        修复后的对象，无法修复时返回 None
+    """
+    text = text.strip().rstrip(",")
+    if not text.startswith("{"):
+        return None
+
+    # 扫描一次，记录括号栈与字符串外的逗号位置
+    stack: List[str] = []
+    comma_positions: List[Tuple[int, List[str]]] = []
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+        elif ch == ",":
+            comma_positions.append((i, list(stack)))
+
+    candidates = []
+    body = text[:-1] if escaped else text
+    candidates.append(body + ('"' if in_string else "") + "".join(reversed(stack)))
+    for pos, open_stack in reversed(comma_positions[-8:]):
+        candidates.append(text[:pos] + "".join(reversed(open_stack)))
+
+    for candidate in candidates:
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(value, dict) and value:
+            return value
+    return None
+
+
+class ResultsParser:
+    """结果文件增量解析器：按块输入文本，产出完整的记录字典"""
+
+    def __init__(self, loads: Optional[Callable[[str], Any]] = None):
+        """
+        初始化解析器
+
+        Args:
+            loads: 自定义 JSON 解析函数，默认使用已安装的最快后端（orjson/ujson/json）
+        """
+        self.loads = loads or _fast_loads
+        self.backend = JSON_BACKEND if loads is None else getattr(loads, "__module__", None) or "custom"
+        self.reset()
+
+    def reset(self):
+        """清空状态（结果文件被重写时调用）"""
+        self.format: Optional[str] = None  # "array" / "header" / "jsonl"
+        self._buffer = ""
+        self._array_started = False
+        self._decoder = json.JSONDecoder()
+        self.records = 0
+        self.rejected_lines = 0
+        self.recovered = 0
+        self.rejected_samples: List[str] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        输入一段新追加的文本，返回其中已完整的记录
+
+        Args:
+            chunk: 新追加的文本
+
+        Returns:
+            本次解析出的记录列表
+        """
+        if not chunk:
+            return []
+        self._buffer += chunk
+        if self.format is None:
+            stripped = self._buffer.lstrip()
+            if not stripped:
+                return []
+            if stripped[0] == "[":
+                self.format = "array"
+        if self.format == "array":
+            return self._drain_array(final=False)
+        return self._drain_lines(final=False)
+
+    def close(self) -> List[Dict[str, Any]]:
+        """
+        输入结束，解析缓冲区中剩余内容；被截断的末尾记录尽量修复
+
+        Returns:
+            剩余的记录列表
+        """
+        if self.format == "array":
+            records = self._drain_array(final=True)
+        else:
+            records = self._drain_lines(final=True)
+        self._buffer = ""
+        return records
+
+    def stats(self) -> Dict[str, Any]:
+        """解析统计：记录数、被拒绝行数、修复的截断记录数、样本"""
+        return {
+            "format": self.format,
+            "records": self.records,
+            "rejected_lines": self.rejected_lines,
+            "recovered": self.recovered,
+            "rejected_samples": list(self.rejected_samples),
+            "backend": self.backend,
+        }
+
+    def _reject(self, text: str):
+        self.rejected_lines += 1
+        if len(self.rejected_samples) < _MAX_REJECTED_SAMPLES:
+            self.rejected_samples.append(text[:200])
+
+    def _accept(self, value: Any, raw: str, out: List[Dict[str, Any]]):
+        if isinstance(value, dict):
+            self.records += 1
+            out.append(value)
+        else:
+            self._reject(raw)
+
+    def _parse_tail(self, text: str, out: List[Dict[str, Any]]):
+        """解析最后一段（可能被截断）的文本"""
+        try:
+            self._accept(self.loads(text), text, out)
+            return
+        except ValueError:
+            pass
+        value = repair_truncated_json(text)
+        if value is not None:
+            self.recovered += 1
+            self.records += 1
+            out.append(value)
+        else:
+            self._reject(text)
+
+    def _drain_lines(self, final: bool) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        if final:
+            lines, self._buffer = self._buffer.split("\n"), ""
+        else:
+            *lines, self._buffer = self._buffer.split("\n")
+        last = len(lines) - 1
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line or line in _STRUCTURAL_LINES:
+                continue
+            if self.format is None:
+                if line.endswith('"results":['):
+                    self.format = "header"
+                    continue
+                self.format = "jsonl"
+            line = line.rstrip(",")
+            if final and i == last:
+                self._parse_tail(line, out)
+                continue
+            try:
+                value = self.loads(line)
+            except ValueError:
+                self._reject(line)
+                continue
+            self._accept(value, line, out)
+        return out
+
+    def _drain_array(self, final: bool) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        buf = self._buffer
+        pos = 0
+        n = len(buf)
+        if not self._array_started:
+            pos = buf.index("[") + 1
+            self._array_started = True
+        while True:
+            while pos < n and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos >= n:
+                break
+            if buf[pos] == "]":
+                pos = n
+                break
+            try:
+                value, end = self._decoder.raw_decode(buf, pos)
+            except ValueError:
+                if final:
+                    self._parse_tail(buf[pos:].rstrip().rstrip("]"), out)
+                    pos = n
+                break
+            self._accept(value, buf[pos:end], out)
+            pos = end
+        self._buffer = buf[pos:]
+        return out
+
+
+def parse_results_text(text: str, loads: Optional[Callable[[str], Any]] = None) -> Tuple[List[Dict[str, Any]], ResultsParser]:
+    """
+    一次性解析完整的结果文件内容
+
+    Args:
+        text: 结果文件全文
+        loads: 自定义 JSON 解析函数，可选
+
+    Returns:
+        (记录列表, 解析器)，解析器上可读取 stats()
+    """
+    parser = ResultsParser(loads)
+    records = parser.feed(text)
+    records.extend(parser.close())
+    return records, parser
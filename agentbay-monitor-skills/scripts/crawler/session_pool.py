@@ -0,0 +1,164 @@
+"""
+会话池模块
+按 (context_name, image_id) 保持已初始化浏览器的 AgentBay 会话常驻，供多次爬取调用复用
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from .platform_config import PlatformConfig
+
+PoolKey = Tuple[str, str]
+
+
+class SessionPool:
+    """AgentBay 会话池"""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        idle_ttl: float = 900.0,
+        max_idle_per_key: int = 4,
+        adapter_factory: Optional[Callable[[str, str], Any]] = None,
+    ):
+        """
+        初始化会话池
+
+        Args:
+            api_key: AgentBay API密钥（使用默认 adapter_factory 时必填）
+            idle_ttl: 空闲会话存活时间（秒），超过后在下次取用或 evict_idle 时关闭
+            max_idle_per_key: 每个 (context_name, image_id) 最多保留的空闲会话数
+            adapter_factory: 适配器工厂 (context_name, image_id) -> 未创建会话的适配器，
+                默认创建 AgentBayAdapter；可替换为 MockAgentBayAdapter 做离线测试
+        """
+        if adapter_factory is None:
+            if not api_key:
+                raise ValueError("未提供 api_key，无法创建 AgentBay 会话")
+            from .agentbay_adapter import AgentBayAdapter
+
+            def adapter_factory(context_name: str, image_id: str):
+                return AgentBayAdapter(api_key, context_name, image_id)
+
+        self.adapter_factory = adapter_factory
+        self.idle_ttl = idle_ttl
+        self.max_idle_per_key = max(0, max_idle_per_key)
+        self._idle: Dict[PoolKey, List[Tuple[Any, float]]] = {}
+        self._lock = asyncio.Lock()
+        self.stats = {"created": 0, "reused": 0, "evicted": 0, "unhealthy": 0}
+
+    async def _take_idle(self, key: PoolKey) -> Optional[Any]:
+        """取出一个通过健康检查的空闲会话，没有则返回 None"""
+        while True:
+            async with self._lock:
+                entries = self._idle.get(key)
+                if not entries:
+                    return None
+                adapter, _ = entries.pop()
+            if await adapter.is_healthy():
+                self.stats["reused"] += 1
+                return adapter
+            self.stats["unhealthy"] += 1
+            print("⚠️ 会话池: 空闲会话健康检查失败，已丢弃")
+            await self._close_quietly(adapter)
+
+    async def _create(self, key: PoolKey, platform_config: PlatformConfig) -> Any:
+        context_name, image_id = key
+        adapter = self.adapter_factory(context_name, image_id)
+        result = await adapter.create_session(platform_config)
+        if not result.get("success"):
+            raise Exception(result.get("error", "创建会话失败"))
+        self.stats["created"] += 1
+        return adapter
+
+    async def _release(self, key: PoolKey, adapter: Any):
+        if getattr(adapter, "task_detached", False):
+            # 提前结束的 Agent 任务可能仍在运行，关闭会话以结束它，不放回池中
+            await self._close_quietly(adapter)
+            return
+        async with self._lock:
+            entries = self._idle.setdefault(key, [])
+            if len(entries) < self.max_idle_per_key:
+                entries.append((adapter, time.monotonic()))
+                return
+        await self._close_quietly(adapter)
+
+    @staticmethod
+    async def _close_quietly(adapter: Any):
+        try:
+            await adapter.close()
+        except Exception as e:
+            print(f"⚠️ 会话池: 关闭会话时出错: {e}")
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        platform_config: PlatformConfig,
+        context_name: str = "sentiment-analysis",
+        image_id: str = "linux_latest",
+    ) -> AsyncIterator[Any]:
+        """
+        取用一个已初始化浏览器的会话，退出时归还到池中
+
+        Args:
+            platform_config: 平台配置
+            context_name: Browser Context 名称
+            image_id: 会话镜像 ID
+
+        Yields:
+            适配器实例；块内抛出异常时该会话不再归还，直接关闭
+        """
+        key = (context_name, image_id)
+        await self.evict_idle()
+        adapter = await self._take_idle(key)
+        if adapter is None:
+            adapter = await self._create(key, platform_config)
+        else:
+            print(f"♻️ 会话池: 复用已初始化会话 ({context_name}, {image_id})")
+        try:
+            yield adapter
+        except BaseException:
+            await self._close_quietly(adapter)
+            raise
+        await self._release(key, adapter)
+
+    async def evict_idle(self, now: Optional[float] = None) -> int:
+        """
+        关闭空闲时间超过 idle_ttl 的会话
+
+        Returns:
+            被关闭的会话数
+        """
+        now = time.monotonic() if now is None else now
+        expired = []
+        async with self._lock:
+            for key, entries in self._idle.items():
+                keep = []
+                for adapter, last_used in entries:
+                    if now - last_used > self.idle_ttl:
+                        expired.append(adapter)
+                    else:
+                        keep.append((adapter, last_used))
+                self._idle[key] = keep
+        for adapter in expired:
+            await self._close_quietly(adapter)
+        self.stats["evicted"] += len(expired)
+        return len(expired)
+
+    async def close_all(self):
+        """关闭池中全部空闲会话"""
+        async with self._lock:
+            adapters = [adapter for entries in self._idle.values() for adapter, _ in entries]
+            self._idle.clear()
+        for adapter in adapters:
+            await self._close_quietly(adapter)
+
+    def idle_count(self) -> int:
+        """当前空闲会话数"""
+        return sum(len(entries) for entries in self._idle.values())
+
+    async def __aenter__(self) -> "SessionPool":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close_all()
@@ -0,0 +1,211 @@
+"""
+爬取遥测模块
+本地记录每次爬取任务的耗时与产出（JSON Lines），并按平台历史分位数估算任务超时与停滞阈值；
+文件超过 COMPACT_BYTES 后重写为每个平台最近 HISTORY_WINDOW 条，读写开销不随运行次数增长
+"""
+import json
+import math
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# 默认遥测文件位置，可用环境变量 AGENTBAY_CRAWL_TELEMETRY 覆盖
+DEFAULT_TELEMETRY_PATH = Path.home() / ".config" / "agentbay" / "crawl_telemetry.jsonl"
+
+# 估算所需的最少有效样本数，不足时回退到固定启发式
+MIN_SAMPLES = 3
+# 每个平台参与估算的最近样本数
+HISTORY_WINDOW = 200
+# 遥测文件超过该大小（字节）后压缩，每个平台只保留最近 HISTORY_WINDOW 条；
+# 须远大于压缩后的体积（每条约 250 字节，十个平台约 0.5 MB），否则每次追加都会触发压缩
+COMPACT_BYTES = 2 * 1024 * 1024
+
+
+def percentile(values: List[float], q: float) -> float:
+    """线性插值分位数，q 取 0-100"""
+    if not values:
+        raise ValueError("percentile of empty list")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q / 100.0
+    lo, hi = math.floor(k), math.ceil(k)
+    if lo == hi:
+        return ordered[int(k)]
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def heuristic_timeout(keyword_count: int, max_results_per_keyword: int) -> int:
+    """固定启发式：约 1 条/分钟，至少 20 分钟（无历史数据时使用）"""
+    total_max = keyword_count * max_results_per_keyword
+    return max(1200, 180 + total_max * 60)
+
+
+class CrawlTelemetry:
+    """爬取遥测记录与读取"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        初始化遥测存储
+
+        Args:
+            path: 遥测文件路径，默认 AGENTBAY_CRAWL_TELEMETRY 或 ~/.config/agentbay/crawl_telemetry.jsonl
+        """
+        self.path = Path(path or os.environ.get("AGENTBAY_CRAWL_TELEMETRY") or DEFAULT_TELEMETRY_PATH)
+
+    def record(
+        self,
+        platform: str,
+        keyword: str,
+        max_results: int,
+        items: int,
+        task_duration: float,
+        success: bool,
+        session_startup: Optional[float] = None,
+        timeout: Optional[int] = None,
+    ):
+        """
+        追加一条任务遥测（写入失败不影响爬取）；文件超过 COMPACT_BYTES 时随即压缩
+
+        Args:
+            platform: 平台标识
+            keyword: 关键词
+            max_results: 目标条数
+            items: 实际获得条数
+            task_duration: 任务耗时（秒）
+            success: 任务是否正常结束
+            session_startup: 本任务所用会话的创建耗时（秒），复用会话时为 None
+            timeout: 本任务设置的超时（秒）
+        """
+        entry = {
+            "ts": time.time(),
+            "platform": platform,
+            "keyword": keyword,
+            "max_results": max_results,
+            "items": items,
+            "task_duration": round(task_duration, 2),
+            "items_per_min": round(items / task_duration * 60, 3) if task_duration > 0 else None,
+            "session_startup": round(session_startup, 2) if session_startup is not None else None,
+            "success": success,
+            "timed_out": bool(timeout) and task_duration >= timeout * 0.98,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self.path.stat().st_size > COMPACT_BYTES:
+                self.compact()
+        except OSError as e:
+            print(f"⚠️ 写入爬取遥测失败（不影响爬取）: {e}")
+
+    def compact(self, keep: int = HISTORY_WINDOW):
+        """
+        重写遥测文件，每个平台只保留最近 keep 条（无法解析的行丢弃）。
+        先写临时文件再替换；与其他进程的追加并发时可能丢失其间写入的个别样本，不影响估算
+        """
+        recent: Dict[str, deque] = {}
+        order = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                platform = entry.get("platform") if isinstance(entry, dict) else None
+                if platform is None:
+                    continue
+                recent.setdefault(platform, deque(maxlen=keep)).append((number, line))
+        for lines in recent.values():
+            order.extend(lines)
+        order.sort()
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(line if line.endswith("\n") else line + "\n" for _, line in order)
+        os.replace(tmp, self.path)
+
+    def history(self, platform: str, limit: int = HISTORY_WINDOW) -> List[Dict[str, Any]]:
+        """读取某平台最近的遥测记录"""
+        if not self.path.is_file():
+            return []
+        entries = deque(maxlen=limit)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("platform") == platform:
+                        entries.append(entry)
+        except OSError:
+            return []
+        return list(entries)
+
+
+class TimeoutModel:
+    """基于历史遥测分位数的超时模型"""
+
+    def __init__(
+        self,
+        telemetry: Optional[CrawlTelemetry] = None,
+        quantile: float = 90.0,
+        safety_factor: float = 1.5,
+        min_timeout: int = 300,
+        max_timeout: int = 4 * 3600,
+    ):
+        """
+        初始化超时模型
+
+        Args:
+            telemetry: 遥测存储，默认使用 CrawlTelemetry()
+            quantile: 每条耗时取的分位数（越高越保守）
+            safety_factor: 安全系数
+            min_timeout: 单任务超时下限（秒）
+            max_timeout: 单任务超时上限（秒）
+        """
+        self.telemetry = telemetry or CrawlTelemetry()
+        self.quantile = quantile
+        self.safety_factor = safety_factor
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+
+    def suggest(self, platform: str, keyword_count: int, max_results_per_keyword: int) -> Dict[str, Any]:
+        """
+        估算单个关键词任务的超时与停滞阈值
+
+        Args:
+            platform: 平台标识
+            keyword_count: 关键词数量（仅用于启发式回退）
+            max_results_per_keyword: 每个关键词的目标条数
+
+        Returns:
+            含 timeout（秒）、stall_timeout（秒，无历史时为 None）、source（history/heuristic）、samples 的字典
+        """
+        history = self.telemetry.history(platform)
+        per_item = [
+            e["task_duration"] / e["items"]
+            for e in history
+            if e.get("items") and e.get("task_duration") and not e.get("timed_out")
+        ]
+        if len(per_item) < MIN_SAMPLES:
+            return {
+                "timeout": heuristic_timeout(keyword_count, max_results_per_keyword),
+                "stall_timeout": None,
+                "source": "heuristic",
+                "samples": len(per_item),
+            }
+
+        startups = [e["session_startup"] for e in history if e.get("session_startup")]
+        startup = percentile(startups, self.quantile) if startups else 0.0
+        seconds_per_item = percentile(per_item, self.quantile)
+        timeout = seconds_per_item * max_results_per_keyword * self.safety_factor + startup + 60
+        timeout = int(min(self.max_timeout, max(self.min_timeout, timeout)))
+        # 停滞阈值：连续这么久没有新条目写入即可提前结束
+        stall_timeout = int(max(120, percentile(per_item, 99.0) * 3))
+        return {
+            "timeout": timeout,
+            "stall_timeout": stall_timeout,
+            "source": "history",
+            "samples": len(per_item),
+            "seconds_per_item_p%d" % int(self.quantile): round(seconds_per_item, 1),
+        }
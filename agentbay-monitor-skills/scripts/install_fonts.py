@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+PDF 中文字体安装（一次性）
+
+将 Noto Sans SC 安装到 scripts/reporter/fonts/，之后生成 PDF 时只使用本地字体、不再访问网络。
+离线环境可用 --from-file 从介质拷入任意 .otf/.ttf/.ttc/.woff 中文字体。
+
+使用方法：
+    python scripts/install_fonts.py [--force] [--url URL] [--from-file 字体路径] [--check]
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+_scripts_dir = Path(__file__).resolve().parent
+if str(_scripts_dir) not in sys.path:
+    sys.path.insert(0, str(_scripts_dir))
+
+from reporter.font_cache import FONTS_DIR, clear_font_cache, provision_cjk_font, resolve_cjk_font
+
+
+def main():
+    parser = argparse.ArgumentParser(description="安装 PDF 报告使用的中文字体（一次性，运行时不再联网）")
+    parser.add_argument("--from-file", help="从本地字体文件安装（离线环境）")
+    parser.add_argument("--url", help="自定义字体下载地址")
+    parser.add_argument("--force", action="store_true", help="已安装字体时仍重新安装")
+    parser.add_argument("--timeout", type=int, default=60, help="单个下载源超时（秒），默认 60")
+    parser.add_argument("--check", action="store_true", help="只检查当前会使用哪个字体，不安装")
+    args = parser.parse_args()
+
+    if args.check:
+        source = resolve_cjk_font()
+        if source is None:
+            print(f"❌ 未找到本地中文字体，请运行: python scripts/install_fonts.py")
+            sys.exit(1)
+        print(f"✅ PDF 将使用字体: {source.path}")
+        return
+
+    try:
+        path = provision_cjk_font(
+            source_file=args.from_file, url=args.url, force=args.force, timeout=args.timeout
+        )
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"❌ 字体安装失败: {e}")
+        print(f"   可手动将中文字体（如 NotoSansSC-Regular.otf）放入 {FONTS_DIR} 后重试 --check")
+        sys.exit(1)
+
+    clear_font_cache()
+    print(f"✅ 字体已安装: {path}")
+
+
+if __name__ == "__main__":
+    main()
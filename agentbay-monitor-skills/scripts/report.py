@@ -2,6 +2,8 @@
 """
 根据情感分析结果生成报告（Markdown/JSON/可选 PDF），供主 Agent 在情感分析完成后调用。
 用法：python scripts/report.py --input processed.json [--output-dir output] [--title "报告标题"]
+批量：python scripts/report.py --input a.json b.json c.json [--workers 4]（多进程并行生成，单份失败不影响其余）
+大数据量：--input 可为 write_processed.py 输出的 .jsonl，只流式读取一遍，内存与条数无关。
 """
 import sys
 import json
@@ -13,19 +15,69 @@ if str(_scripts_dir) not in sys.path:
     sys.path.insert(0, str(_scripts_dir))
 
 from crawl import generate_report
+from reporter import generate_reports_batch
+from reporter.digest import is_processed_jsonl, load_processed_digest
+from reporter.selection import RANK_BY
+
+
+def _print_report_paths(report):
+    print(f"Markdown: {report.get('markdown_path', '')}")
+    if report.get("json_path"):
+        print(f"JSON: {report['json_path']}")
+    if report.get("pdf_path"):
+        print(f"PDF: {report['pdf_path']}")
+    if report.get("appendix_path"):
+        print(f"附录: {report['appendix_path']}")
+
+
+def _run_batch(args):
+    """多个输入：进程池并行生成，每份完成即输出路径"""
+    def on_result(report):
+        if report.get("success"):
+            print(f"\n[{report['input']}]")
+            _print_report_paths(report)
+        else:
+            print(f"\n❌ [{report['input']}] 生成失败: {report.get('error')}")
+
+    titles = [args.title] * len(args.input) if args.title else None
+    reports = generate_reports_batch(
+        args.input, output_dir=args.output_dir, titles=titles, workers=args.workers, on_result=on_result,
+        trend_db=args.trend_db, record_trends=args.record_trends and not args.no_trends,
+        rank_by=args.rank_by, detail_appendix=args.appendix,
+    )
+    failed = sum(1 for r in reports if not r.get("success"))
+    print(f"\n批量生成完成：成功 {len(reports) - failed} 份，失败 {failed} 份")
+    if failed:
+        sys.exit(1)
 
 
 def main():
     parser = argparse.ArgumentParser(description="根据情感分析结果生成舆情报告")
-    parser.add_argument("--input", "-i", required=True, help="processed 结果 JSON 文件路径（主 Agent 按提示词完成情感分析后写入）")
+    parser.add_argument("--input", "-i", required=True, nargs="+", help="processed 结果 JSON 文件路径（主 Agent 按提示词完成情感分析后写入），可传多个批量生成")
     parser.add_argument("--output-dir", "-o", default="output", help="报告输出目录")
     parser.add_argument("--title", "-t", help="报告标题，可选")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="批量生成的进程数，默认 CPU 核数")
+    parser.add_argument("--record-trends", action="store_true", help="将本次结果累加到趋势库与话题 IDF 库，并展示跨运行趋势（定时监控时使用）")
+    parser.add_argument("--trend-db", help="趋势库路径（默认 ~/.config/agentbay/trends.db，或环境变量 AGENTBAY_TREND_DB），配合 --record-trends")
+    # 旧参数：记录趋势已改为默认关闭，保留以兼容已有调用
+    parser.add_argument("--no-trends", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--rank-by", choices=RANK_BY, default="confidence", help="各情感章节展示条目的排序依据：置信度 / 互动数 / 两者兼顾，默认 confidence")
+    parser.add_argument("--appendix", action="store_true", help="另外生成全部条目明细的附录文件（<报告名>_appendix.md）")
     args = parser.parse_args()
 
+    if len(args.input) > 1:
+        _run_batch(args)
+        return
+
     try:
-        with open(args.input, "r", encoding="utf-8") as f:
-            processed_results = json.load(f)
-    except json.JSONDecodeError as e:
+        if is_processed_jsonl(args.input[0]):
+            processed_results = load_processed_digest(args.input[0], rank_by=args.rank_by)
+        else:
+            with open(args.input[0], "r", encoding="utf-8") as f:
+                processed_results = json.load(f)
+    except ValueError as e:
+        if not isinstance(e, json.JSONDecodeError):
+            sys.exit(f"输入文件解析失败: {e}")
         sys.exit(
             f"输入 JSON 解析失败（{e.msg}，约第 {e.lineno} 行第 {e.colno} 列）。\n"
             "常见原因：内容字段（如 title、content）中含有未转义的双引号 \"。\n"
@@ -36,12 +88,12 @@ def main():
         processed_results=processed_results,
         output_dir=args.output_dir,
         title=args.title,
+        trend_db=args.trend_db,
+        record_trends=args.record_trends and not args.no_trends,
+        rank_by=args.rank_by,
+        detail_appendix=args.appendix,
     )
-    print(f"Markdown: {report.get('markdown_path', '')}")
-    if report.get("json_path"):
-        print(f"JSON: {report['json_path']}")
-    if report.get("pdf_path"):
-        print(f"PDF: {report['pdf_path']}")
+    _print_report_paths(report)
 
 
 if __name__ == "__main__":
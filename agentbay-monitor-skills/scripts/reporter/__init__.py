@@ -3,10 +3,12 @@
 提供舆情分析报告的生成功能
 """
 
-from .generator import ReportGenerator
+from .generator import ReportGenerator, generate_reports_batch, generate_reports_batch_async
 from .templates import ReportTemplate
 
 __all__ = [
     "ReportGenerator",
+    "generate_reports_batch",
+    "generate_reports_batch_async",
     "ReportTemplate",
 ]
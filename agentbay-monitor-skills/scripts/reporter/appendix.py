@@ -0,0 +1,89 @@
+"""
+详细数据附录
+报告正文每种情感只展示前几条；全部条目的明细写入单独的 Markdown 附录文件。
+附录按需生成，逐条流式写出：JSON Lines 输入直接再读一遍原文件，不在内存中保留全部条目。
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+from .digest import is_processed_jsonl, iter_processed_jsonl
+from .selection import engagement_of
+
+_HEADER = (
+    "| 序号 | 情感 | 置信度 | 情感分数 | 互动数 | 平台 | 发布时间 | 作者 | 标题 | 内容 | 链接 |\n"
+    "|------|------|--------|----------|--------|------|----------|------|------|------|------|\n"
+)
+
+
+def iter_detail_items(processed_results: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    附录的条目来源：摘要自 JSON Lines 文件（含 source_path）时流式重读原文件，否则取 results
+
+    Args:
+        processed_results: processed 字典
+
+    Yields:
+        结果条目
+    """
+    source = processed_results.get("source_path")
+    if source and is_processed_jsonl(source) and Path(source).exists():
+        for kind, record in iter_processed_jsonl(source):
+            if kind == "item":
+                yield record
+        return
+    yield from processed_results.get("results") or []
+
+
+def _cell(value: Any) -> str:
+    """表格单元格：转义竖线，换行改为 <br>"""
+    if value is None:
+        return ""
+    text = str(value).replace("|", "\\|")
+    return "<br>".join(line.strip() for line in text.splitlines() if line.strip())
+
+
+def write_detail_appendix(processed_results: Dict[str, Any], path: Path, title: str = "") -> int:
+    """
+    逐条写出全部条目的明细表（原始顺序、全文）
+
+    Args:
+        processed_results: processed 字典
+        path: 附录 Markdown 路径
+        title: 报告标题
+
+    Returns:
+        写出的条数
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    count = 0
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(f"# 详细数据附录{'：' + title if title else ''}\n\n")
+            f.write(_HEADER)
+            for count, item in enumerate(iter_detail_items(processed_results), 1):
+                sentiment = item.get("sentiment") or {}
+                confidence = sentiment.get("confidence")
+                score = sentiment.get("score")
+                f.write(
+                    "| " + " | ".join((
+                        str(count),
+                        _cell(sentiment.get("label", "")),
+                        f"{confidence:.2f}" if isinstance(confidence, (int, float)) else _cell(confidence),
+                        f"{score:.2f}" if isinstance(score, (int, float)) else _cell(score),
+                        str(engagement_of(item)),
+                        _cell(item.get("platform_display") or item.get("platform")),
+                        _cell(item.get("publish_time")),
+                        _cell(item.get("author") or item.get("source")),
+                        _cell(item.get("title")),
+                        _cell(item.get("content")),
+                        _cell(item.get("url")),
+                    )) + " |\n"
+                )
+            f.write(f"\n共 {count} 条。\n")
+        tmp_path.replace(path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return count
@@ -0,0 +1,318 @@
+"""
+报告图表（纯 SVG）
+情感分布、发布量随时间变化（按情感堆叠）、各平台情感构成、互动数分布与跨运行趋势，均直接拼接 SVG，不依赖 matplotlib。
+同样的输入总是得到同样的 SVG：按数据内容哈希缓存在进程内（段落缓存），
+同一进程中聚合相同的报告直接复用已渲染的图表。
+"""
+import functools
+import html
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .font_cache import CJK_FONT_FAMILY as _CJK_FONT_FAMILY
+from .selection import engagement_of
+from .templates import content_hash, section_cache
+
+# 互动数分布的分箱下界（点赞+转发+评论）及标签
+ENGAGEMENT_BIN_EDGES = (0, 1, 10, 100, 1000, 10000)
+ENGAGEMENT_BIN_LABELS = ("0", "1-9", "10-99", "100-999", "1k-9.9k", "≥10k")
+
+# 发布量图最多展示的时间桶数、平台构成图最多展示的平台数
+MAX_VOLUME_BARS = 60
+MAX_PLATFORM_ROWS = 8
+
+_COLORS = {"正面": "#22c55e", "负面": "#ef4444", "中性": "#94a3b8"}
+_AXIS_STYLE = f'<style>.axis{{font-family:{_CJK_FONT_FAMILY},sans-serif;font-size:10px;fill:#6b7280}}</style>'
+
+
+def cached_chart(kind: str):
+    """
+    图表渲染函数的装饰器：按参数内容哈希查进程内缓存，未命中才渲染
+
+    Args:
+        kind: 图表类型（缓存键前缀）
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = content_hash(args, kwargs)
+            return section_cache.get_or_render(f"chart:{kind}", key, lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def engagement_bin(value: int) -> int:
+    """互动数所在分箱的下标"""
+    index = 0
+    for i, edge in enumerate(ENGAGEMENT_BIN_EDGES):
+        if value >= edge:
+            index = i
+    return index
+
+
+def engagement_histogram(results: Sequence[Dict[str, Any]]) -> List[int]:
+    """各互动数分箱的条数"""
+    bins = [0] * len(ENGAGEMENT_BIN_EDGES)
+    for item in results:
+        bins[engagement_bin(engagement_of(item))] += 1
+    return bins
+
+
+def _svg_open(w: int, h: int, style: str = _AXIS_STYLE) -> str:
+    return f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {w} {h}" width="{w}" height="{h}">{style}'
+
+
+@cached_chart("sentiment")
+def sentiment_bars(stats: Dict[str, Any]) -> str:
+    """根据情感统计生成简单 SVG 柱状图（图文并茂）。
+    将「非常正面」合并入「正面」、「非常负面」合并入「负面」，与执行摘要比例一致。
+    """
+    total = stats.get("total_count", 0)
+    if total <= 0:
+        return ""
+
+    dist = stats.get("sentiment_distribution", {})
+    # 合并细粒度标签：正面=正面+非常正面，负面=负面+非常负面，其余归中性
+    if any(k in dist for k in ("正面", "负面", "中性", "非常正面", "非常负面")):
+        pos = dist.get("正面", 0) + dist.get("非常正面", 0)
+        neg = dist.get("负面", 0) + dist.get("非常负面", 0)
+        neu = total - pos - neg
+        if neu < 0:
+            neu = dist.get("中性", 0)
+    else:
+        pos = dist.get("positive", 0)
+        neg = dist.get("negative", 0)
+        neu = total - pos - neg
+        if neu < 0:
+            neu = dist.get("neutral", 0)
+    labels_map = [("正面", pos, _COLORS["正面"]), ("负面", neg, _COLORS["负面"]), ("中性", neu, _COLORS["中性"])]
+
+    max_count = max((c for _, c, _ in labels_map), default=1) or 1
+    w, h = 400, 140
+    bar_h = 24
+    gap = 12
+    margin = 40
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {w} {h}" width="{w}" height="{h}">',
+        f'<style>.bar-label{{font-family:{_CJK_FONT_FAMILY},sans-serif;font-size:12px;fill:#374151}}.bar-val{{font-family:{_CJK_FONT_FAMILY},sans-serif;font-size:11px;fill:#6b7280}}</style>',
+    ]
+    y = margin
+    for label, count, color in labels_map:
+        ratio = count / max_count
+        bar_w = max(4, int(200 * ratio))
+        parts.append(f'<rect x="{margin}" y="{y}" width="{bar_w}" height="{bar_h - 2}" rx="4" fill="{color}" opacity="0.85"/>')
+        parts.append(f'<text class="bar-label" x="{margin}" y="{y + bar_h - 6}">{label}</text>')
+        parts.append(f'<text class="bar-val" x="{margin + 210}" y="{y + bar_h - 6}">{count} ({100*count/total:.1f}%)</text>')
+        y += bar_h + gap
+
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+@cached_chart("trend")
+def trend_chart(trend: List[Dict[str, Any]]) -> str:
+    """根据按天趋势生成 SVG：柱为每日条数，折线为平均情感分数（-1~1）。不足两天时返回空。"""
+    if not trend or len(trend) < 2:
+        return ""
+
+    w, h = 480, 180
+    left, right, top, bottom = 40, 40, 16, 36
+    plot_w, plot_h = w - left - right, h - top - bottom
+    step = plot_w / len(trend)
+    bar_w = max(4, step * 0.6)
+    peak = max(day.get("total_count", 0) for day in trend) or 1
+
+    parts = [
+        _svg_open(w, h),
+        f'<line x1="{left}" y1="{top + plot_h}" x2="{left + plot_w}" y2="{top + plot_h}" stroke="#e5e7eb"/>',
+        # 情感分数 0 分基线
+        f'<line x1="{left}" y1="{top + plot_h / 2}" x2="{left + plot_w}" y2="{top + plot_h / 2}" '
+        f'stroke="#e5e7eb" stroke-dasharray="3,3"/>',
+        f'<text class="axis" x="{left - 4}" y="{top + 8}" text-anchor="end">{peak}</text>',
+        f'<text class="axis" x="{left + plot_w + 4}" y="{top + 8}">+1</text>',
+        f'<text class="axis" x="{left + plot_w + 4}" y="{top + plot_h}">-1</text>',
+    ]
+    points = []
+    label_every = max(1, len(trend) // 7)
+    for i, day in enumerate(trend):
+        cx = left + step * (i + 0.5)
+        bar_h = max(1, plot_h * day.get("total_count", 0) / peak)
+        parts.append(
+            f'<rect x="{cx - bar_w / 2:.1f}" y="{top + plot_h - bar_h:.1f}" width="{bar_w:.1f}" '
+            f'height="{bar_h:.1f}" fill="#93c5fd"/>'
+        )
+        score = max(-1.0, min(1.0, day.get("average_score", 0.0)))
+        points.append(f"{cx:.1f},{top + plot_h * (1 - score) / 2:.1f}")
+        if i % label_every == 0 or i == len(trend) - 1:
+            parts.append(
+                f'<text class="axis" x="{cx:.1f}" y="{h - bottom + 14}" text-anchor="middle">{html.escape(day["bucket"][5:])}</text>'
+            )
+    parts.append(f'<polyline points="{" ".join(points)}" fill="none" stroke="#f97316" stroke-width="2"/>')
+    parts.append(
+        f'<text class="axis" x="{left}" y="{h - 4}">柱：每日条数　折线：平均情感分数</text>'
+    )
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+@cached_chart("volume")
+def volume_chart(series: List[Dict[str, Any]], granularity: str = "day") -> str:
+    """
+    发布量随时间变化：每个时间桶一根柱，按正面/中性/负面堆叠。不足两个时间桶时返回空。
+
+    Args:
+        series: TimeBuckets.series 的结果（按时间升序）
+        granularity: 时间桶粒度 day / hour，决定横轴标签
+    """
+    series = series[-MAX_VOLUME_BARS:]
+    if len(series) < 2:
+        return ""
+
+    w, h = 480, 180
+    left, right, top, bottom = 40, 16, 16, 36
+    plot_w, plot_h = w - left - right, h - top - bottom
+    step = plot_w / len(series)
+    bar_w = max(2, step * 0.7)
+    peak = max(b.get("total_count", 0) for b in series) or 1
+
+    parts = [
+        _svg_open(w, h),
+        f'<line x1="{left}" y1="{top + plot_h}" x2="{left + plot_w}" y2="{top + plot_h}" stroke="#e5e7eb"/>',
+        f'<text class="axis" x="{left - 4}" y="{top + 8}" text-anchor="end">{peak}</text>',
+        f'<text class="axis" x="{left - 4}" y="{top + plot_h}" text-anchor="end">0</text>',
+    ]
+    label_every = max(1, len(series) // 7)
+    for i, bucket in enumerate(series):
+        cx = left + step * (i + 0.5)
+        y = top + plot_h
+        for key, label in (("positive_count", "正面"), ("neutral_count", "中性"), ("negative_count", "负面")):
+            seg = plot_h * bucket.get(key, 0) / peak
+            if seg <= 0:
+                continue
+            y -= seg
+            parts.append(
+                f'<rect x="{cx - bar_w / 2:.1f}" y="{y:.1f}" width="{bar_w:.1f}" height="{seg:.1f}" '
+                f'fill="{_COLORS[label]}" opacity="0.85"/>'
+            )
+        if i % label_every == 0 or i == len(series) - 1:
+            tick = bucket["bucket"][11:] if granularity == "hour" else bucket["bucket"][5:]
+            parts.append(
+                f'<text class="axis" x="{cx:.1f}" y="{h - bottom + 14}" text-anchor="middle">{html.escape(tick)}</text>'
+            )
+    parts.append(f'<text class="axis" x="{left}" y="{h - 4}">绿：正面　灰：中性　红：负面</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+@cached_chart("platforms")
+def platform_stacked_bars(breakdown: Dict[str, Dict[str, Any]]) -> str:
+    """
+    各平台情感构成：每个平台一行 100% 堆叠条（正面/中性/负面），右侧标注条数。少于两个平台时返回空。
+
+    Args:
+        breakdown: sentiment_statistics 中的 platform_breakdown（平台名 → 统计）
+    """
+    rows = sorted(
+        ((name, s) for name, s in (breakdown or {}).items() if s.get("total_count", 0) > 0),
+        key=lambda row: -row[1].get("total_count", 0),
+    )[:MAX_PLATFORM_ROWS]
+    if len(rows) < 2:
+        return ""
+
+    bar_h, gap, top = 18, 10, 12
+    label_w, plot_w = 90, 260
+    w, h = 480, top + len(rows) * (bar_h + gap) + 20
+    parts = [_svg_open(w, h)]
+    y = top
+    for name, s in rows:
+        total = s["total_count"]
+        parts.append(f'<text class="axis" x="{label_w - 6}" y="{y + bar_h - 5}" text-anchor="end">{html.escape(name[:8])}</text>')
+        x = float(label_w)
+        for key, label in (("positive_count", "正面"), ("neutral_count", "中性"), ("negative_count", "负面")):
+            seg = plot_w * s.get(key, 0) / total
+            if seg <= 0:
+                continue
+            parts.append(
+                f'<rect x="{x:.1f}" y="{y}" width="{seg:.1f}" height="{bar_h}" fill="{_COLORS[label]}" opacity="0.85"/>'
+            )
+            x += seg
+        negative = 100 * s.get("negative_count", 0) / total
+        parts.append(
+            f'<text class="axis" x="{label_w + plot_w + 8}" y="{y + bar_h - 5}">{total} 条，负面 {negative:.0f}%</text>'
+        )
+        y += bar_h + gap
+    parts.append(f'<text class="axis" x="{label_w}" y="{h - 4}">绿：正面　灰：中性　红：负面</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+@cached_chart("engagement")
+def engagement_chart(bins: List[int]) -> str:
+    """
+    互动数（点赞+转发+评论）分布直方图，分箱见 ENGAGEMENT_BIN_EDGES。无数据时返回空。
+
+    Args:
+        bins: 各分箱的条数（见 engagement_histogram）
+    """
+    total = sum(bins or [])
+    if total <= 0:
+        return ""
+
+    w, h = 480, 170
+    left, top, bottom = 40, 20, 36
+    plot_w, plot_h = w - left - 16, h - top - bottom
+    step = plot_w / len(bins)
+    bar_w = step * 0.7
+    peak = max(bins) or 1
+    parts = [
+        _svg_open(w, h),
+        f'<line x1="{left}" y1="{top + plot_h}" x2="{left + plot_w}" y2="{top + plot_h}" stroke="#e5e7eb"/>',
+    ]
+    for i, (count, label) in enumerate(zip(bins, ENGAGEMENT_BIN_LABELS)):
+        cx = left + step * (i + 0.5)
+        bar_h = plot_h * count / peak
+        if count:
+            parts.append(
+                f'<rect x="{cx - bar_w / 2:.1f}" y="{top + plot_h - bar_h:.1f}" width="{bar_w:.1f}" '
+                f'height="{bar_h:.1f}" rx="2" fill="#a78bfa"/>'
+            )
+        parts.append(
+            f'<text class="axis" x="{cx:.1f}" y="{top + plot_h - bar_h - 4:.1f}" text-anchor="middle">'
+            f'{count} ({100 * count / total:.0f}%)</text>'
+        )
+        parts.append(f'<text class="axis" x="{cx:.1f}" y="{h - bottom + 14}" text-anchor="middle">{label}</text>')
+    parts.append(f'<text class="axis" x="{left}" y="{h - 4}">横轴：单条互动数（点赞+转发+评论）　纵轴：条数</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def report_charts(
+    stats: Dict[str, Any],
+    trend: Optional[List[Dict[str, Any]]] = None,
+    time_buckets: Optional[Any] = None,
+    engagement_bins: Optional[List[int]] = None,
+) -> List[Tuple[str, str]]:
+    """
+    报告用的全部图表（数据不足的图表省略）
+
+    Args:
+        stats: sentiment_statistics
+        trend: 跨运行按天趋势（TrendStore.series）
+        time_buckets: 本次结果的时间桶聚合（TimeBuckets）；跨多天时按天、仅一天时按小时画发布量
+        engagement_bins: 互动数分箱计数（见 engagement_histogram）
+
+    Returns:
+        [(图表标题, SVG), ...]
+    """
+    charts = [("情感分布示意", sentiment_bars(stats))]
+    if time_buckets is not None:
+        daily = time_buckets.series("day")
+        if len(daily) >= 2:
+            charts.append(("发布量（按天）", volume_chart(daily, "day")))
+        else:
+            charts.append(("发布量（按小时）", volume_chart(time_buckets.series("hour"), "hour")))
+    charts.append(("各平台情感构成", platform_stacked_bars(stats.get("platform_breakdown") or {})))
+    if engagement_bins:
+        charts.append(("互动数分布", engagement_chart(engagement_bins)))
+    charts.append(("舆情趋势（按天）", trend_chart(trend or [])))
+    return [(caption, svg) for caption, svg in charts if svg]
@@ -0,0 +1,188 @@
+"""
+processed 结果的流式摘要
+支持 JSON Lines 格式的 processed 文件（首行 header、末行 footer、中间每行一条结果），
+生成报告时只读一遍：累加统计、按情感保留得分最高的前 N 条、汇总互动数据；
+话题提取的词表与参与聚类的标题数设有上限，内存与条数无关；趋势库的逐条去重在写入时重读原文件完成。
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sentiment.sentiment_stats import LABELS, SentimentStatsEngine
+
+from .charts import ENGAGEMENT_BIN_EDGES, engagement_bin
+from .selection import DEFAULT_TOP_N, TopKSelector, engagement_of
+from .topics import TopicExtractor
+from .trends import TimeBuckets
+
+# JSON Lines processed 文件的格式标识
+PROCESSED_JSONL_FORMAT = "agentbay-processed"
+PROCESSED_JSONL_VERSION = 1
+
+# 「关键话题」取前若干条标题
+KEY_TOPIC_TITLES = 10
+
+# 流式摘要中话题提取的词表上限（远大于摘要保留的候选词数）与参与聚类的标题数上限
+DIGEST_MAX_TERMS = 20000
+DIGEST_CLUSTER_DOCS = 5000
+
+
+def is_processed_jsonl(path: str) -> bool:
+    """是否为 JSON Lines 格式的 processed 文件（按扩展名判断）"""
+    return Path(path).suffix.lower() in (".jsonl", ".ndjson")
+
+
+def processed_header(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """生成 header 记录"""
+    return {"_type": "header", "format": PROCESSED_JSONL_FORMAT, "version": PROCESSED_JSONL_VERSION, **meta}
+
+
+def processed_footer(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """生成 footer 记录（统计、总结等写完全部条目后才确定的字段）"""
+    return {"_type": "footer", **meta}
+
+
+def iter_processed_jsonl(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    逐行读取 JSON Lines processed 文件
+
+    Args:
+        path: 文件路径
+
+    Yields:
+        (记录类型 header/footer/item, 记录)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path} 第 {lineno} 行不是合法 JSON: {e.msg}")
+            if not isinstance(record, dict):
+                continue
+            kind = record.pop("_type", None)
+            if kind in ("header", "footer"):
+                yield kind, record
+            else:
+                yield "item", record
+
+
+class ProcessedDigest:
+    """processed 结果的流式摘要：只保留报告需要的统计与前 N 条内容"""
+
+    def __init__(
+        self, top_n: int = DEFAULT_TOP_N, topic_titles: int = KEY_TOPIC_TITLES, rank_by: str = "confidence"
+    ):
+        """
+        Args:
+            top_n: 每种情感保留的条数
+            topic_titles: 「关键话题」保留的标题数
+            rank_by: 前 N 条的排序依据，见 selection.RANK_BY
+        """
+        self.top_n = top_n
+        self.topic_titles = topic_titles
+        self.meta: Dict[str, Any] = {}
+        self.stats = SentimentStatsEngine()
+        self.selector = TopKSelector(top_n, rank_by)
+        self._titles: List[str] = []
+        self.engagement = {"likes": 0, "shares": 0, "comments": 0}
+        self.engagement_bins = [0] * len(ENGAGEMENT_BIN_EDGES)
+        # 时间桶在读到第一条结果时按 header 中的爬取时间/平台/关键词创建
+        self.time_buckets: Optional[TimeBuckets] = None
+        self.topics = TopicExtractor(max_cluster_docs=DIGEST_CLUSTER_DOCS, max_terms=DIGEST_MAX_TERMS)
+
+    def add_meta(self, record: Dict[str, Any]):
+        """合并 header/footer 中的元信息"""
+        self.meta.update(record)
+
+    def add(self, item: Dict[str, Any]):
+        """追加一条结果"""
+        self.stats.add(item)
+        if self.time_buckets is None:
+            self.time_buckets = TimeBuckets.for_processed(self.meta)
+        self.time_buckets.add(item)
+        self.topics.add(item)
+        for key in self.engagement:
+            try:
+                self.engagement[key] += int(item.get(key) or 0)
+            except (TypeError, ValueError):
+                pass
+        self.engagement_bins[engagement_bin(engagement_of(item))] += 1
+        if len(self._titles) < self.topic_titles and item.get("title"):
+            self._titles.append(item["title"])
+        self.selector.add(item)
+
+    def top_items(self, label: str) -> List[Dict[str, Any]]:
+        """某情感得分最高的前 N 条（得分降序，同分保持原顺序）"""
+        return self.selector.top_items(label)
+
+    def to_processed_results(self) -> Dict[str, Any]:
+        """
+        生成可直接交给 ReportGenerator 的 processed 字典：results 只含各情感前 N 条，
+        全量统计在 sentiment_statistics，互动、话题、关键词与时间桶摘要在 report_digest
+
+        Returns:
+            processed 字典
+        """
+        processed = {k: v for k, v in self.meta.items() if k not in ("format", "version")}
+        computed = self.stats.statistics()
+        stats = processed.get("sentiment_statistics") or computed
+        if stats.get("total_count") != computed["total_count"]:
+            # footer 中的统计与实际条目数不符（如文件被截断）时以实际读取为准
+            stats = computed
+        processed["sentiment_statistics"] = stats
+        processed["results"] = [item for label in LABELS for item in self.top_items(label)]
+        processed["total_count"] = computed["total_count"]
+        processed["report_digest"] = {
+            "total_count": computed["total_count"],
+            "engagement": dict(self.engagement),
+            "engagement_bins": list(self.engagement_bins),
+            "key_topic_titles": list(self._titles),
+            "time_buckets": (self.time_buckets or TimeBuckets.for_processed(self.meta)).to_dict(),
+            "topics": self.topics.snapshot(),
+        }
+        return processed
+
+
+def load_processed_digest(path: str, top_n: int = DEFAULT_TOP_N, rank_by: str = "confidence") -> Dict[str, Any]:
+    """
+    一遍流式读取 JSON Lines processed 文件，返回报告用的摘要 processed 字典
+
+    Args:
+        path: processed .jsonl 路径
+        top_n: 每种情感保留的条数
+        rank_by: 前 N 条的排序依据，见 selection.RANK_BY
+
+    Returns:
+        processed 字典（见 ProcessedDigest.to_processed_results）；source_path 指向原文件，
+        供详细数据附录再次流式读取全部条目
+    """
+    digest = ProcessedDigest(top_n=top_n, rank_by=rank_by)
+    for kind, record in iter_processed_jsonl(path):
+        if kind == "item":
+            digest.add(record)
+        else:
+            digest.add_meta(record)
+    processed = digest.to_processed_results()
+    processed["source_path"] = str(path)
+    return processed
+
+
+def load_processed(path: str, rank_by: str = "confidence") -> Dict[str, Any]:
+    """
+    按扩展名读取 processed 文件：.jsonl/.ndjson 流式生成摘要，其余按整份 JSON 读取
+
+    Args:
+        path: processed 文件路径
+        rank_by: JSON Lines 摘要中前 N 条的排序依据，见 selection.RANK_BY
+
+    Returns:
+        processed 字典
+    """
+    if is_processed_jsonl(path):
+        return load_processed_digest(path, rank_by=rank_by)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
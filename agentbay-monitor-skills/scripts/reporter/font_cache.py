@@ -0,0 +1,426 @@
+"""
+CJK 字体解析与缓存
+PDF 导出用的中文字体每个进程只解析、读取一次；安装 fontTools 时按报告实际用到的字符做子集化，
+子集按「字体 + 字符集」缓存在进程内（条数有上限），嵌入的 data URI 从数 MB 降到几十 KB。
+运行时只查找本地字体、不访问网络；字体由 install_fonts.py 一次性安装到 reporter/fonts/。
+依赖：fontTools（可选，缺失时嵌入完整字体）
+"""
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# 字体子集化（可选）
+try:
+    from fontTools import subset as ft_subset
+    from fontTools.ttLib import TTFont
+    FONTTOOLS_AVAILABLE = True
+except ImportError:
+    FONTTOOLS_AVAILABLE = False
+
+# 用于 @font-face 的 CJK 字体族名，正文统一使用该字体
+CJK_FONT_FAMILY = "ReportCJK"
+
+# 项目内字体目录
+FONTS_DIR = Path(__file__).resolve().parent / "fonts"
+
+# 磁盘缓存目录（字体解析结果），可用环境变量 AGENTBAY_FONT_CACHE 覆盖
+DEFAULT_FONT_CACHE_DIR = Path.home() / ".cache" / "agentbay" / "fonts"
+
+# reporter/fonts/ 下按优先级查找的通用字体文件名
+_BUNDLED_FONT_NAMES = (
+    "NotoSansSC-Regular.otf", "NotoSansSC-Regular.ttf", "SourceHanSansSC-Regular.otf",
+    "SimSun.ttf", "SimSun.otf", "NotoSansSC-Regular.woff",
+)
+
+# 找不到字体时直接报错（而不是退回无 @font-face 的通用字体），可用环境变量 AGENTBAY_FONT_STRICT=1 开启
+STRICT_ENV = "AGENTBAY_FONT_STRICT"
+
+# 磁盘上的解析结果缓存有效期（秒），字体目录变化时立即失效；「未找到」不缓存，
+# 之后安装到项目目录或系统中的字体下次运行即可生效
+RESOLVE_CACHE_TTL = 24 * 3600
+
+# 进程内保留的子集化 @font-face 条数（每条为一份字符集的 data URI，约几十 KB）
+SUBSET_CACHE_SIZE = 32
+
+# 各平台系统 CJK 字体路径（路径, format），按优先级排列；Python 根据 sys.platform 选用
+SYSTEM_FONT_CANDIDATES: Dict[str, List[Tuple[Path, str]]] = {
+    "darwin": [
+        (Path("/System/Library/Fonts/PingFang.ttc"), "truetype"),
+        (Path("/System/Library/Fonts/Supplemental/Songti.ttc"), "truetype"),
+        (Path("/System/Library/Fonts/Supplemental/STHeiti Medium.ttc"), "truetype"),
+        (Path("/Library/Fonts/Arial Unicode.ttf"), "truetype"),
+    ],
+    "win32": [
+        (Path("C:/Windows/Fonts/msyh.ttc"), "truetype"),   # 微软雅黑
+        (Path("C:/Windows/Fonts/simsun.ttc"), "truetype"), # 宋体
+        (Path("C:/Windows/Fonts/simhei.ttf"), "truetype"), # 黑体
+    ],
+    "linux": [
+        (Path("/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc"), "truetype"),
+        (Path("/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc"), "truetype"),
+        (Path("/usr/share/fonts/truetype/noto/NotoSansCJK-Regular.ttc"), "truetype"),
+    ],
+}
+# 兼容 win64 等
+if sys.platform == "win32":
+    PLATFORM_KEY = "win32"
+elif sys.platform == "darwin":
+    PLATFORM_KEY = "darwin"
+else:
+    PLATFORM_KEY = "linux"
+
+# install_fonts.py 依次尝试的下载源：(URL, 安装文件名)
+PROVISION_SOURCES = (
+    (
+        "https://github.com/notofonts/noto-cjk/raw/main/Sans/SubsetOTF/SC/NotoSansSC-Regular.otf",
+        "NotoSansSC-Regular.otf",
+    ),
+    (
+        "https://cdn.jsdelivr.net/npm/@fontsource/noto-sans-sc@5.0.0/files/noto-sans-sc-5-400-normal.woff",
+        "NotoSansSC-Regular.woff",
+    ),
+)
+
+
+class FontNotAvailableError(RuntimeError):
+    """严格模式下找不到本地 CJK 字体"""
+
+
+# 子集中始终保留的字符：可打印 ASCII 与常用中文标点
+_BASE_CHARS = "".join(chr(c) for c in range(0x20, 0x7F)) + "，。、；：？！“”‘’（）《》【】—…·％"
+
+
+class FontSource(NamedTuple):
+    """解析到的本地字体：embed 表示以 data URI 嵌入而非 file:// 引用"""
+    path: Path
+    fmt: str
+    embed: bool
+
+
+_lock = threading.Lock()
+_resolved: Optional[FontSource] = None
+_resolved_done = False
+# 进程内缓存：完整字体的 base64 与子集化后的 @font-face CSS（LRU；每份报告的字符集不同，只保留最近若干份）
+_base64_cache: Dict[Tuple[str, float], str] = {}
+_subset_css_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+def font_cache_dir() -> Path:
+    """磁盘字体缓存目录"""
+    return Path(os.environ.get("AGENTBAY_FONT_CACHE") or DEFAULT_FONT_CACHE_DIR)
+
+
+def font_path_to_file_url(path: Path) -> str:
+    """将字体路径转为 WeasyPrint 可用的 file:// URL（含 Windows 盘符）。"""
+    path = path.resolve()
+    # Windows: file:///C:/Windows/Fonts/... ；Unix: file:///usr/share/...
+    posix = path.as_posix()
+    if posix.startswith("/"):
+        return f"file://{posix}"
+    return f"file:///{posix}"
+
+
+def font_face_css(src: str, fmt: str) -> str:
+    """生成 @font-face 规则"""
+    return f"""
+        @font-face {{
+            font-family: '{CJK_FONT_FAMILY}';
+            src: url({src}) format('{fmt}');
+            font-weight: normal;
+            font-style: normal;
+        }}"""
+
+
+def _format_for(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix == ".otf":
+        return "opentype"
+    if suffix == ".woff":
+        return "woff"
+    return "truetype"
+
+
+def strict_mode() -> bool:
+    """是否开启严格模式（找不到字体时直接报错）"""
+    return os.environ.get(STRICT_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _platform_fonts_dir() -> Path:
+    platform_subdir = {"win32": "windows", "darwin": "mac", "linux": "linux"}.get(PLATFORM_KEY, "linux")
+    return FONTS_DIR / platform_subdir
+
+
+def _resolve_fingerprint() -> str:
+    """字体目录的指纹：安装/删除字体后目录 mtime 变化，磁盘解析缓存随之失效"""
+    parts = [str(FONTS_DIR.resolve())]
+    for directory in (FONTS_DIR, _platform_fonts_dir()):
+        try:
+            parts.append(str(directory.stat().st_mtime))
+        except OSError:
+            parts.append("-")
+    return "|".join(parts)
+
+
+def _resolve_uncached() -> Optional[FontSource]:
+    """
+    按优先级解析本地 CJK 字体（不访问网络）：
+    1) reporter/fonts/ 通用字体 或 reporter/fonts/windows|mac|linux/ 按系统；
+    2) 本机系统字体（按 Windows/macOS/Linux 选择）。
+    """
+    # 1a) 项目内 reporter/fonts/ 通用字体
+    if FONTS_DIR.is_dir():
+        for name in _BUNDLED_FONT_NAMES:
+            path = FONTS_DIR / name
+            if path.is_file():
+                return FontSource(path, _format_for(path), embed=path.suffix.lower() != ".woff")
+
+    # 1b) 按系统使用 reporter/fonts/windows、reporter/fonts/mac、reporter/fonts/linux 下字体
+    platform_fonts_dir = _platform_fonts_dir()
+    if platform_fonts_dir.is_dir():
+        for ext in (".ttf", ".otf", ".ttc"):
+            for path in sorted(platform_fonts_dir.glob(f"*{ext}")):
+                if path.is_file():
+                    return FontSource(path, _format_for(path), embed=ext != ".ttc")
+
+    # 2) 本机系统字体
+    for path, fmt in SYSTEM_FONT_CANDIDATES.get(PLATFORM_KEY, []):
+        if path.is_file():
+            return FontSource(path, fmt, embed=False)
+
+    return None
+
+
+def _load_resolve_cache(fingerprint: str) -> Optional[FontSource]:
+    """读取磁盘解析缓存，未命中时返回 None"""
+    try:
+        with open(font_cache_dir() / "resolved.json", "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if entry.get("fingerprint") != fingerprint or time.time() - entry.get("checked", 0) > RESOLVE_CACHE_TTL:
+        return None
+    if entry.get("path") is None:
+        return None
+    path = Path(entry["path"])
+    if not path.is_file():
+        return None
+    return FontSource(path, entry["fmt"], bool(entry["embed"]))
+
+
+def _save_resolve_cache(fingerprint: str, source: FontSource):
+    entry = {
+        "fingerprint": fingerprint,
+        "checked": time.time(),
+        "path": str(source.path),
+        "fmt": source.fmt,
+        "embed": source.embed,
+    }
+    try:
+        cache_dir = font_cache_dir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = cache_dir / f"resolved.{os.getpid()}.part"
+        tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(cache_dir / "resolved.json")
+    except OSError:
+        pass  # 缓存写入失败不影响导出
+
+
+def resolve_cjk_font() -> Optional[FontSource]:
+    """
+    解析本地 CJK 字体：每个进程只解析一次，找到的字体另缓存在磁盘，字体目录变化后失效
+
+    Returns:
+        字体，未找到时为 None
+    """
+    global _resolved, _resolved_done
+    with _lock:
+        if not _resolved_done:
+            fingerprint = _resolve_fingerprint()
+            source = _load_resolve_cache(fingerprint)
+            if source is None:
+                source = _resolve_uncached()
+                if source is not None:
+                    _save_resolve_cache(fingerprint, source)
+            _resolved = source
+            _resolved_done = True
+            if source is None:
+                print("⚠ 未找到本地中文字体，PDF 中文可能显示为方框。"
+                      "请运行一次: python scripts/install_fonts.py")
+        return _resolved
+
+
+def clear_font_cache():
+    """清空进程内缓存（字体目录变化后重新解析用）"""
+    global _resolved, _resolved_done
+    with _lock:
+        _resolved = None
+        _resolved_done = False
+        _base64_cache.clear()
+        _subset_css_cache.clear()
+
+
+def _full_font_css(source: FontSource) -> str:
+    """不做子集化时的 @font-face：本地 ttf/otf 嵌入 base64（进程内只编码一次），其余用 file:// 引用"""
+    if not source.embed:
+        return font_face_css(f"'{font_path_to_file_url(source.path)}'", source.fmt)
+    key = (str(source.path), source.path.stat().st_mtime)
+    b64 = _base64_cache.get(key)
+    if b64 is None:
+        b64 = base64.b64encode(source.path.read_bytes()).decode("ascii")
+        _base64_cache[key] = b64
+    return font_face_css(f"data:font/{source.fmt};base64,{b64}", source.fmt)
+
+
+def _subset_font(path: Path, chars: str) -> Tuple[bytes, str]:
+    """用 fontTools 将字体裁剪为只含 chars 中字符的子集，返回 (字体字节, format)"""
+    options = ft_subset.Options()
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    options.hinting = False
+    options.desubroutinize = True
+    font = TTFont(str(path), fontNumber=0, lazy=True) if path.suffix.lower() == ".ttc" else TTFont(str(path), lazy=True)
+    try:
+        subsetter = ft_subset.Subsetter(options)
+        subsetter.populate(text=chars)
+        subsetter.subset(font)
+        fmt = "opentype" if "CFF " in font else "truetype"
+        buf = io.BytesIO()
+        font.flavor = None
+        font.save(buf)
+        return buf.getvalue(), fmt
+    finally:
+        font.close()
+
+
+def _subset_css(source: FontSource, text: str) -> Optional[str]:
+    """按文本字符集生成子集化字体的 @font-face；子集按「字体文件 + 字符集」缓存在进程内（LRU）"""
+    chars = "".join(sorted(set(text) | set(_BASE_CHARS)))
+    stat = source.path.stat()
+    digest = hashlib.sha1(
+        f"{source.path.resolve()}|{stat.st_size}|{stat.st_mtime}|".encode("utf-8") + chars.encode("utf-8")
+    ).hexdigest()
+    with _lock:
+        css = _subset_css_cache.get(digest)
+        if css is not None:
+            _subset_css_cache.move_to_end(digest)
+            return css
+
+    try:
+        data, fmt = _subset_font(source.path, chars)
+    except Exception as e:
+        print(f"⚠ 字体子集化失败，嵌入完整字体: {e}")
+        return None
+
+    b64 = base64.b64encode(data).decode("ascii")
+    css = font_face_css(f"data:font/{fmt};base64,{b64}", fmt)
+    with _lock:
+        _subset_css_cache[digest] = css
+        while len(_subset_css_cache) > SUBSET_CACHE_SIZE:
+            _subset_css_cache.popitem(last=False)
+    return css
+
+
+def get_cjk_font_css(text: Optional[str] = None, strict: Optional[bool] = None) -> str:
+    """
+    生成用于 PDF 的 CJK @font-face，避免中文乱码。只使用本地字体，不访问网络。
+
+    Args:
+        text: 报告中会渲染的文本；传入且安装了 fontTools 时只嵌入这些字符的字体子集
+        strict: 找不到字体时是否报错，默认读取 AGENTBAY_FONT_STRICT
+
+    Returns:
+        @font-face CSS 片段；未找到字体且非严格模式时为空字符串（使用系统默认字体）
+
+    Raises:
+        FontNotAvailableError: 严格模式下未找到字体
+    """
+    source = resolve_cjk_font()
+    if source is None:
+        if strict if strict is not None else strict_mode():
+            raise FontNotAvailableError(
+                "未找到本地中文字体（严格模式）。请先运行: python scripts/install_fonts.py"
+            )
+        return ""
+    if text and FONTTOOLS_AVAILABLE and source.fmt in ("truetype", "opentype"):
+        css = _subset_css(source, text)
+        if css is not None:
+            return css
+    return _full_font_css(source)
+
+
+def provision_cjk_font(
+    source_file: Optional[str] = None,
+    url: Optional[str] = None,
+    force: bool = False,
+    timeout: int = 60,
+) -> Path:
+    """
+    一次性安装 CJK 字体到 reporter/fonts/（仅此处访问网络）
+
+    Args:
+        source_file: 本地字体文件（离线环境从介质拷入），传入时不下载
+        url: 自定义下载地址，默认依次尝试 PROVISION_SOURCES
+        force: 已安装字体时是否覆盖
+        timeout: 单个下载源的超时（秒）
+
+    Returns:
+        安装后的字体路径
+
+    Raises:
+        RuntimeError: 所有下载源均失败
+    """
+    FONTS_DIR.mkdir(parents=True, exist_ok=True)
+    if not force:
+        for name in _BUNDLED_FONT_NAMES:
+            if (FONTS_DIR / name).is_file():
+                return FONTS_DIR / name
+
+    if source_file:
+        src = Path(source_file)
+        if src.suffix.lower() not in (".otf", ".ttf", ".ttc", ".woff"):
+            raise ValueError(f"不支持的字体格式: {src.suffix}")
+        if src.suffix.lower() == ".ttc":
+            target_dir = _platform_fonts_dir()
+            target_dir.mkdir(parents=True, exist_ok=True)
+            target = target_dir / src.name
+        else:
+            target = FONTS_DIR / f"NotoSansSC-Regular{src.suffix.lower()}"
+        shutil.copyfile(src, target)
+        clear_font_cache()
+        return target
+
+    sources = [(url, f"NotoSansSC-Regular{Path(url).suffix.lower() or '.otf'}")] if url else list(PROVISION_SOURCES)
+    errors = []
+    for src_url, name in sources:
+        target = FONTS_DIR / name
+        tmp = target.with_suffix(target.suffix + ".part")
+        try:
+            print(f"⬇️ 下载字体: {src_url}")
+            req = urllib.request.Request(src_url, headers={"User-Agent": "Mozilla/5.0 (compatible; WeasyPrint)"})
+            with urllib.request.urlopen(req, timeout=timeout) as resp, open(tmp, "wb") as f:
+                shutil.copyfileobj(resp, f)
+            if tmp.stat().st_size < 1024:
+                raise ValueError("下载内容过小，可能不是字体文件")
+            tmp.replace(target)
+            clear_font_cache()
+            return target
+        except Exception as e:
+            errors.append(f"{src_url}: {e}")
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+    raise RuntimeError("字体下载失败:\n" + "\n".join(errors))
@@ -4,26 +4,63 @@
 """
 import os
 import json
-from typing import Dict, Any, List, Optional
+import time
+import asyncio
+import functools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Tuple, Union, Callable
 from datetime import datetime
 from pathlib import Path
 
-from .templates import ReportTemplate
+from .templates import ReportTemplate, cached_section, content_hash, section_cache
+from .appendix import iter_detail_items, write_detail_appendix
+from .charts import engagement_histogram, report_charts
+from .digest import is_processed_jsonl, load_processed
+from .html_report import HtmlReportTemplate, render_text
+from .selection import select_top_items
+from .topics import TopicExtractor, TopicStore, rank_keywords
+from .trends import TimeBuckets, TrendStore, describe_latest_change
+
+# 报告中展示的时间桶数：本次结果按天最多展示的天数、跨运行趋势展示的最近天数
+TIME_DISTRIBUTION_DAYS = 14
+TREND_DAYS = 14
+# 「关键话题」展示的关键词数与相似标题聚类数
+TOPIC_KEYWORDS = 10
+TOPIC_CLUSTERS = 5
 
 
 class ReportGenerator:
     """报告生成器"""
 
-    def __init__(self, output_dir: str = "output"):
+    def __init__(
+        self,
+        output_dir: str = "output",
+        trend_db: Optional[str] = None,
+        record_trends: bool = False,
+        topic_db: Optional[str] = None,
+        rank_by: str = "confidence",
+        detail_appendix: bool = False
+    ):
         """
         初始化报告生成器
 
         Args:
             output_dir: 输出目录
+            trend_db: 趋势库路径，默认 AGENTBAY_TREND_DB 或 ~/.config/agentbay/trends.db
+            record_trends: 是否将每份结果累加到本地历史库（趋势库、话题 IDF 库）并在报告中展示跨运行趋势；
+                默认不写入，避免一次性调用或测试污染 ~/.config/agentbay 下的历史库
+            topic_db: 话题 IDF 库路径，默认 AGENTBAY_TOPIC_DB 或 ~/.config/agentbay/topics.db
+            rank_by: 各情感章节展示条目的排序依据：confidence（置信度）/ engagement（互动数）/ weighted（两者兼顾）
+            detail_appendix: 是否另外生成全部条目明细的附录文件（报告与 PDF 写出后流式生成）
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         self.template = ReportTemplate()
+        self.trend_db = trend_db
+        self.record_trends = record_trends
+        self.topic_db = topic_db
+        self.rank_by = rank_by
+        self.detail_appendix = detail_appendix
 
     def generate_report(
         self,
@@ -38,8 +75,12 @@ class ReportGenerator:
             title: 报告标题，如果为None则自动生成
 
         Returns:
-            包含报告内容和文件路径的字典
+            包含报告内容和文件路径的字典；timings 为各阶段耗时（秒）：
+            analysis（时间桶/话题/历史库）、template（Markdown 与 HTML 渲染）、markdown（Markdown 转 HTML，
+            直接渲染 HTML 时为 0）、charts（PDF 图表，生成 PDF 时）、layout（PDF 排版）、write（写出各文件）、appendix（详细数据附录，生成时）、total
         """
+        started = time.perf_counter()
+        timings = {"analysis": 0.0, "template": 0.0, "markdown": 0.0, "layout": 0.0, "write": 0.0}
         # 生成报告标题
         if title is None:
             platform = processed_results.get("platform_display", "未知平台")
@@ -48,12 +89,25 @@ class ReportGenerator:
             )
             title = f"{platform} - {keyword} 舆情分析"
 
-        # 获取统计数据
+        # 获取统计数据；JSON Lines 输入时 results 只含各情感前 N 条，全量汇总在 report_digest
         stats = processed_results.get("sentiment_statistics", {})
         results = processed_results.get("results", [])
-
-        # 格式化报告内容
-        report_content = self.template.get_default_template().format(
+        digest = processed_results.get("report_digest") or {}
+        time_buckets, topics = self._analyze(processed_results, results, digest)
+        # 同一份结果重复生成报告时只计入历史库一次
+        source_key = TrendStore.source_key(processed_results, time_buckets)
+        trend = self._update_trends(processed_results, time_buckets, source_key, results, digest)
+        keywords = self._update_topics(topics, source_key)
+        timings["analysis"] = time.perf_counter() - started
+
+        # 格式化报告内容：Markdown 与 HTML 由同一份结构化数据分别渲染，PDF 不再经 Markdown 转换
+        stage = time.perf_counter()
+        topic_titles = digest.get("key_topic_titles")
+        if topic_titles is None:
+            topic_titles = [item.get("title", "") for item in results[:10] if item.get("title")]
+        # 一遍遍历按情感选出前 N 条
+        content = select_top_items(results, rank_by=self.rank_by)
+        fields = dict(
             title=title,
             sentiment_summary=self.template.format_sentiment_summary(stats),
             total_count=stats.get("total_count", 0),
@@ -61,30 +115,61 @@ class ReportGenerator:
             negative_ratio=stats.get("negative_ratio", 0) * 100,
             neutral_ratio=stats.get("neutral_ratio", 0) * 100,
             average_score=stats.get("average_score", 0.0),
+            report_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            data_sources=", ".join(processed_results.get("data_sources", [processed_results.get("platform_display", "未知平台")]))
+        )
+        engagement = self._format_engagement_analysis(
+            results, totals=digest.get("engagement"), count=digest.get("total_count")
+        )
+        conclusion = self._format_conclusion(processed_results, stats)
+        recommendations = self._format_recommendations(processed_results, stats)
+        data_appendix = self._format_data_appendix(stats)
+        raw_data_stats = self._format_raw_data_stats(processed_results)
+
+        report_content = self.template.render_report(
+            **fields,
             platform_summary=self.template.format_platform_summary(processed_results),
             data_source_table=self.template.format_data_source_table(processed_results),
             sentiment_distribution_table=self.template.format_sentiment_distribution_table(stats),
-            time_distribution=self._format_time_distribution(results),
-            positive_content=self.template.format_content_section(results, "正面"),
-            negative_content=self.template.format_content_section(results, "负面"),
-            neutral_content=self.template.format_content_section(results, "中性"),
-            trend_analysis=self._format_trend_analysis(stats),
-            key_topics=self._format_key_topics(results),
-            engagement_analysis=self._format_engagement_analysis(results),
-            conclusion=self._format_conclusion(processed_results, stats),
-            recommendations=self._format_recommendations(processed_results, stats),
-            data_appendix=self._format_data_appendix(stats),
-            raw_data_stats=self._format_raw_data_stats(processed_results),
-            report_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            data_sources=", ".join(processed_results.get("data_sources", [processed_results.get("platform_display", "未知平台")]))
+            time_distribution=self._format_time_distribution(time_buckets),
+            positive_content=self.template.render_content_items(content["正面"], "正面"),
+            negative_content=self.template.render_content_items(content["负面"], "负面"),
+            neutral_content=self.template.render_content_items(content["中性"], "中性"),
+            trend_analysis=self._format_trend_analysis(stats, trend),
+            key_topics=self._format_key_topics(results, keywords, topics.get("clusters"), titles=topic_titles),
+            engagement_analysis=engagement,
+            conclusion=conclusion,
+            recommendations=recommendations,
+            data_appendix=data_appendix,
+            raw_data_stats=raw_data_stats,
+        )
+        html_fields = {k: HtmlReportTemplate.escape(v) if isinstance(v, str) else v for k, v in fields.items()}
+        html_body = HtmlReportTemplate.render_report(
+            **html_fields,
+            platform_summary=HtmlReportTemplate.platform_summary(processed_results),
+            data_source_table=HtmlReportTemplate.data_source_table(processed_results),
+            sentiment_distribution_table=HtmlReportTemplate.sentiment_distribution_table(stats),
+            time_distribution=HtmlReportTemplate.time_distribution(time_buckets, TIME_DISTRIBUTION_DAYS),
+            positive_content=HtmlReportTemplate.content_items(content["正面"], "正面"),
+            negative_content=HtmlReportTemplate.content_items(content["负面"], "负面"),
+            neutral_content=HtmlReportTemplate.content_items(content["中性"], "中性"),
+            trend_analysis=HtmlReportTemplate.trend_analysis(stats, self._trend_summary(stats), trend),
+            key_topics=HtmlReportTemplate.key_topics(keywords, topics.get("clusters"), topic_titles, TOPIC_CLUSTERS),
+            engagement_analysis=render_text(engagement),
+            conclusion=render_text(conclusion),
+            recommendations=render_text(recommendations),
+            data_appendix=render_text(data_appendix),
+            raw_data_stats=render_text(raw_data_stats),
         )
+        timings["template"] = time.perf_counter() - stage
 
         # 保存报告
+        stage = time.perf_counter()
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         platform = processed_results.get("platform", "unknown")
         safe_title = "".join(c for c in title if c.isalnum() or c in (" ", "-", "_"))[:50]
-        filename = f"{platform}_{safe_title}_{timestamp}.md"
-        filepath = self.output_dir / filename
+        filepath = self._reserve_report_path(f"{platform}_{safe_title}_{timestamp}")
+        filename = filepath.name
 
         # 保存Markdown报告
         with open(filepath, "w", encoding="utf-8") as f:
@@ -95,12 +180,22 @@ class ReportGenerator:
         json_filepath = self.output_dir / json_filename
         with open(json_filepath, "w", encoding="utf-8") as f:
             json.dump(processed_results, f, ensure_ascii=False, indent=2)
+        timings["write"] = time.perf_counter() - stage
 
-        # 尝试生成 PDF（图文并茂）
+        # 尝试生成 PDF（图文并茂）；排版与写出耗时由 export_to_pdf 计入 timings
         pdf_path = None
         try:
             from .pdf_export import export_to_pdf, is_pdf_available
             if is_pdf_available():
+                # 图表按数据哈希缓存，批量报告聚合相同时直接复用
+                stage = time.perf_counter()
+                charts = report_charts(
+                    stats,
+                    trend=trend,
+                    time_buckets=time_buckets,
+                    engagement_bins=digest.get("engagement_bins") or engagement_histogram(results),
+                )
+                timings["charts"] = time.perf_counter() - stage
                 pdf_filename = filename.replace(".md", ".pdf")
                 pdf_filepath = self.output_dir / pdf_filename
                 pdf_path = export_to_pdf(
@@ -108,15 +203,28 @@ class ReportGenerator:
                     pdf_filepath,
                     title=title,
                     processed_results=processed_results,
+                    trend=trend,
+                    html_body=html_body,
+                    timings=timings,
+                    charts=charts,
                 )
                 if pdf_path:
                     print(f"   PDF: {pdf_path}")
         except Exception as e:
             print(f"   PDF 生成跳过: {e}")
 
+        appendix_path = None
+        if self.detail_appendix:
+            stage = time.perf_counter()
+            appendix_path = self.write_detail_appendix(processed_results, filepath, title=title)
+            timings["appendix"] = time.perf_counter() - stage
+        timings["total"] = time.perf_counter() - started
+
         print(f"✅ 报告已生成:")
         print(f"   Markdown: {filepath}")
         print(f"   JSON数据: {json_filepath}")
+        if appendix_path:
+            print(f"   详细附录: {appendix_path}")
 
         result = {
             "success": True,
@@ -124,33 +232,215 @@ class ReportGenerator:
             "markdown_path": str(filepath),
             "json_path": str(json_filepath),
             "content": report_content,
-            "statistics": stats
+            "statistics": stats,
+            "trend": trend,
+            "topics": {"keywords": keywords, "clusters": topics.get("clusters", [])[:TOPIC_CLUSTERS]},
+            "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
         }
         if pdf_path:
             result["pdf_path"] = str(pdf_path)
             result["html_path"] = str(Path(pdf_path).with_suffix(".html"))
+        if appendix_path:
+            result["appendix_path"] = str(appendix_path)
         return result
 
-    def _format_time_distribution(self, results: List[Dict[str, Any]]) -> str:
-        """格式化时间分布"""
-        if not results:
+    def write_detail_appendix(
+        self, processed_results: Dict[str, Any], report_path: Union[str, Path], title: str = ""
+    ) -> Path:
+        """
+        为已生成的报告补写详细数据附录（与报告同名、后缀 _appendix.md），可在报告生成后按需调用
+
+        Args:
+            processed_results: 生成报告所用的 processed 字典（JSON Lines 摘要会重读 source_path 原文件）
+            report_path: Markdown 报告路径
+            title: 报告标题
+
+        Returns:
+            附录文件路径
+        """
+        report_path = Path(report_path)
+        appendix_path = report_path.with_name(f"{report_path.stem}_appendix.md")
+        write_detail_appendix(processed_results, appendix_path, title=title)
+        return appendix_path
+
+    def _analyze(
+        self, processed_results: Dict[str, Any], results: List[Dict[str, Any]], digest: Dict[str, Any]
+    ) -> Tuple[TimeBuckets, Dict[str, Any]]:
+        """
+        时间桶与话题摘要：JSON Lines 输入直接取流式摘要中的结果；完整条目按内容哈希缓存，
+        同一份数据换标题或重复出报告时不再重新分词、聚类
+
+        Returns:
+            (时间桶聚合, 话题摘要)
+        """
+        if digest.get("time_buckets") and digest.get("topics"):
+            return TimeBuckets.from_dict(digest["time_buckets"]), digest["topics"]
+
+        def analyze():
+            return (
+                TimeBuckets.from_items(results, processed_results),
+                TopicExtractor.from_items(results).snapshot(),
+            )
+
+        reference = {k: processed_results.get(k) for k in ("platform", "keyword", "keywords", "crawl_time", "processed_time")}
+        return section_cache.get_or_render("analysis", content_hash(reference, results), analyze)
+
+    def _reserve_report_path(self, stem: str) -> Path:
+        """
+        占用一个不重名的 Markdown 报告路径：同一秒内生成同名报告（批量生成）时追加序号。
+        以独占方式创建文件，多个进程并发生成时也不会互相覆盖。
+
+        Args:
+            stem: 不含扩展名的文件名
+
+        Returns:
+            已创建（空）的 Markdown 文件路径
+        """
+        n = 1
+        while True:
+            filepath = self.output_dir / (f"{stem}.md" if n == 1 else f"{stem}_{n}.md")
+            try:
+                with open(filepath, "x", encoding="utf-8"):
+                    return filepath
+            except FileExistsError:
+                n += 1
+
+    def generate_batch(
+        self,
+        inputs: List[Union[str, Path, Dict[str, Any]]],
+        titles: Optional[List[Optional[str]]] = None,
+        workers: Optional[int] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量生成报告，输出到本生成器的目录，参见 generate_reports_batch
+        """
+        return generate_reports_batch(
+            inputs, output_dir=str(self.output_dir), titles=titles, workers=workers, on_result=on_result,
+            trend_db=self.trend_db, record_trends=self.record_trends,
+            rank_by=self.rank_by, detail_appendix=self.detail_appendix,
+        )
+
+    def _update_trends(
+        self,
+        processed_results: Dict[str, Any],
+        time_buckets: TimeBuckets,
+        source_key: str,
+        results: List[Dict[str, Any]],
+        digest: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        将本次结果的时间桶累加到趋势库（同一份结果只计入一次，已计入的条目不重复累加），并读取同关键词的按天趋势
+
+        Args:
+            processed_results: 处理后的舆情数据
+            time_buckets: 本次结果的时间桶聚合
+            source_key: 本次结果的唯一键
+            results: 完整条目（JSON Lines 摘要时只含前 N 条）
+            digest: 流式摘要（report_digest），完整 JSON 输入时为空；摘要的逐条去重行重读 source_path 原文件生成
+
+        Returns:
+            最近 TREND_DAYS 天的按天序列；未启用或趋势库不可用时为空列表
+        """
+        if not self.record_trends:
+            return []
+        keywords = processed_results.get("keywords") or (
+            [processed_results["keyword"]] if processed_results.get("keyword") else None
+        )
+        try:
+            store = TrendStore(self.trend_db)
+        except Exception as e:
+            print(f"⚠️ 趋势库不可用，跳过趋势记录: {e}")
+            return []
+        try:
+            if len(time_buckets):
+                items = None
+                if not digest:
+                    items = time_buckets.item_rows(results)
+                elif _readable_jsonl(processed_results.get("source_path")):
+                    # 摘要中的 results 只有前 N 条：流式重读原文件逐条去重，不在内存中保留全部条目
+                    items = time_buckets.item_rows(iter_detail_items(processed_results))
+                store.ingest(time_buckets, source_key, items)
+            return store.series("day", keywords=keywords, limit=TREND_DAYS)
+        except Exception as e:
+            print(f"⚠️ 趋势记录失败: {e}")
+            return []
+        finally:
+            store.close()
+
+    def _update_topics(self, topics: Dict[str, Any], source_key: str) -> List[Dict[str, Any]]:
+        """
+        按 TF-IDF 选出本次关键词（IDF 含历史累计），并将本次文档频率累加到话题 IDF 库
+
+        Args:
+            topics: 话题摘要（TopicExtractor.snapshot() 的结果）
+            source_key: 本次结果的唯一键
+
+        Returns:
+            关键词列表 [{"term", "score", "documents"}, ...]
+        """
+        if not self.record_trends:
+            return rank_keywords(topics, top_k=TOPIC_KEYWORDS)
+        try:
+            store = TopicStore(self.topic_db)
+        except Exception as e:
+            print(f"⚠️ 话题库不可用，仅按本次数据计算关键词: {e}")
+            return rank_keywords(topics, top_k=TOPIC_KEYWORDS)
+        try:
+            keywords = rank_keywords(topics, store, top_k=TOPIC_KEYWORDS)
+            if topics.get("documents"):
+                store.ingest(topics, source_key)
+            return keywords
+        except Exception as e:
+            print(f"⚠️ 话题库更新失败: {e}")
+            return rank_keywords(topics, top_k=TOPIC_KEYWORDS)
+        finally:
+            store.close()
+
+    @cached_section("time_distribution", method=True)
+    def _format_time_distribution(self, time_buckets: TimeBuckets) -> str:
+        """格式化时间分布：发布时间范围、按天的条数与情感、最集中的时段"""
+        daily = time_buckets.series("day")
+        total = sum(day["total_count"] for day in daily)
+        if not total:
             return "暂无时间数据。"
 
-        # 简单的时间分布统计
-        return f"共收集 {len(results)} 条内容，时间范围: 待分析"
+        lines = []
+        if time_buckets.first and time_buckets.last:
+            lines.append(
+                f"共收集 {total} 条内容，发布时间范围: "
+                f"{time_buckets.first:%Y-%m-%d %H:%M} ~ {time_buckets.last:%Y-%m-%d %H:%M}"
+            )
+        else:
+            lines.append(f"共收集 {total} 条内容，均无发布时间")
+        if time_buckets.undated:
+            lines.append(f"（其中 {time_buckets.undated} 条无发布时间，按爬取时间计入）")
+
+        hourly = time_buckets.series("hour")
+        if len(hourly) > 1:
+            peak = max(hourly, key=lambda h: h["total_count"])
+            lines.append(f"\n发布最集中的时段: {peak['bucket']}（{peak['total_count']} 条）")
+
+        if len(daily) > 1:
+            shown = daily[-TIME_DISTRIBUTION_DAYS:]
+            if len(shown) < len(daily):
+                lines.append(f"\n按天分布（最近 {len(shown)} 天）:")
+            lines.append("\n| 日期 | 条数 | 正面 | 负面 | 中性 | 平均情感分数 |")
+            lines.append("|------|------|------|------|------|--------------|")
+            for day in shown:
+                lines.append(
+                    f"| {day['bucket']} | {day['total_count']} | {day['positive_count']} | "
+                    f"{day['negative_count']} | {day['neutral_count']} | {day['average_score']:.2f} |"
+                )
+        return "\n".join(lines)
 
-    def _format_trend_analysis(self, stats: Dict[str, Any]) -> str:
-        """格式化趋势分析"""
+    @cached_section("trend_analysis", method=True)
+    def _format_trend_analysis(self, stats: Dict[str, Any], trend: Optional[List[Dict[str, Any]]] = None) -> str:
+        """格式化趋势分析：本次整体倾向，以及趋势库中跨运行的按天走势"""
         avg_score = stats.get("average_score", 0.0)
         positive_ratio = stats.get("positive_ratio", 0.0)
         negative_ratio = stats.get("negative_ratio", 0.0)
-
-        if avg_score > 0.3:
-            trend = "整体舆情趋势偏向正面，用户反馈较为积极。"
-        elif avg_score < -0.3:
-            trend = "整体舆情趋势偏向负面，需要关注用户反馈中的问题。"
-        else:
-            trend = "整体舆情趋势较为中性，用户反馈相对平衡。"
+        summary = self._trend_summary(stats)
 
         return f"""
 根据情感分析结果：
@@ -158,37 +448,103 @@ class ReportGenerator:
 - 正面内容占比: {positive_ratio*100:.1f}%
 - 负面内容占比: {negative_ratio*100:.1f}%
 
-{trend}
-"""
+{summary}
+{self._format_trend_series(trend)}"""
 
-    def _format_key_topics(self, results: List[Dict[str, Any]]) -> str:
-        """格式化关键话题"""
-        if not results:
-            return "暂无话题数据。"
+    @staticmethod
+    def _trend_summary(stats: Dict[str, Any]) -> str:
+        """按平均情感分数给出的整体倾向"""
+        avg_score = stats.get("average_score", 0.0)
+        if avg_score > 0.3:
+            return "整体舆情趋势偏向正面，用户反馈较为积极。"
+        if avg_score < -0.3:
+            return "整体舆情趋势偏向负面，需要关注用户反馈中的问题。"
+        return "整体舆情趋势较为中性，用户反馈相对平衡。"
+
+    def _format_trend_series(self, trend: Optional[List[Dict[str, Any]]]) -> str:
+        """跨运行按天走势表（含条数条形图）；不足两天时不展示"""
+        if not trend or len(trend) < 2:
+            return ""
+        peak = max(day["total_count"] for day in trend) or 1
+        lines = [
+            f"**跨运行趋势（最近 {len(trend)} 天）**",
+            "",
+            "| 日期 | 条数 | 平均情感分数 | 负面占比 | 声量 |",
+            "|------|------|--------------|----------|------|",
+        ]
+        for day in trend:
+            bar = "█" * max(1, round(10 * day["total_count"] / peak))
+            lines.append(
+                f"| {day['bucket']} | {day['total_count']} | {day['average_score']:.2f} | "
+                f"{day['negative_ratio']*100:.1f}% | {bar} |"
+            )
 
-        # 简单提取标题作为话题
-        topics = [item.get("title", "") for item in results[:10] if item.get("title")]
-        if topics:
-            topics_str = "\n".join([f"- {topic}" for topic in topics[:5]])
+        lines.append("\n" + describe_latest_change(trend))
+        return "\n" + "\n".join(lines) + "\n"
+
+    @cached_section(
+        "key_topics",
+        method=True,
+        key=lambda results, keywords=None, clusters=None, titles=None: (
+            [item.get("title") for item in results[:10]] if titles is None else titles, keywords, clusters
+        ),
+    )
+    def _format_key_topics(
+        self,
+        results: List[Dict[str, Any]],
+        keywords: Optional[List[Dict[str, Any]]] = None,
+        clusters: Optional[List[Dict[str, Any]]] = None,
+        titles: Optional[List[str]] = None
+    ) -> str:
+        """格式化关键话题：TF-IDF 高频关键词与相似标题聚类；均无时回退为前几条标题"""
+        sections = []
+        if keywords:
+            rows = "\n".join(
+                f"| {kw['term']} | {kw['score']:.1f} | {kw['documents']} |" for kw in keywords
+            )
+            sections.append(
+                "**高频关键词**（TF-IDF，权重为每千词出现次数 × IDF）：\n\n| 关键词 | 权重 | 出现条数 |\n|--------|------|----------|\n" + rows
+            )
+        if clusters:
+            lines = "\n".join(
+                f"{i}. {cluster['title']} —— {cluster['size']} 条相似内容"
+                for i, cluster in enumerate(clusters[:TOPIC_CLUSTERS], 1)
+            )
+            sections.append(f"**热点话题**（相似标题聚类）：\n\n{lines}")
+        if sections:
+            return "\n\n".join(sections)
+
+        if titles is None:
+            titles = [item.get("title", "") for item in results[:10] if item.get("title")]
+        if titles:
+            topics_str = "\n".join([f"- {topic}" for topic in titles[:5]])
             return f"主要话题包括：\n{topics_str}"
-        else:
-            return "暂无话题数据。"
+        return "暂无话题数据。"
 
-    def _format_engagement_analysis(self, results: List[Dict[str, Any]]) -> str:
-        """格式化参与度分析"""
-        if not results:
+    def _format_engagement_analysis(
+        self,
+        results: List[Dict[str, Any]],
+        totals: Optional[Dict[str, int]] = None,
+        count: Optional[int] = None
+    ) -> str:
+        """格式化参与度分析（totals/count 为流式摘要中已汇总的互动数与条数）"""
+        count = len(results) if count is None else count
+        if not count:
             return "暂无参与度数据。"
 
         # 统计点赞、转发、评论
-        total_likes = sum(item.get("likes", 0) or 0 for item in results)
-        total_shares = sum(item.get("shares", 0) or 0 for item in results)
-        total_comments = sum(item.get("comments", 0) or 0 for item in results)
+        if totals is not None:
+            total_likes, total_shares, total_comments = totals["likes"], totals["shares"], totals["comments"]
+        else:
+            total_likes = sum(item.get("likes", 0) or 0 for item in results)
+            total_shares = sum(item.get("shares", 0) or 0 for item in results)
+            total_comments = sum(item.get("comments", 0) or 0 for item in results)
 
         return f"""
 - 总点赞数: {total_likes}
 - 总转发数: {total_shares}
 - 总评论数: {total_comments}
-- 平均互动数: {(total_likes + total_shares + total_comments) / len(results):.1f}
+- 平均互动数: {(total_likes + total_shares + total_comments) / count:.1f}
 """
 
     def _format_conclusion(
@@ -251,3 +607,147 @@ class ReportGenerator:
 - 爬取时间: {crawl_time}
 - 处理时间: {processed_time}
 """
+
+
+def _readable_jsonl(path: Optional[str]) -> bool:
+    """摘要的原 JSON Lines 文件是否仍可重读（缺失时趋势库按整份时间桶累加）"""
+    return bool(path) and is_processed_jsonl(path) and Path(path).exists()
+
+
+def _batch_worker(
+    source: Union[str, Path, Dict[str, Any]],
+    output_dir: str,
+    title: Optional[str],
+    trend_db: Optional[str] = None,
+    record_trends: bool = False,
+    rank_by: str = "confidence",
+    detail_appendix: bool = False
+) -> Dict[str, Any]:
+    """
+    批量生成的工作函数（在子进程中运行）：读取 processed 文件并生成一份报告。
+    Markdown/JSON 在 PDF 之前落盘；返回值不含报告正文，减少进程间传输。
+    """
+    label = str(source) if not isinstance(source, dict) else (source.get("platform_display") or "inline")
+    try:
+        processed_results = source if isinstance(source, dict) else load_processed(str(source), rank_by=rank_by)
+        generator = ReportGenerator(
+            output_dir=output_dir, trend_db=trend_db, record_trends=record_trends,
+            rank_by=rank_by, detail_appendix=detail_appendix,
+        )
+        result = generator.generate_report(processed_results, title=title)
+    except Exception as e:
+        return {"success": False, "input": label, "error": f"{type(e).__name__}: {e}"}
+    result.pop("content", None)
+    result["input"] = label
+    return result
+
+
+def _batch_jobs(inputs, titles) -> List[tuple]:
+    if titles is not None and len(titles) != len(inputs):
+        raise ValueError("titles 数量须与 inputs 一致")
+    return [(src, titles[i] if titles else None) for i, src in enumerate(inputs)]
+
+
+def generate_reports_batch(
+    inputs: List[Union[str, Path, Dict[str, Any]]],
+    output_dir: str = "output",
+    titles: Optional[List[Optional[str]]] = None,
+    workers: Optional[int] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    trend_db: Optional[str] = None,
+    record_trends: bool = False,
+    rank_by: str = "confidence",
+    detail_appendix: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    用进程池批量生成报告：每份报告（含 CPU 密集的 PDF 排版）在独立进程中生成，
+    各自的 Markdown/JSON 一生成即写入，单份失败不影响其余报告。
+
+    Args:
+        inputs: processed 结果文件路径或已加载的字典列表
+        output_dir: 报告输出目录
+        titles: 与 inputs 一一对应的报告标题，可选
+        workers: 进程数，默认 CPU 核数；为 1 时在当前进程内依次生成
+        on_result: 每份报告完成时的回调（按完成顺序调用）
+        trend_db: 趋势库路径，参见 ReportGenerator
+        record_trends: 是否记录并展示跨运行趋势，默认否
+        rank_by: 各情感章节展示条目的排序依据，参见 ReportGenerator
+        detail_appendix: 是否生成详细数据附录
+
+    Returns:
+        与 inputs 顺序一致的结果列表，失败项为 {"success": False, "input": ..., "error": ...}
+    """
+    jobs = _batch_jobs(inputs, titles)
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) if jobs else 1
+    results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+
+    if workers <= 1:
+        for i, (src, title) in enumerate(jobs):
+            results[i] = _batch_worker(src, output_dir, title, trend_db, record_trends, rank_by, detail_appendix)
+            if on_result:
+                on_result(results[i])
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                _batch_worker, src, output_dir, title, trend_db, record_trends, rank_by, detail_appendix
+            ): i
+            for i, (src, title) in enumerate(jobs)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                # 子进程异常退出（如被系统杀掉）
+                results[i] = {"success": False, "input": str(jobs[i][0]), "error": f"{type(e).__name__}: {e}"}
+            if on_result:
+                on_result(results[i])
+    return results
+
+
+async def generate_reports_batch_async(
+    inputs: List[Union[str, Path, Dict[str, Any]]],
+    output_dir: str = "output",
+    titles: Optional[List[Optional[str]]] = None,
+    workers: Optional[int] = None,
+    trend_db: Optional[str] = None,
+    record_trends: bool = False,
+    rank_by: str = "confidence",
+    detail_appendix: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    generate_reports_batch 的异步版本：在进程池中生成，不阻塞事件循环（如爬取结束后在常驻进程中出报告）
+
+    Args:
+        inputs: processed 结果文件路径或已加载的字典列表
+        output_dir: 报告输出目录
+        titles: 与 inputs 一一对应的报告标题，可选
+        workers: 进程数，默认 CPU 核数
+        trend_db: 趋势库路径，参见 ReportGenerator
+        record_trends: 是否记录并展示跨运行趋势，默认否
+        rank_by: 各情感章节展示条目的排序依据，参见 ReportGenerator
+        detail_appendix: 是否生成详细数据附录
+
+    Returns:
+        与 inputs 顺序一致的结果列表
+    """
+    jobs = _batch_jobs(inputs, titles)
+    if not jobs:
+        return []
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    pool = ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(jobs)))
+    try:
+        return list(await asyncio.gather(*[
+            loop.run_in_executor(
+                pool, _batch_worker, src, output_dir, title, trend_db, record_trends, rank_by, detail_appendix
+            )
+            for src, title in jobs
+        ]))
+    finally:
+        # 等待工作进程退出，避免遗留子进程；被取消或出错时丢弃尚未开始的任务。
+        # shutdown(wait=True) 会阻塞，放到默认线程池中执行，不占用事件循环
+        await loop.run_in_executor(None, functools.partial(pool.shutdown, wait=True, cancel_futures=True))
@@ -0,0 +1,320 @@
+"""
+HTML 报告渲染
+直接由结构化数据（统计、选出的内容条目、时间桶、趋势、关键词）渲染 HTML 正文，与 Markdown 报告并行生成，
+PDF 导出不再需要把 Markdown 重新解析为 HTML。章节结构与 ReportTemplate 的 Markdown 模板一一对应。
+"""
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from .templates import CompiledReportTemplate, ReportTemplate, cached_section
+from .trends import TimeBuckets, describe_latest_change
+
+_HTML_TEMPLATE = """<h1>【舆情分析报告】{title}</h1>
+<h2>执行摘要</h2>
+<h3>核心舆情发现</h3>
+<ul>
+<li><strong>主要情感倾向</strong>: {sentiment_summary}</li>
+<li><strong>关键数据指标</strong>:<ul>
+<li>总内容数: {total_count}</li>
+<li>正面比例: {positive_ratio}%</li>
+<li>负面比例: {negative_ratio}%</li>
+<li>中性比例: {neutral_ratio}%</li>
+<li>平均情感分数: {average_score}</li>
+</ul></li>
+</ul>
+<h3>平台分布概览</h3>
+{platform_summary}
+<h2>一、数据概览</h2>
+<h3>1.1 数据来源统计</h3>
+{data_source_table}
+<h3>1.2 情感分布详情</h3>
+{sentiment_distribution_table}
+<h3>1.3 时间分布分析</h3>
+{time_distribution}
+<h2>二、舆情内容分析</h2>
+<h3>2.1 正面声音</h3>
+{positive_content}
+<h3>2.2 负面声音</h3>
+{negative_content}
+<h3>2.3 中性观点</h3>
+{neutral_content}
+<h2>三、深度洞察</h2>
+<h3>3.1 舆情趋势分析</h3>
+{trend_analysis}
+<h3>3.2 关键话题识别</h3>
+{key_topics}
+<h3>3.3 用户参与度分析</h3>
+{engagement_analysis}
+<h2>四、结论与建议</h2>
+<h3>4.1 舆情总结</h3>
+{conclusion}
+<h3>4.2 应对建议</h3>
+{recommendations}
+<h2>数据附录</h2>
+<h3>关键数据汇总</h3>
+{data_appendix}
+<h3>原始数据统计</h3>
+{raw_data_stats}
+<hr/>
+<p><em>报告生成时间: {report_time}</em><br/>
+<em>数据来源: {data_sources}</em></p>
+"""
+
+_COMPILED = CompiledReportTemplate(_HTML_TEMPLATE)
+
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+_BULLET_RE = re.compile(r"^\s*[-*]\s+(.*)$")
+_NUMBERED_RE = re.compile(r"^\s*\d+[.、]\s*(.*)$")
+_HEADING_RE = re.compile(r"^\s*#{1,6}\s+(.*)$")
+
+
+def escape(value: Any) -> str:
+    """转义 HTML 特殊字符"""
+    return (
+        str(value)
+        .replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&quot;")
+    )
+
+
+def _inline(text: str) -> str:
+    """转义并保留 **加粗**"""
+    return _BOLD_RE.sub(r"<strong>\1</strong>", escape(text))
+
+
+def render_list(items: Sequence[str], ordered: bool = False) -> str:
+    """渲染列表（条目为纯文本，支持 **加粗**）"""
+    tag = "ol" if ordered else "ul"
+    return f"<{tag}>" + "".join(f"<li>{_inline(item)}</li>" for item in items) + f"</{tag}>"
+
+
+def render_table(headers: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    """渲染表格"""
+    head = "".join(f"<th>{escape(h)}</th>" for h in headers)
+    body = "".join("<tr>" + "".join(f"<td>{escape(c)}</td>" for c in row) + "</tr>" for row in rows)
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def render_text(text: str) -> str:
+    """
+    渲染主 Agent 撰写的自由文本（总结、建议）：只处理其中常见的段落、列表、小标题与加粗，
+    不做完整 Markdown 解析；单个换行保留为 <br/>
+
+    Args:
+        text: 文本
+
+    Returns:
+        HTML 片段
+    """
+    html: List[str] = []
+    paragraph: List[str] = []
+    items: List[str] = []
+    list_tag = ""
+
+    def flush_paragraph():
+        if paragraph:
+            html.append("<p>" + "<br/>".join(_inline(line) for line in paragraph) + "</p>")
+            paragraph.clear()
+
+    def flush_list():
+        nonlocal list_tag
+        if items:
+            html.append(f"<{list_tag}>" + "".join(f"<li>{_inline(i)}</li>" for i in items) + f"</{list_tag}>")
+            items.clear()
+        list_tag = ""
+
+    for line in (text or "").splitlines():
+        if not line.strip():
+            flush_paragraph()
+            flush_list()
+            continue
+        for pattern, tag in ((_BULLET_RE, "ul"), (_NUMBERED_RE, "ol")):
+            match = pattern.match(line)
+            if match:
+                flush_paragraph()
+                if list_tag != tag:
+                    flush_list()
+                    list_tag = tag
+                items.append(match.group(1))
+                break
+        else:
+            heading = _HEADING_RE.match(line)
+            if heading:
+                flush_paragraph()
+                flush_list()
+                html.append(f"<h4>{_inline(heading.group(1))}</h4>")
+            elif items:
+                # 列表项的续行
+                items[-1] += " " + line.strip()
+            else:
+                paragraph.append(line.strip())
+    flush_paragraph()
+    flush_list()
+    return "".join(html)
+
+
+class HtmlReportTemplate:
+    """各章节的 HTML 渲染（输入与 ReportTemplate / ReportGenerator 的 Markdown 章节相同）"""
+
+    escape = staticmethod(escape)
+
+    @staticmethod
+    def render_report(**fields: Any) -> str:
+        """用预编译的 HTML 模板渲染报告正文（不含 <html> 包装）"""
+        return _COMPILED.render(**fields)
+
+    @staticmethod
+    def platform_summary(results: Dict[str, Any]) -> str:
+        data_sources = results.get("data_sources")
+        if data_sources and isinstance(data_sources, list):
+            sources_str = "、".join(data_sources)
+        else:
+            sources_str = results.get("platform_display", "未知平台")
+        sub_items = []
+        for info in (results.get("platform_results") or {}).values():
+            name = escape(info.get("platform_display", "未知平台"))
+            if info.get("success"):
+                sub_items.append(f"<li>{name}: {info.get('total_count', 0)} 条</li>")
+            else:
+                sub_items.append(f"<li>{name}: 爬取失败（{escape(info.get('error') or '未知错误')}）</li>")
+        nested = f"<ul>{''.join(sub_items)}</ul>" if sub_items else ""
+        return (
+            f"<ul><li><strong>数据来源</strong>: {escape(sources_str)}</li>"
+            f"<li><strong>总条数</strong>: {results.get('total_count', 0)} 条{nested}</li></ul>"
+        )
+
+    @staticmethod
+    def data_source_table(results: Dict[str, Any]) -> str:
+        data_sources = results.get("data_sources")
+        if data_sources and isinstance(data_sources, list):
+            platform = "、".join(data_sources)
+        else:
+            platform = results.get("platform_display", "未知平台")
+        keyword = results.get("keyword", "") or ", ".join(results.get("keywords", []))
+        platform_results = results.get("platform_results")
+        if platform_results:
+            breakdown = results.get("sentiment_statistics", {}).get("platform_breakdown", {})
+            rows = []
+            for info in platform_results.values():
+                name = info.get("platform_display", "未知平台")
+                score = breakdown.get(name, {}).get("average_score")
+                rows.append((
+                    name, keyword, info.get("total_count", 0),
+                    "成功" if info.get("success") else "失败",
+                    f"{score:.2f}" if score is not None else "-",
+                ))
+            return render_table(("平台/来源", "关键词", "内容数量", "状态", "平均情感分数"), rows)
+        return render_table(("平台/来源", "关键词", "内容数量"), [(platform, keyword, results.get("total_count", 0))])
+
+    @staticmethod
+    def sentiment_distribution_table(stats: Dict[str, Any]) -> str:
+        total = stats.get("total_count", 0)
+        rows = [
+            (label, count, f"{(count / total * 100) if total > 0 else 0:.1f}%")
+            for label, count in stats.get("sentiment_distribution", {}).items()
+        ]
+        return render_table(("情感类型", "数量", "比例"), rows)
+
+    @staticmethod
+    @cached_section("html_content_items")
+    def content_items(items: List[Dict[str, Any]], sentiment_type: str) -> str:
+        """已选出的内容条目（选取规则见 ReportTemplate.select_content）"""
+        if not items:
+            return f"<p>暂无{escape(sentiment_type)}内容。</p>"
+        parts = []
+        for i, item in enumerate(items, 1):
+            title = item.get("title", "无标题")
+            author = item.get("author") or item.get("source") or "未知作者"
+            text, suffix = ReportTemplate.preview_text(item)
+            confidence = item.get("sentiment", {}).get("confidence", 0)
+            parts.append(
+                f"<p><strong>{i}. {escape(title)}</strong> —— @{escape(author)} (置信度: {confidence:.2f})</p>"
+                f"<blockquote>{escape(text)}{suffix}</blockquote>"
+            )
+        return "".join(parts)
+
+    @staticmethod
+    def time_distribution(time_buckets: TimeBuckets, max_days: int) -> str:
+        daily = time_buckets.series("day")
+        total = sum(day["total_count"] for day in daily)
+        if not total:
+            return "<p>暂无时间数据。</p>"
+        if time_buckets.first and time_buckets.last:
+            summary = (
+                f"共收集 {total} 条内容，发布时间范围: "
+                f"{time_buckets.first:%Y-%m-%d %H:%M} ~ {time_buckets.last:%Y-%m-%d %H:%M}"
+            )
+        else:
+            summary = f"共收集 {total} 条内容，均无发布时间"
+        if time_buckets.undated:
+            summary += f"<br/>（其中 {time_buckets.undated} 条无发布时间，按爬取时间计入）"
+        html = [f"<p>{summary}</p>"]
+        hourly = time_buckets.series("hour")
+        if len(hourly) > 1:
+            peak = max(hourly, key=lambda h: h["total_count"])
+            html.append(f"<p>发布最集中的时段: {escape(peak['bucket'])}（{peak['total_count']} 条）</p>")
+        if len(daily) > 1:
+            shown = daily[-max_days:]
+            if len(shown) < len(daily):
+                html.append(f"<p>按天分布（最近 {len(shown)} 天）:</p>")
+            html.append(render_table(
+                ("日期", "条数", "正面", "负面", "中性", "平均情感分数"),
+                [
+                    (d["bucket"], d["total_count"], d["positive_count"], d["negative_count"],
+                     d["neutral_count"], f"{d['average_score']:.2f}")
+                    for d in shown
+                ],
+            ))
+        return "".join(html)
+
+    @staticmethod
+    def trend_analysis(stats: Dict[str, Any], summary: str, trend: Optional[List[Dict[str, Any]]]) -> str:
+        html = [
+            "<p>根据情感分析结果：</p>",
+            render_list([
+                f"平均情感分数: {stats.get('average_score', 0.0):.2f}",
+                f"正面内容占比: {stats.get('positive_ratio', 0.0) * 100:.1f}%",
+                f"负面内容占比: {stats.get('negative_ratio', 0.0) * 100:.1f}%",
+            ]),
+            f"<p>{escape(summary)}</p>",
+        ]
+        if trend and len(trend) >= 2:
+            peak = max(day["total_count"] for day in trend) or 1
+            html.append(f"<p><strong>跨运行趋势（最近 {len(trend)} 天）</strong></p>")
+            html.append(render_table(
+                ("日期", "条数", "平均情感分数", "负面占比", "声量"),
+                [
+                    (d["bucket"], d["total_count"], f"{d['average_score']:.2f}",
+                     f"{d['negative_ratio'] * 100:.1f}%", "█" * max(1, round(10 * d["total_count"] / peak)))
+                    for d in trend
+                ],
+            ))
+            html.append(f"<p>{escape(describe_latest_change(trend))}</p>")
+        return "".join(html)
+
+    @staticmethod
+    def key_topics(
+        keywords: Optional[List[Dict[str, Any]]],
+        clusters: Optional[List[Dict[str, Any]]],
+        titles: List[str],
+        max_clusters: int,
+    ) -> str:
+        html = []
+        if keywords:
+            html.append("<p><strong>高频关键词</strong>（TF-IDF，权重为每千词出现次数 × IDF）：</p>")
+            html.append(render_table(
+                ("关键词", "权重", "出现条数"),
+                [(kw["term"], f"{kw['score']:.1f}", kw["documents"]) for kw in keywords],
+            ))
+        if clusters:
+            html.append("<p><strong>热点话题</strong>（相似标题聚类）：</p>")
+            html.append(render_list(
+                [f"{c['title']} —— {c['size']} 条相似内容" for c in clusters[:max_clusters]], ordered=True
+            ))
+        if html:
+            return "".join(html)
+        if titles:
+            return "<p>主要话题包括：</p>" + render_list(titles[:5])
+        return "<p>暂无话题数据。</p>"
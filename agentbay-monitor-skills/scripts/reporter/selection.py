@@ -0,0 +1,121 @@
+"""
+报告内容条目的选取
+对结果只遍历一遍：按情感标签分组，每组用容量为 N 的小顶堆保留得分最高的前 N 条，
+时间 O(条数 · log N)、内存 O(N)，不必对每种情感分别筛选并整体排序。
+"""
+import heapq
+import math
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sentiment.sentiment_stats import LABELS, normalize_label
+
+# 报告各情感章节展示的条数
+DEFAULT_TOP_N = 5
+
+# 排序依据：confidence 情感置信度（默认）；engagement 互动数（点赞+转发+评论）；
+# weighted 置信度 × (1 + ln(1 + 互动数))，兼顾判断可靠性与传播度
+RANK_BY = ("confidence", "engagement", "weighted")
+
+ENGAGEMENT_FIELDS = ("likes", "shares", "comments")
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def engagement_of(item: Dict[str, Any]) -> int:
+    """条目的互动数（点赞+转发+评论），非数值字段按 0 计"""
+    total = 0
+    for key in ENGAGEMENT_FIELDS:
+        try:
+            total += int(item.get(key) or 0)
+        except (TypeError, ValueError):
+            pass
+    return total
+
+
+def ranking_score(item: Dict[str, Any], rank_by: str = "confidence") -> float:
+    """
+    条目的排序得分
+
+    Args:
+        item: 含 sentiment 的结果条目
+        rank_by: 排序依据，见 RANK_BY
+
+    Returns:
+        得分，越大越靠前
+    """
+    if rank_by == "engagement":
+        return float(engagement_of(item))
+    confidence = _to_float((item.get("sentiment") or {}).get("confidence"))
+    if rank_by == "weighted":
+        return confidence * (1.0 + math.log1p(engagement_of(item)))
+    return confidence
+
+
+class TopKSelector:
+    """按情感标签分组的前 N 条选取器，可逐条 add（流式）或由列表一次生成"""
+
+    def __init__(self, top_n: int = DEFAULT_TOP_N, rank_by: str = "confidence"):
+        """
+        Args:
+            top_n: 每种情感保留的条数
+            rank_by: 排序依据，见 RANK_BY
+        """
+        if rank_by not in RANK_BY:
+            raise ValueError(f"未知的排序依据: {rank_by}（可选 {', '.join(RANK_BY)}）")
+        self.top_n = top_n
+        self.rank_by = rank_by
+        # 每种情感一个小顶堆：(得分, -序号, 条目)，保留得分最高、同分时靠前的 N 条
+        self._heaps: Dict[str, List[Tuple[float, int, Dict[str, Any]]]] = {label: [] for label in LABELS}
+        self._index = 0
+
+    @classmethod
+    def from_items(
+        cls, items: Iterable[Dict[str, Any]], top_n: int = DEFAULT_TOP_N, rank_by: str = "confidence"
+    ) -> "TopKSelector":
+        """遍历一遍条目生成选取结果"""
+        selector = cls(top_n, rank_by)
+        for item in items:
+            selector.add(item)
+        return selector
+
+    def add(self, item: Dict[str, Any]):
+        """追加一条结果；情感标签不在 LABELS 中的条目与统计一致，计入中性"""
+        self._index += 1
+        if self.top_n <= 0:
+            return
+        heap = self._heaps[normalize_label((item.get("sentiment") or {}).get("label"))]
+        entry = (ranking_score(item, self.rank_by), -self._index, item)
+        if len(heap) < self.top_n:
+            heapq.heappush(heap, entry)
+        elif entry[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, entry)
+
+    def top_items(self, label: str) -> List[Dict[str, Any]]:
+        """某情感得分最高的前 N 条（得分降序，同分保持原顺序）"""
+        return [item for _, _, item in sorted(self._heaps.get(label, []), key=lambda e: e[:2], reverse=True)]
+
+    def selections(self) -> Dict[str, List[Dict[str, Any]]]:
+        """各情感的前 N 条：{标签: 条目列表}"""
+        return {label: self.top_items(label) for label in LABELS}
+
+
+def select_top_items(
+    results: Iterable[Dict[str, Any]], top_n: int = DEFAULT_TOP_N, rank_by: str = "confidence"
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    一遍选出各情感的前 N 条
+
+    Args:
+        results: 结果条目
+        top_n: 每种情感保留的条数
+        rank_by: 排序依据，见 RANK_BY
+
+    Returns:
+        {标签: 条目列表}
+    """
+    return TopKSelector.from_items(results, top_n, rank_by).selections()
@@ -1,13 +1,146 @@
 """
 报告模板
-定义报告格式和结构
+定义报告格式和结构；默认模板预编译为字面量/占位符片段，各段落按输入内容哈希缓存渲染结果，
+同一份数据换标题重出报告或多次渲染时只拼接一次。
 """
-from typing import Dict, Any, List
+import functools
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Callable, Optional, Tuple
+
+from .selection import TopKSelector
+
+# 形如 {title} 的占位符
+_PLACEHOLDER_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+class CompiledReportTemplate:
+    """预编译的报告模板：拆分为字面量片段与占位符，渲染时只做一次拼接"""
+
+    def __init__(self, text: str):
+        """
+        Args:
+            text: 模板原文（str.format 风格的 {name} 占位符，不含格式说明）
+        """
+        self.parts: List[Tuple[bool, str]] = []  # (是否为占位符, 字面量或占位符名)
+        pos = 0
+        for match in _PLACEHOLDER_RE.finditer(text):
+            self.parts.append((False, text[pos:match.start()]))
+            self.parts.append((True, match.group(1)))
+            pos = match.end()
+        self.parts.append((False, text[pos:]))
+        self.placeholders = {value for is_field, value in self.parts if is_field}
+
+    def render(self, **values: Any) -> str:
+        """
+        按占位符取值拼接（与 str.format 结果一致）
+
+        Raises:
+            KeyError: 缺少占位符的取值
+        """
+        return "".join(format(values[value]) if is_field else value for is_field, value in self.parts)
+
+
+def content_hash(*inputs: Any) -> str:
+    """段落输入的内容哈希（JSON 序列化后取 SHA-1；带 to_dict() 的对象按其结果计算）"""
+    payload = json.dumps(
+        inputs,
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=lambda o: o.to_dict() if hasattr(o, "to_dict") else str(o),
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SectionCache:
+    """段落渲染缓存（LRU）：键为段落名 + 输入内容哈希"""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, name: str, key: str, render: Callable[[], Any]) -> Any:
+        """命中时直接返回缓存结果，否则调用 render() 并缓存"""
+        with self._lock:
+            if (name, key) in self._entries:
+                self._entries.move_to_end((name, key))
+                self.hits += 1
+                return self._entries[(name, key)]
+            self.misses += 1
+        value = render()
+        with self._lock:
+            self._entries[(name, key)] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """清空缓存与计数"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """命中/未命中次数与当前条目数"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+# 进程级段落缓存
+section_cache = SectionCache()
+
+
+def cached_section(name: str, method: bool = False, key: Optional[Callable[..., Any]] = None):
+    """
+    段落渲染函数的装饰器：按参数内容哈希记忆返回值
+
+    Args:
+        name: 段落名（缓存键前缀）
+        method: 被装饰的是实例方法时为 True（self 不参与哈希）
+        key: 从参数中取出真正影响渲染的输入（参数同被装饰函数，不含 self），默认使用全部参数；
+            参数含完整条目列表时应只取用到的字段，避免每次对全部条目做哈希
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            inputs = args[1:] if method else args
+            digest = content_hash(key(*inputs, **kwargs) if key else (inputs, kwargs))
+            return section_cache.get_or_render(name, digest, lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+_SOURCE_FIELDS = ("data_sources", "platform_display", "total_count", "platform_results", "keyword", "keywords")
+
+
+def _source_key(results: Dict[str, Any]) -> Any:
+    """数据来源类段落只依赖 processed 的来源字段与按平台统计"""
+    return (
+        {k: results.get(k) for k in _SOURCE_FIELDS},
+        (results.get("sentiment_statistics") or {}).get("platform_breakdown"),
+    )
 
 
 class ReportTemplate:
     """报告模板类"""
 
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def compiled(cls) -> CompiledReportTemplate:
+        """预编译的默认模板（每个进程只编译一次）"""
+        return CompiledReportTemplate(cls.get_default_template())
+
+    @classmethod
+    def render_report(cls, **fields: Any) -> str:
+        """用预编译的默认模板渲染整份报告（参数同 get_default_template().format）"""
+        return cls.compiled().render(**fields)
+
     @staticmethod
     def get_default_template() -> str:
         """获取默认报告模板"""
@@ -93,6 +226,7 @@ class ReportTemplate:
             return "整体偏向中性 😐"
 
     @staticmethod
+    @cached_section("platform_summary", key=_source_key)
     def format_platform_summary(results: Dict[str, Any]) -> str:
         """格式化平台摘要"""
         data_sources = results.get("data_sources")
@@ -101,9 +235,19 @@ class ReportTemplate:
         else:
             sources_str = results.get("platform_display", "未知平台")
         total = results.get("total_count", 0)
-        return f"- **数据来源**: {sources_str}\n- **总条数**: {total} 条"
+        summary = f"- **数据来源**: {sources_str}\n- **总条数**: {total} 条"
+        platform_results = results.get("platform_results")
+        if platform_results:
+            for info in platform_results.values():
+                name = info.get("platform_display", "未知平台")
+                if info.get("success"):
+                    summary += f"\n  - {name}: {info.get('total_count', 0)} 条"
+                else:
+                    summary += f"\n  - {name}: 爬取失败（{info.get('error') or '未知错误'}）"
+        return summary
 
     @staticmethod
+    @cached_section("data_source_table", key=_source_key)
     def format_data_source_table(results: Dict[str, Any]) -> str:
         """格式化数据来源表格"""
         data_sources = results.get("data_sources")
@@ -114,11 +258,25 @@ class ReportTemplate:
         total = results.get("total_count", 0)
         keyword = results.get("keyword", "") or ", ".join(results.get("keywords", []))
 
+        platform_results = results.get("platform_results")
+        if platform_results:
+            breakdown = results.get("sentiment_statistics", {}).get("platform_breakdown", {})
+            table = """| 平台/来源 | 关键词 | 内容数量 | 状态 | 平均情感分数 |
+|----------|--------|----------|------|--------------|"""
+            for info in platform_results.values():
+                name = info.get("platform_display", "未知平台")
+                status = "成功" if info.get("success") else "失败"
+                score = breakdown.get(name, {}).get("average_score")
+                score_str = f"{score:.2f}" if score is not None else "-"
+                table += f"\n| {name} | {keyword} | {info.get('total_count', 0)} | {status} | {score_str} |"
+            return table
+
         return f"""| 平台/来源 | 关键词 | 内容数量 |
 |----------|--------|----------|
 | {platform} | {keyword} | {total} |"""
 
     @staticmethod
+    @cached_section("sentiment_distribution_table")
     def format_sentiment_distribution_table(stats: Dict[str, Any]) -> str:
         """格式化情感分布表格"""
         dist = stats.get("sentiment_distribution", {})
@@ -139,36 +297,50 @@ class ReportTemplate:
         sentiment_type: str,
         max_items: int = 5
     ) -> str:
-        """格式化内容部分"""
-        # 筛选指定情感类型的内容
-        filtered = [
-            item for item in results
-            if item.get("sentiment", {}).get("label", "") == sentiment_type
-        ]
-
-        if not filtered:
-            return f"暂无{sentiment_type}内容。"
-
-        # 按置信度排序，取前N条
-        filtered.sort(
-            key=lambda x: x.get("sentiment", {}).get("confidence", 0),
-            reverse=True
+        """格式化内容部分（筛选出前 N 条后按其内容缓存渲染结果）"""
+        return ReportTemplate.render_content_items(
+            ReportTemplate.select_content(results, sentiment_type, max_items), sentiment_type
         )
 
-        # 舆情内容预览：每条显示约 500 字，便于报告可读；联网搜索摘要保留全文
+    @staticmethod
+    def select_content(
+        results: List[Dict[str, Any]],
+        sentiment_type: str,
+        max_items: int = 5,
+        rank_by: str = "confidence"
+    ) -> List[Dict[str, Any]]:
+        """
+        选出某情感得分最高的前 N 条（Markdown 与 HTML 报告共用）；
+        需要全部情感时用 selection.select_top_items 一遍选出
+        """
+        return TopKSelector.from_items(results, max_items, rank_by).top_items(sentiment_type)
+
+    @staticmethod
+    def preview_text(item: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        内容预览：每条显示约 500 字，便于报告可读；联网搜索条目通常为完整摘要，保留全文
+
+        Returns:
+            (预览文本, 截断时的省略号后缀)
+        """
         max_preview_chars = 500
+        raw_text = item.get("content", "")
+        if item.get("source") == "web_search" or len(raw_text) <= max_preview_chars:
+            return raw_text, ""
+        return raw_text[:max_preview_chars], "..."
+
+    @staticmethod
+    @cached_section("content_items")
+    def render_content_items(items: List[Dict[str, Any]], sentiment_type: str) -> str:
+        """渲染已选出的内容条目"""
+        if not items:
+            return f"暂无{sentiment_type}内容。"
+
         content = ""
-        for i, item in enumerate(filtered[:max_items], 1):
+        for i, item in enumerate(items, 1):
             title = item.get("title", "无标题")
             author = item.get("author") or item.get("source") or "未知作者"
-            raw_text = item.get("content", "")
-            # 联网搜索条目通常为完整摘要，保留全文；其它来源做预览截断
-            if item.get("source") == "web_search":
-                text = raw_text
-                suffix = ""
-            else:
-                text = raw_text[:max_preview_chars] if len(raw_text) > max_preview_chars else raw_text
-                suffix = "..." if len(raw_text) > max_preview_chars else ""
+            text, suffix = ReportTemplate.preview_text(item)
             confidence = item.get("sentiment", {}).get("confidence", 0)
 
             content += f"""
@@ -0,0 +1,491 @@
+"""
+话题提取模块
+对标题与正文做中文分词（jieba 可选，缺失时用汉字二元组），按 TF-IDF 提取高频关键词，
+并用 MinHash + LSH 把近似重复的标题聚成话题。文档频率（IDF 统计）持久化在本地 SQLite，
+跨运行增量累加，每次只需处理本次条目。
+依赖：jieba、numpy（均可选）
+"""
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import zlib
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import jieba
+    jieba.setLogLevel(60)
+    JIEBA_AVAILABLE = True
+except ImportError:
+    JIEBA_AVAILABLE = False
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# 默认 IDF 统计库位置，可用环境变量 AGENTBAY_TOPIC_DB 覆盖
+DEFAULT_TOPIC_DB = Path.home() / ".config" / "agentbay" / "topics.db"
+
+TOKENIZER = "jieba" if JIEBA_AVAILABLE else "bigram"
+
+# 每条只取正文前若干字参与关键词统计（标题权重为 2）
+CONTENT_CHARS = 300
+TITLE_WEIGHT = 2
+# 摘要中保留的候选词数（按本批 TF-IDF 排序），也是写入 IDF 库的词数上限
+MAX_CANDIDATE_TERMS = 2000
+# IDF 库词数超过该值时清理只出现过一次的词
+MAX_VOCABULARY = 200000
+# 二元组回退时，相接的两个二元组（ab、bc）组成的三字串 abc 出现条数不低于两者中较少者的该比例，才视为同一短语
+PHRASE_LINK_RATIO = 0.8
+# 拼回的短语最长字数
+MAX_PHRASE_CHARS = 8
+
+# MinHash：哈希个数 = 分段数 × 每段行数；估计的 Jaccard 相似度不低于阈值才算近似重复
+MINHASH_BANDS = 8
+MINHASH_ROWS = 4
+MINHASH_THRESHOLD = 0.5
+SHINGLE_SIZE = 3
+# 参与聚类的标题数上限（超过后只做关键词统计，内存保持有界）
+MAX_CLUSTER_DOCS = 50000
+
+# 纯数字、百分比等不作为词（日期、序号、统计数字没有话题意义）
+_TOKEN_RE = re.compile(r"[一-鿿]+|[A-Za-z][A-Za-z0-9+#.\-]*")
+_CJK_RE = re.compile(r"[一-鿿]")
+_NORMALIZE_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+STOPWORDS = frozenset(
+    "的 了 是 在 和 与 及 或 也 就 都 而 着 被 把 让 给 对 从 到 为 以 于 之 其 这 那 有 无 不 没 很 还 又 "
+    "我 你 他 她 它 我们 你们 他们 自己 什么 怎么 如何 一个 一些 这个 那个 这些 那些 可以 已经 因为 所以 "
+    "但是 如果 就是 还是 没有 不是 进行 表示 相关 目前 今天 昨天 记者 报道 日电 消息 来源 网友 视频 图片 "
+    "the a an of to in on for and or is are was be with by at from as it this that".split()
+)
+# 二元组回退时，先把这些虚字替换为空格再切二元组（含虚字的组合没有话题意义）
+_STOP_CHARS = "的了是在和与及或也就都而着被把让给对从到为以于之其这那有不没很还又我你他她它们个些"
+_STOP_CHAR_TABLE = str.maketrans({c: " " for c in _STOP_CHARS})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词：jieba 可用时精确模式分词，否则中文取相邻二字、英文取单词；去掉单字与数字
+    （停用词在汇总时统一剔除，见 TopicExtractor.snapshot）
+
+    Args:
+        text: 文本
+
+    Returns:
+        词列表
+    """
+    return _tokenize(text)[0]
+
+
+def _tokenize(text: str) -> Tuple[List[str], List[str]]:
+    """分词，并在二元组回退时给出相接二元组组成的三字串（用于把二元组拼回短语，见 _merge_bigrams）"""
+    if not text:
+        return [], []
+    if JIEBA_AVAILABLE:
+        return [
+            word for word in (w.strip().lower() for w in jieba.lcut(text))
+            if len(word) > 1 and _TOKEN_RE.fullmatch(word)
+        ], []
+    tokens: List[str] = []
+    links: List[str] = []
+    for run in _TOKEN_RE.findall(text.translate(_STOP_CHAR_TABLE)):
+        if _CJK_RE.match(run):
+            tokens += [run[i:i + 2] for i in range(len(run) - 1)]
+            links += [run[i:i + 3] for i in range(len(run) - 2)]
+        elif len(run) > 1:
+            tokens.append(run.lower())
+    return tokens, links
+
+
+def idf(documents: int, df: int) -> float:
+    """平滑 IDF：ln((N + 1) / (df + 1)) + 1；候选词截断与最终排序共用，出现在每条中的词仍保留词频权重"""
+    return math.log((documents + 1) / (df + 1)) + 1.0
+
+
+def _shingles(title: str) -> List[int]:
+    """标题规范化（去空白与标点）后的字符 n-gram 哈希"""
+    text = _NORMALIZE_RE.sub("", title).lower()
+    if len(text) <= SHINGLE_SIZE:
+        return [zlib.crc32(text.encode("utf-8"))] if text else []
+    return list({
+        zlib.crc32(text[i:i + SHINGLE_SIZE].encode("utf-8"))
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    })
+
+
+class MinHashClusterer:
+    """MinHash + LSH 近似重复标题聚类（增量添加，并查集合并）"""
+
+    # 小于 2^32 的最大素数：32 位哈希与系数的乘积在 uint64 内不溢出
+    _PRIME = 0xFFFFFFFB
+
+    def __init__(
+        self,
+        bands: int = MINHASH_BANDS,
+        rows: int = MINHASH_ROWS,
+        threshold: float = MINHASH_THRESHOLD,
+        max_docs: int = MAX_CLUSTER_DOCS,
+    ):
+        """
+        Args:
+            bands: LSH 分段数
+            rows: 每段的哈希个数
+            threshold: 估计 Jaccard 相似度阈值
+            max_docs: 参与聚类的标题数上限
+        """
+        self.bands = bands
+        self.rows = rows
+        self.threshold = threshold
+        self.max_docs = max_docs
+        num_perm = bands * rows
+        # 固定种子的哈希族 (a*x + b) mod p，保证不同进程/运行结果一致
+        seeds = [int.from_bytes(hashlib.sha1(f"minhash-{i}".encode()).digest()[:16], "big") for i in range(num_perm)]
+        self._a = [s % (self._PRIME - 1) + 1 for s in seeds]
+        self._b = [(s >> 64) % self._PRIME for s in seeds]
+        if NUMPY_AVAILABLE:
+            self._a_np = np.array(self._a, dtype=np.uint64)[:, None]
+            self._b_np = np.array(self._b, dtype=np.uint64)[:, None]
+        self.titles: List[str] = []
+        self.signatures: List[Tuple[int, ...]] = []
+        self._parent: List[int] = []
+        self._buckets: List[Dict[Tuple[int, ...], int]] = [{} for _ in range(bands)]
+
+    def signature(self, title: str) -> Optional[Tuple[int, ...]]:
+        """标题的 MinHash 签名，标题为空时返回 None"""
+        shingles = _shingles(title)
+        if not shingles:
+            return None
+        if NUMPY_AVAILABLE:
+            values = np.array(shingles, dtype=np.uint64)[None, :]
+            hashed = (self._a_np * values + self._b_np) % np.uint64(self._PRIME)
+            return tuple(hashed.min(axis=1).tolist())
+        return tuple(
+            min((a * x + b) % self._PRIME for x in shingles)
+            for a, b in zip(self._a, self._b)
+        )
+
+    def _find(self, i: int) -> int:
+        parent = self._parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _similarity(self, i: int, j: int) -> float:
+        sig_i, sig_j = self.signatures[i], self.signatures[j]
+        return sum(1 for x, y in zip(sig_i, sig_j) if x == y) / len(sig_i)
+
+    def add(self, title: str) -> Optional[int]:
+        """
+        加入一个标题
+
+        Returns:
+            标题序号；超过上限或标题为空时返回 None
+        """
+        if len(self.titles) >= self.max_docs:
+            return None
+        sig = self.signature(title or "")
+        if sig is None:
+            return None
+        idx = len(self.titles)
+        self.titles.append(title)
+        self.signatures.append(sig)
+        self._parent.append(idx)
+        for band, table in enumerate(self._buckets):
+            key = sig[band * self.rows:(band + 1) * self.rows]
+            other = table.get(key)
+            if other is None:
+                table[key] = idx
+            elif self._similarity(idx, other) >= self.threshold:
+                root_a, root_b = self._find(idx), self._find(other)
+                if root_a != root_b:
+                    self._parent[max(root_a, root_b)] = min(root_a, root_b)
+        return idx
+
+    def clusters(self, min_size: int = 2) -> List[List[int]]:
+        """按大小降序返回聚类（每个聚类为标题序号列表，按出现顺序）"""
+        groups: Dict[int, List[int]] = {}
+        for i in range(len(self.titles)):
+            groups.setdefault(self._find(i), []).append(i)
+        return sorted((g for g in groups.values() if len(g) >= min_size), key=lambda g: (-len(g), g[0]))
+
+
+class TopicExtractor:
+    """逐条累加词频与文档频率、聚类标题，生成可序列化的话题摘要"""
+
+    def __init__(self, max_cluster_docs: int = MAX_CLUSTER_DOCS, max_terms: Optional[int] = None):
+        """
+        Args:
+            max_cluster_docs: 参与聚类的标题数上限
+            max_terms: 词表上限；超过后只保留词频最高的一半（低频词的计数变为近似值），None 表示不限
+        """
+        self.documents = 0
+        # 全部词的出现次数之和（关键词权重按词频占比计算）
+        self.tokens = 0
+        self.tf: Counter = Counter()
+        self.df: Counter = Counter()
+        # 二元组回退时三字串的文档频率
+        self.links: Counter = Counter()
+        self.max_terms = max_terms
+        self.clusterer = MinHashClusterer(max_docs=max_cluster_docs)
+
+    @classmethod
+    def from_items(cls, items: Iterable[Dict[str, Any]]) -> "TopicExtractor":
+        """由完整条目列表生成"""
+        extractor = cls()
+        for item in items:
+            extractor.add(item)
+        return extractor
+
+    def add(self, item: Dict[str, Any]):
+        """追加一条结果（标题 + 正文前 CONTENT_CHARS 字）"""
+        title = str(item.get("title") or "")
+        content = str(item.get("content") or "")[:CONTENT_CHARS]
+        title_tokens, title_links = _tokenize(title)
+        content_tokens, content_links = _tokenize(content)
+        tokens = title_tokens * TITLE_WEIGHT + content_tokens
+        if title:
+            self.clusterer.add(title)
+        if not tokens:
+            return
+        self.documents += 1
+        self.tokens += len(tokens)
+        # 正文已截断到 CONTENT_CHARS 字，词频直接累加（Counter.update 逐元素计数在 C 层完成）
+        self.tf.update(tokens)
+        self.df.update(set(tokens))
+        if title_links or content_links:
+            self.links.update(set(title_links) | set(content_links))
+        if self.max_terms and (len(self.tf) > self.max_terms or len(self.links) > self.max_terms):
+            self._prune_terms()
+
+    def _prune_terms(self):
+        """词表超过上限时保留词频最高的 max_terms // 2 个词，均摊到每次新增词上的开销为常数"""
+        keep = self.tf.most_common(self.max_terms // 2)
+        self.tf = Counter(dict(keep))
+        self.df = Counter({term: self.df[term] for term, _ in keep})
+        links = ((link, df) for link, df in self.links.items() if link[:2] in self.tf and link[1:] in self.tf)
+        self.links = Counter(dict(sorted(links, key=lambda kv: kv[1], reverse=True)[:self.max_terms // 2]))
+
+    def snapshot(self, max_terms: int = MAX_CANDIDATE_TERMS, max_clusters: int = 10) -> Dict[str, Any]:
+        """
+        序列化为话题摘要：按本批 TF-IDF 取前 max_terms 个候选词（含词频与文档频率）及最大的若干话题聚类
+
+        Returns:
+            {"tokenizer", "documents", "tokens"（词频总和）, "terms": [[词, 词频, 文档频率], ...],
+             "links": [[三字串, 文档频率], ...]（二元组回退时，两端二元组均为候选词）, "clusters": [{"title", "size"}, ...]}
+        """
+        n = self.documents
+        ranked = sorted(
+            ((term, tf) for term, tf in self.tf.items() if term not in STOPWORDS),
+            key=lambda kv: kv[1] * idf(n, self.df[kv[0]]) if self.df[kv[0]] > 1 else 0.0,
+            reverse=True,
+        )[:max_terms]
+        clusters = [
+            {"title": self.clusterer.titles[group[0]], "size": len(group)}
+            for group in self.clusterer.clusters()[:max_clusters]
+        ]
+        candidates = {term for term, _ in ranked}
+        links = [
+            [link, df] for link, df in self.links.items()
+            if df > 1 and link[:2] in candidates and link[1:] in candidates
+        ]
+        return {
+            "tokenizer": TOKENIZER,
+            "documents": n,
+            "tokens": self.tokens,
+            "terms": [[term, tf, self.df[term]] for term, tf in ranked],
+            "links": links,
+            "clusters": clusters,
+        }
+
+
+class TopicStore:
+    """基于 SQLite 的跨运行文档频率统计（IDF）"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Args:
+            db_path: SQLite 文件路径，默认 AGENTBAY_TOPIC_DB 或 ~/.config/agentbay/topics.db
+        """
+        self.db_path = Path(db_path or os.environ.get("AGENTBAY_TOPIC_DB") or DEFAULT_TOPIC_DB)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS topic_df (
+                tokenizer TEXT NOT NULL,
+                term TEXT NOT NULL,
+                df INTEGER NOT NULL,
+                PRIMARY KEY (tokenizer, term)
+            );
+            CREATE TABLE IF NOT EXISTS topic_documents (
+                tokenizer TEXT PRIMARY KEY,
+                documents INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS topic_sources (
+                source_key TEXT PRIMARY KEY,
+                ingested_at TEXT NOT NULL
+            );
+            """
+        )
+
+    def documents(self, tokenizer: str = TOKENIZER) -> int:
+        """已累计的文档数"""
+        row = self.conn.execute(
+            "SELECT documents FROM topic_documents WHERE tokenizer = ?", (tokenizer,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def document_frequencies(self, terms: List[str], tokenizer: str = TOKENIZER) -> Dict[str, int]:
+        """查询若干词的累计文档频率"""
+        found: Dict[str, int] = {}
+        for start in range(0, len(terms), 500):
+            chunk = terms[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT term, df FROM topic_df WHERE tokenizer = ? AND term IN ({','.join('?' * len(chunk))})",
+                (tokenizer, *chunk),
+            ).fetchall()
+            found.update(rows)
+        return found
+
+    def ingest(self, snapshot: Dict[str, Any], source_key: str) -> bool:
+        """
+        将一份话题摘要的文档频率累加到库中（同一 source_key 只计入一次）
+
+        Returns:
+            是否写入
+        """
+        tokenizer = snapshot.get("tokenizer", TOKENIZER)
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO topic_sources (source_key, ingested_at) VALUES (?, ?)",
+                (source_key, datetime.now().isoformat()),
+            )
+            if cur.rowcount == 0:
+                return False
+            self.conn.execute(
+                """
+                INSERT INTO topic_documents VALUES (?, ?)
+                ON CONFLICT(tokenizer) DO UPDATE SET documents = documents + excluded.documents
+                """,
+                (tokenizer, snapshot.get("documents", 0)),
+            )
+            self.conn.executemany(
+                """
+                INSERT INTO topic_df VALUES (?, ?, ?)
+                ON CONFLICT(tokenizer, term) DO UPDATE SET df = df + excluded.df
+                """,
+                [(tokenizer, term, df) for term, _, df in snapshot.get("terms", [])],
+            )
+            (vocabulary,) = self.conn.execute("SELECT COUNT(*) FROM topic_df").fetchone()
+            if vocabulary > MAX_VOCABULARY:
+                self.conn.execute("DELETE FROM topic_df WHERE df <= 1")
+        return True
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+
+def _merge_bigrams(terms: List[list], links: List[list]) -> List[list]:
+    """
+    把首尾相接的汉字二元组拼回短语（如 小米/米汽/汽车 → 小米汽车），在计算权重之前进行。
+
+    二元组 b 的出现大多（PHRASE_LINK_RATIO 以上）紧跟在某个字之后，说明它是更长词的后半截（「左嵌入」），
+    大多紧接某个字则是前半截（「右嵌入」）。从不左嵌入的二元组出发，沿三字串相接（三字串覆盖两侧二元组中
+    较少者的大部分出现）向后延伸，路径上每个不右嵌入的位置都构成一个词或短语；左右嵌入的二元组
+    不单独输出，因而不会出现「航表现」这类从词中间开始的片段。短语的词频与出现条数取路径上的最小值。
+
+    Args:
+        terms: [[词, 词频, 文档频率], ...]
+        links: [[三字串, 文档频率], ...]
+
+    Returns:
+        拼接后的 [[词, 词频, 文档频率], ...]
+    """
+    stats = {term: (tf, df) for term, tf, df in terms if len(term) == 2 and _CJK_RE.match(term)}
+    if not stats or not links:
+        return terms
+    following: Dict[str, List[Tuple[str, int]]] = {}
+    left_bound: Dict[str, int] = {}
+    right_bound: Dict[str, int] = {}
+    for link, df in links:
+        head, tail = link[:2], link[1:]
+        if head == tail or head not in stats or tail not in stats:
+            continue
+        left_bound[tail] = max(left_bound.get(tail, 0), df)
+        right_bound[head] = max(right_bound.get(head, 0), df)
+        if df >= PHRASE_LINK_RATIO * min(stats[head][1], stats[tail][1]):
+            following.setdefault(head, []).append((tail, df))
+
+    def embedded(bound: Dict[str, int], term: str) -> bool:
+        return bound.get(term, 0) >= PHRASE_LINK_RATIO * stats[term][1]
+
+    phrases: Dict[str, Tuple[int, int]] = {}
+
+    def extend(path: List[str], tf: int, df: int):
+        phrase = path[0] + "".join(term[1] for term in path[1:])
+        if not embedded(right_bound, path[-1]) and df >= 2:
+            if phrase not in phrases or phrases[phrase][1] < df:
+                phrases[phrase] = (tf, df)
+        if len(phrase) >= MAX_PHRASE_CHARS:
+            return
+        for tail, link_df in following.get(path[-1], []):
+            if tail not in path:
+                extend(path + [tail], min(tf, stats[tail][0]), min(df, link_df))
+
+    for term, (tf, df) in stats.items():
+        if not embedded(left_bound, term):
+            extend([term], tf, df)
+    merged = [[term, tf, df] for term, tf, df in terms if term not in stats]
+    merged += [[phrase, tf, df] for phrase, (tf, df) in phrases.items()]
+    return merged
+
+
+def rank_keywords(
+    snapshot: Dict[str, Any],
+    store: Optional[TopicStore] = None,
+    top_k: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    按 TF-IDF 对候选词排序；有 IDF 库时文档频率为库中历史累计与本次之和。
+    权重为「每千词中的出现次数 × IDF」，二元组回退时先把二元组拼回短语再计算
+
+    Args:
+        snapshot: TopicExtractor.snapshot() 的结果
+        store: 跨运行 IDF 库，可选
+        top_k: 返回的关键词数
+
+    Returns:
+        [{"term", "score", "documents"}, ...]，按权重降序
+    """
+    terms = snapshot.get("terms", [])
+    n = snapshot.get("documents", 0)
+    total = snapshot.get("tokens") or sum(tf for _, tf, _ in terms) or 1
+    history: Dict[str, int] = {}
+    if store is not None and terms:
+        tokenizer = snapshot.get("tokenizer", TOKENIZER)
+        n += store.documents(tokenizer)
+        history = store.document_frequencies([t for t, _, _ in terms], tokenizer)
+    if snapshot.get("tokenizer", TOKENIZER) == "bigram":
+        terms = _merge_bigrams(terms, snapshot.get("links", []))
+    scored = []
+    for term, tf, df in terms:
+        if df < 2:
+            # 只出现在一条中的词不作为话题关键词
+            continue
+        # 拼回的短语不在 IDF 库中，其历史文档频率不超过组成它的二元组中最少者
+        past = history.get(term)
+        if past is None and len(term) > 2 and _CJK_RE.match(term):
+            past = min(history.get(term[i:i + 2], 0) for i in range(len(term) - 1))
+        weight = tf * 1000 / total * idf(n, df + (past or 0))
+        scored.append({"term": term, "score": round(weight, 3), "documents": df})
+    scored.sort(key=lambda t: t["score"], reverse=True)
+    return scored[:top_k]
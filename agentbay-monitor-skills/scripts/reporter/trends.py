@@ -0,0 +1,472 @@
+"""
+舆情趋势模块
+按发布时间把条目聚合到小时/天的时间桶（条数、各情感计数、分数累加和），并增量写入本地 SQLite 趋势库：
+每份新的 processed 结果只需累加自身条目，报告从趋势库读取跨运行的时间序列，不必重读历史爬取文件。
+趋势库按条目（id/URL，缺失时用标题与正文指纹）去重：定时监控中每次运行重复抓到的同一帖子只计入一次声量。
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sentiment.sentiment_stats import LABELS, accumulate, format_statistics, new_bucket, sentiment_values
+
+# 默认趋势库位置，可用环境变量 AGENTBAY_TREND_DB 覆盖
+DEFAULT_TREND_DB = Path.home() / ".config" / "agentbay" / "trends.db"
+
+# 时间桶粒度及其键格式
+GRANULARITIES = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+}
+
+_RELATIVE_RE = re.compile(r"^(\d+)\s*(秒|分钟|分|小时|天|周|个月|月)前$")
+_RELATIVE_UNITS = {
+    "秒": timedelta(seconds=1),
+    "分钟": timedelta(minutes=1),
+    "分": timedelta(minutes=1),
+    "小时": timedelta(hours=1),
+    "天": timedelta(days=1),
+    "周": timedelta(weeks=1),
+    "个月": timedelta(days=30),
+    "月": timedelta(days=30),
+}
+_DAY_WORDS = {"今天": 0, "昨天": 1, "前天": 2}
+_DAY_WORD_RE = re.compile(r"^(今天|昨天|前天)\s*(\d{1,2})?[:：]?(\d{1,2})?$")
+# 年-月-日 [时:分[:秒]]，分隔符可为 - / . 或 年月日
+_FULL_DATE_RE = re.compile(
+    r"^(\d{4})[-/.年](\d{1,2})[-/.月](\d{1,2})日?(?:[\sT]+(\d{1,2})[:：](\d{1,2})(?:[:：](\d{1,2}))?)?"
+)
+# 月-日 [时:分]（无年份时取参考时间所在年，晚于参考时间则算上一年）
+_SHORT_DATE_RE = re.compile(r"^(\d{1,2})[-/.月](\d{1,2})日?(?:\s+(\d{1,2})[:：](\d{1,2}))?$")
+
+
+def parse_publish_time(value: Any, reference: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    解析平台上常见的发布时间写法
+
+    支持 ISO/「2026-01-05 12:30」/「2026年1月5日」/「01-05 12:30」/「3小时前」/「昨天 12:30」/「刚刚」及秒或毫秒级时间戳。
+
+    Args:
+        value: publish_time 原始值
+        reference: 相对时间（「3小时前」「昨天」等）的参考时间，一般为爬取时间，默认当前时间
+
+    Returns:
+        datetime（无时区），无法解析时返回 None
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    reference = reference or datetime.now()
+    if isinstance(value, (int, float)):
+        ts = float(value)
+        if ts > 1e12:
+            ts /= 1000.0
+        try:
+            return datetime.fromtimestamp(ts)
+        except (OverflowError, OSError, ValueError):
+            return None
+    text = str(value).strip()
+    if not text:
+        return None
+    if text in ("刚刚", "刚才"):
+        return reference
+    if text.isdigit() and len(text) in (10, 13):
+        return parse_publish_time(int(text), reference)
+
+    match = _RELATIVE_RE.match(text)
+    if match:
+        return reference - int(match.group(1)) * _RELATIVE_UNITS[match.group(2)]
+
+    match = _DAY_WORD_RE.match(text)
+    if match:
+        day = (reference - timedelta(days=_DAY_WORDS[match.group(1)])).replace(second=0, microsecond=0)
+        if match.group(2) is None:
+            return day.replace(hour=0, minute=0)
+        try:
+            return day.replace(hour=int(match.group(2)), minute=int(match.group(3) or 0))
+        except ValueError:
+            return None
+
+    match = _FULL_DATE_RE.match(text)
+    if match:
+        y, mo, d, h, mi, s = (int(g) if g else 0 for g in match.groups())
+        try:
+            return datetime(y, mo, d, h, mi, s)
+        except ValueError:
+            return None
+
+    match = _SHORT_DATE_RE.match(text)
+    if match:
+        mo, d, h, mi = (int(g) if g else 0 for g in match.groups())
+        try:
+            parsed = datetime(reference.year, mo, d, h, mi)
+        except ValueError:
+            return None
+        if parsed > reference + timedelta(days=1):
+            parsed = parsed.replace(year=reference.year - 1)
+        return parsed
+
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _parse_reference(processed: Dict[str, Any]) -> datetime:
+    """相对时间的参考时刻：爬取时间 → 处理时间 → 当前时间"""
+    for key in ("crawl_time", "processed_time"):
+        value = processed.get(key)
+        if value:
+            try:
+                return datetime.fromisoformat(str(value))
+            except ValueError:
+                continue
+    return datetime.now()
+
+
+def item_key(item: Dict[str, Any]) -> Optional[str]:
+    """
+    条目在趋势库中的去重键：优先 id，其次 URL（去掉片段与末尾斜杠），否则标题 + 正文前 200 字
+
+    Returns:
+        16 位十六进制摘要，条目没有可识别内容时为 None
+    """
+    identity = item.get("id") or item.get("note_id")
+    if identity:
+        raw = f"id:{identity}"
+    elif item.get("url"):
+        raw = "url:" + str(item["url"]).strip().split("#", 1)[0].rstrip("/")
+    else:
+        title = str(item.get("title") or "").strip()
+        content = str(item.get("content") or "").strip()[:200]
+        if not title and not content:
+            return None
+        raw = f"text:{title}\x1f{content}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class TimeBuckets:
+    """
+    单次结果的时间桶聚合：(粒度, 时间桶, 平台, 关键词) → 计数与分数累加和；
+    只保存固定大小的聚合，写入趋势库所需的逐条去重行由 item_rows() 按需从条目生成
+    """
+
+    def __init__(self, reference: Optional[datetime] = None, platform: str = "", keyword: str = ""):
+        """
+        Args:
+            reference: 相对发布时间的参考时刻，同时作为无发布时间条目的归属时刻
+            platform: 条目未带 platform 字段时使用的平台
+            keyword: 条目未带 keyword 字段时使用的关键词
+        """
+        self.reference = reference or datetime.now()
+        self.platform = platform
+        self.keyword = keyword
+        self.buckets: Dict[Tuple[str, str, str, str], list] = {}
+        self.undated = 0
+        self.first: Optional[datetime] = None
+        self.last: Optional[datetime] = None
+
+    @classmethod
+    def for_processed(cls, processed: Dict[str, Any]) -> "TimeBuckets":
+        """按 processed 的爬取时间、平台、关键词创建空聚合"""
+        keyword = processed.get("keyword") or ""
+        if not keyword and len(processed.get("keywords") or []) == 1:
+            keyword = processed["keywords"][0]
+        return cls(_parse_reference(processed), processed.get("platform") or "", keyword)
+
+    @classmethod
+    def from_items(cls, items: Iterable[Dict[str, Any]], processed: Dict[str, Any]) -> "TimeBuckets":
+        """由完整条目列表生成聚合"""
+        buckets = cls.for_processed(processed)
+        for item in items:
+            buckets.add(item)
+        return buckets
+
+    def __len__(self) -> int:
+        return sum(b[0] for (g, _, _, _), b in self.buckets.items() if g == "day")
+
+    def _classify(self, item: Dict[str, Any]) -> Tuple[Optional[datetime], str, str, int, float, float]:
+        """条目的 (发布时间, 平台, 关键词, 情感序号, 分数, 置信度)；发布时间无法解析时为 None"""
+        return (
+            parse_publish_time(item.get("publish_time"), self.reference),
+            item.get("platform") or self.platform,
+            item.get("keyword") or self.keyword,
+            *sentiment_values(item.get("sentiment")),
+        )
+
+    def add(self, item: Dict[str, Any]):
+        """追加一条结果；无法解析发布时间的条目按参考时刻（爬取时间）计入"""
+        published, platform, keyword, label, score, confidence = self._classify(item)
+        if published is None:
+            self.undated += 1
+            published = self.reference
+        else:
+            if self.first is None or published < self.first:
+                self.first = published
+            if self.last is None or published > self.last:
+                self.last = published
+
+        for granularity, fmt in GRANULARITIES.items():
+            key = (granularity, published.strftime(fmt), platform, keyword)
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = new_bucket()
+            accumulate(bucket, label, score, confidence)
+
+    def item_rows(self, items: Iterable[Dict[str, Any]]) -> Iterator[list]:
+        """
+        逐条生成趋势库去重用的行，归属规则与 add() 相同；不保存在聚合中，只在写入趋势库时流式消费
+
+        Args:
+            items: 生成本聚合的同一批条目
+
+        Yields:
+            [去重键, 小时桶, 平台, 关键词, 情感序号, 分数, 置信度]
+        """
+        for item in items:
+            published, platform, keyword, label, score, confidence = self._classify(item)
+            hour = (published or self.reference).strftime(GRANULARITIES["hour"])
+            yield [item_key(item), hour, platform, keyword, label, score, confidence]
+
+    def series(self, granularity: str = "day") -> List[Dict[str, Any]]:
+        """本次结果按时间桶汇总（合并平台/关键词）的序列，按时间升序"""
+        merged: Dict[str, list] = {}
+        for (g, bucket_key, _, _), bucket in self.buckets.items():
+            if g == granularity:
+                _merge_bucket(merged.setdefault(bucket_key, new_bucket()), bucket)
+        return [{"bucket": key, **format_statistics(*merged[key])} for key in sorted(merged)]
+
+    def fingerprint(self) -> str:
+        """聚合内容指纹，用于识别同一份结果被重复写入趋势库"""
+        payload = json.dumps(sorted(self.to_rows()), ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def to_rows(self) -> List[list]:
+        """序列化为 JSON 友好的行列表（用于写入 processed 摘要）"""
+        return [
+            [*key, b[0], *b[1], round(b[2], 6), round(b[3], 6), round(b[4], 6)]
+            for key, b in self.buckets.items()
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化（含时间范围与无发布时间条数）"""
+        return {
+            "reference": self.reference.isoformat(),
+            "platform": self.platform,
+            "keyword": self.keyword,
+            "undated": self.undated,
+            "first": self.first.isoformat() if self.first else None,
+            "last": self.last.isoformat() if self.last else None,
+            "rows": self.to_rows(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TimeBuckets":
+        """由 to_dict() 的结果还原"""
+        buckets = cls(
+            datetime.fromisoformat(data["reference"]) if data.get("reference") else None,
+            data.get("platform") or "",
+            data.get("keyword") or "",
+        )
+        buckets.undated = data.get("undated", 0)
+        buckets.first = datetime.fromisoformat(data["first"]) if data.get("first") else None
+        buckets.last = datetime.fromisoformat(data["last"]) if data.get("last") else None
+        k = len(LABELS)
+        for row in data.get("rows", []):
+            buckets.buckets[tuple(row[:4])] = [row[4], list(row[5:5 + k]), *row[5 + k:8 + k]]
+        return buckets
+
+
+def _merge_bucket(target: list, source: list):
+    target[0] += source[0]
+    for i, count in enumerate(source[1]):
+        target[1][i] += count
+    target[2] += source[2]
+    target[3] += source[3]
+    target[4] += source[4]
+
+
+def describe_latest_change(trend: List[Dict[str, Any]]) -> str:
+    """
+    描述按天序列中最近一天相对此前日均的声量与情感变化
+
+    Args:
+        trend: 按时间升序的序列（TrendStore.series 的结果），至少两项
+
+    Returns:
+        一句话描述
+    """
+    latest, earlier = trend[-1], trend[:-1]
+    avg_volume = sum(d["total_count"] for d in earlier) / len(earlier)
+    avg_score = sum(d["average_score"] for d in earlier) / len(earlier)
+    change = (latest["total_count"] - avg_volume) / avg_volume * 100 if avg_volume else 0.0
+    return (
+        f"最近一天（{latest['bucket']}）声量较此前日均{'上升' if change >= 0 else '下降'} {abs(change):.0f}%，"
+        f"平均情感分数 {latest['average_score']:.2f}（此前日均 {avg_score:.2f}）。"
+    )
+
+
+class TrendStore:
+    """基于 SQLite 的跨运行趋势库：按 (粒度, 时间桶, 平台, 关键词) 增量累加"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        初始化趋势库
+
+        Args:
+            db_path: SQLite 文件路径，默认 AGENTBAY_TREND_DB 或 ~/.config/agentbay/trends.db（不存在时自动创建）
+        """
+        self.db_path = Path(db_path or os.environ.get("AGENTBAY_TREND_DB") or DEFAULT_TREND_DB)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 批量生成报告时多个进程可能同时写入，等待锁而不是立即报错
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS trend_buckets (
+                granularity TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                total INTEGER NOT NULL,
+                positive INTEGER NOT NULL,
+                negative INTEGER NOT NULL,
+                neutral INTEGER NOT NULL,
+                score_sum REAL NOT NULL,
+                weighted_sum REAL NOT NULL,
+                confidence_sum REAL NOT NULL,
+                PRIMARY KEY (granularity, bucket, platform, keyword)
+            );
+            CREATE INDEX IF NOT EXISTS idx_trend_keyword ON trend_buckets(granularity, keyword, bucket);
+            CREATE TABLE IF NOT EXISTS trend_sources (
+                source_key TEXT PRIMARY KEY,
+                ingested_at TEXT NOT NULL,
+                items INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS trend_items (
+                platform TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                day TEXT NOT NULL,
+                item_key TEXT NOT NULL,
+                PRIMARY KEY (platform, keyword, day, item_key)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    @staticmethod
+    def source_key(processed: Dict[str, Any], buckets: TimeBuckets) -> str:
+        """processed 结果的唯一键：平台、关键词、爬取时间与聚合指纹（同一次爬取重新处理时不变）"""
+        parts = [
+            str(processed.get(k) or "")
+            for k in ("platform", "keyword", "crawl_time")
+        ]
+        parts.append(",".join(processed.get("keywords") or []))
+        parts.append(buckets.fingerprint())
+        return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def ingest(self, buckets: TimeBuckets, source_key: str, items: Optional[Iterable[list]] = None) -> bool:
+        """
+        将一份结果的时间桶累加到趋势库：同一 source_key 只计入一次；给出逐条行时，
+        同一 (平台, 关键词, 天) 中此前运行已计入的条目不再累加
+
+        Args:
+            buckets: 本次结果的时间桶聚合
+            source_key: 结果唯一键（见 source_key()）
+            items: 可选，TimeBuckets.item_rows() 生成的逐条行（流式消费，不整体载入内存）；
+                未给出时按整份结果的时间桶累加
+
+        Returns:
+            是否写入；该结果此前已写入时返回 False
+        """
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO trend_sources (source_key, ingested_at, items) VALUES (?, ?, ?)",
+                (source_key, datetime.now().isoformat(), len(buckets)),
+            )
+            if cur.rowcount == 0:
+                return False
+            rows = buckets.to_rows() if items is None else self._unseen_rows(items, source_key)
+            self.conn.executemany(
+                """
+                INSERT INTO trend_buckets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(granularity, bucket, platform, keyword) DO UPDATE SET
+                    total = total + excluded.total,
+                    positive = positive + excluded.positive,
+                    negative = negative + excluded.negative,
+                    neutral = neutral + excluded.neutral,
+                    score_sum = score_sum + excluded.score_sum,
+                    weighted_sum = weighted_sum + excluded.weighted_sum,
+                    confidence_sum = confidence_sum + excluded.confidence_sum
+                """,
+                rows,
+            )
+        return True
+
+    def _unseen_rows(self, items: Iterable[list], source_key: str) -> List[list]:
+        """登记条目去重键，只把此前未计入的条目聚合为待累加的时间桶行"""
+        fresh = TimeBuckets()
+        for index, (key, hour, platform, keyword, label, score, confidence) in enumerate(items):
+            day = hour[:10]
+            # 无法识别的条目按「结果 + 序号」登记，只随所在结果计入一次
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO trend_items (platform, keyword, day, item_key) VALUES (?, ?, ?, ?)",
+                (platform, keyword, day, key or f"{source_key}:{index}"),
+            )
+            if cur.rowcount == 0:
+                continue
+            for granularity, bucket_key in (("hour", hour), ("day", day)):
+                bucket = fresh.buckets.get((granularity, bucket_key, platform, keyword))
+                if bucket is None:
+                    bucket = fresh.buckets[(granularity, bucket_key, platform, keyword)] = new_bucket()
+                accumulate(bucket, label, score, confidence)
+        return fresh.to_rows()
+
+    def series(
+        self,
+        granularity: str = "day",
+        keywords: Optional[List[str]] = None,
+        platforms: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        读取时间序列（合并所选平台/关键词）
+
+        Args:
+            granularity: hour 或 day
+            keywords: 只统计这些关键词，None 表示全部
+            platforms: 只统计这些平台，None 表示全部
+            limit: 只返回最近若干个时间桶
+
+        Returns:
+            按时间升序的列表，每项为 {"bucket": 时间桶, **sentiment_statistics}
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"不支持的粒度: {granularity}")
+        sql = (
+            "SELECT bucket, SUM(total), SUM(positive), SUM(negative), SUM(neutral), "
+            "SUM(score_sum), SUM(weighted_sum), SUM(confidence_sum) FROM trend_buckets WHERE granularity = ?"
+        )
+        params: List[Any] = [granularity]
+        for column, values in (("keyword", keywords), ("platform", platforms)):
+            if values:
+                sql += f" AND {column} IN ({','.join('?' * len(values))})"
+                params.extend(values)
+        sql += " GROUP BY bucket ORDER BY bucket DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self.conn.execute(sql, params).fetchall()
+        return [
+            {"bucket": bucket, **format_statistics(n, [pos, neg, neu], s, w, c)}
+            for bucket, n, pos, neg, neu, s, w, c in reversed(rows)
+        ]
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
@@ -0,0 +1,191 @@
+"""
+情感统计引擎
+逐条追加时只累加各标签计数与分数累加和（总体、按平台、按关键词各一份），内存与条数无关，
+数十万条也不必保留完整条目。标签映射（未知标签计入中性）与累加布局由本模块统一提供，
+报告条目选取（reporter.selection）与趋势时间桶（reporter.trends）共用。
+"""
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 情感标签及其编码；未知标签计入中性
+LABELS = ("正面", "负面", "中性")
+_LABEL_CODES = {label: code for code, label in enumerate(LABELS)}
+_NEUTRAL = _LABEL_CODES["中性"]
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取 JSON Lines 文件（不整体载入内存），跳过空行与无法解析的行
+
+    Args:
+        path: 文件路径
+
+    Yields:
+        每行的 JSON 对象
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(value, dict):
+                yield value
+
+
+def _to_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_label(label: Any) -> str:
+    """情感标签归一化：不在 LABELS 中的标签（含缺失）计为中性"""
+    return label if label in _LABEL_CODES else LABELS[_NEUTRAL]
+
+
+def sentiment_values(sentiment: Optional[Dict[str, Any]]) -> Tuple[int, float, float]:
+    """
+    情感结果 -> (标签编码, 分数, 置信度)；统计与趋势聚合共用
+
+    未知标签计入中性，分数缺失记 0，置信度缺失记 1
+    """
+    sentiment = sentiment or {}
+    return (
+        _LABEL_CODES.get(sentiment.get("label"), _NEUTRAL),
+        _to_float(sentiment.get("score"), 0.0),
+        _to_float(sentiment.get("confidence"), 1.0),
+    )
+
+
+def new_bucket() -> list:
+    """空的累加桶：[n, 按 LABELS 顺序的各标签计数, 分数和, 加权和, 置信度和]，可直接交给 format_statistics"""
+    return [0, [0] * len(LABELS), 0.0, 0.0, 0.0]
+
+
+def accumulate(bucket: list, label: int, score: float, confidence: float):
+    """向累加桶计入一条"""
+    bucket[0] += 1
+    bucket[1][label] += 1
+    bucket[2] += score
+    bucket[3] += score * confidence
+    bucket[4] += confidence
+
+
+def format_statistics(n: int, counts, score_sum: float, weighted: float, weight_sum: float) -> Dict[str, Any]:
+    """
+    由计数与累加和生成 sentiment_statistics 字典
+
+    Args:
+        n: 条数
+        counts: 按 LABELS 顺序的各标签条数
+        score_sum: 分数和
+        weighted: 分数 × 置信度 之和
+        weight_sum: 置信度和
+
+    Returns:
+        统计字典
+    """
+    dist = dict(zip(LABELS, (int(c) for c in counts)))
+    return {
+        "total_count": n,
+        "sentiment_distribution": dist,
+        "average_score": round(score_sum / n, 3) if n else 0,
+        "positive_ratio": round(dist["正面"] / n, 3) if n else 0,
+        "negative_ratio": round(dist["负面"] / n, 3) if n else 0,
+        "neutral_ratio": round(dist["中性"] / n, 3) if n else 0,
+        "positive_count": dist["正面"],
+        "negative_count": dist["负面"],
+        "neutral_count": dist["中性"],
+        "confidence_weighted_score": round(weighted / weight_sum, 3) if weight_sum else 0,
+        "average_confidence": round(weight_sum / n, 3) if n else 0,
+    }
+
+
+class SentimentStatsEngine:
+    """累加式情感统计：add() 逐条追加，statistics() 由累加和生成统计字典，可用于一遍流式读取"""
+
+    def __init__(self):
+        self._totals = new_bucket()
+        self._platforms: Dict[str, list] = {}
+        self._keywords: Dict[str, list] = {}
+
+    def __len__(self) -> int:
+        return self._totals[0]
+
+    def add(self, item: Dict[str, Any], sentiment: Optional[Dict[str, Any]] = None):
+        """
+        追加一条记录
+
+        Args:
+            item: 爬取条目（读取 platform_display/platform 与 keyword）
+            sentiment: 情感结果，默认取 item["sentiment"]
+        """
+        values = sentiment_values(item.get("sentiment") if sentiment is None else sentiment)
+        accumulate(self._totals, *values)
+        platform = item.get("platform_display") or item.get("platform") or "未知平台"
+        accumulate(self._platforms.setdefault(platform, new_bucket()), *values)
+        keyword = item.get("keyword") or ""
+        if keyword:
+            accumulate(self._keywords.setdefault(keyword, new_bucket()), *values)
+
+    def extend(self, items: Iterable[Dict[str, Any]], sentiments: Optional[Iterable[Dict[str, Any]]] = None):
+        """批量追加；sentiments 为 None 时使用每条的 sentiment 字段"""
+        if sentiments is None:
+            for item in items:
+                self.add(item)
+        else:
+            for item, sentiment in zip(items, sentiments):
+                self.add(item, sentiment)
+
+    def statistics(self, breakdowns: bool = True) -> Dict[str, Any]:
+        """
+        计算 sentiment_statistics
+
+        Args:
+            breakdowns: 是否计算按平台（多于一个平台时）与按关键词（多于一个关键词时）的细分
+
+        Returns:
+            与 sentiment_instruction.md 3.3 节兼容的统计字典，另含 confidence_weighted_score、
+            platform_breakdown、keyword_breakdown（按需）
+        """
+        stats = format_statistics(*self._totals)
+        if breakdowns:
+            if len(self._platforms) > 1:
+                stats["platform_breakdown"] = self.platform_breakdown()
+            if len(self._keywords) > 1:
+                stats["keyword_breakdown"] = self.keyword_breakdown()
+        return stats
+
+    def platform_breakdown(self) -> Dict[str, Dict[str, Any]]:
+        """按平台（显示名）细分的统计"""
+        return {name: format_statistics(*bucket) for name, bucket in self._platforms.items()}
+
+    def keyword_breakdown(self) -> Dict[str, Dict[str, Any]]:
+        """按关键词细分的统计（不含无关键词的条目）"""
+        return {name: format_statistics(*bucket) for name, bucket in self._keywords.items()}
+
+
+def compute_sentiment_statistics(
+    items: Iterable[Dict[str, Any]],
+    sentiments: Optional[Iterable[Dict[str, Any]]] = None,
+    breakdowns: bool = True,
+) -> Tuple[Dict[str, Any], SentimentStatsEngine]:
+    """
+    一次性计算情感统计
+
+    Args:
+        items: 爬取条目
+        sentiments: 与 items 同序的情感结果，None 时使用每条的 sentiment 字段
+        breakdowns: 是否计算按平台/关键词细分
+
+    Returns:
+        (sentiment_statistics, 统计引擎)
+    """
+    engine = SentimentStatsEngine()
+    engine.extend(items, sentiments)
+    return engine.statistics(breakdowns), engine
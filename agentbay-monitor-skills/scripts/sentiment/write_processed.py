@@ -17,68 +17,178 @@
     "agent_recommendations": "建议1. ...\n2. ..."
   }
   results 长度须与爬取结果中的 results 一致、顺序一一对应。
+
+大数据量：--raw / --sentiment 也可为 JSON Lines（.jsonl，每行一条爬取条目 / 一条情感结果，
+情感文件中不含 label 的行可携带 agent_summary、agent_recommendations），此时逐行流式合并，
+不整体载入内存；统计由 sentiment_stats 逐条累加计算。
+JSON Lines 爬取结果的首行可为 {"_type": "header", "platform": ..., "keywords": [...], "crawl_time": ...}
+元信息记录（crawl.py --stream 写出的 .partial.jsonl 即带此首行）；没有时可用 --platform / --keywords /
+--crawl-time 补充，否则报告无法得知平台与关键词。
+--output 以 .jsonl 结尾时输出 JSON Lines processed 文件（首行 header、每行一条结果、末行 footer 含统计），
+report.py 对其只做一遍流式读取。
 """
 import argparse
+import itertools
 import json
+import os
+import sys
 from pathlib import Path
 from datetime import datetime
+from typing import Any, Dict, Iterator, Tuple
+
+_scripts_dir = Path(__file__).resolve().parent.parent
+if str(_scripts_dir) not in sys.path:
+    sys.path.insert(0, str(_scripts_dir))
+
+from sentiment.sentiment_stats import SentimentStatsEngine, iter_jsonl
+from reporter.digest import processed_footer, processed_header
+
+_SENTIMENT_META_KEYS = ("agent_summary", "agent_recommendations")
+
+
+def _is_jsonl(path: str) -> bool:
+    return Path(path).suffix.lower() in (".jsonl", ".ndjson")
+
+
+def _open_raw(path: str) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """爬取结果：返回 (元信息, 条目迭代器)；JSON Lines 逐行读取，首行 header 记录作为元信息"""
+    if _is_jsonl(path):
+        records = iter_jsonl(path)
+        first = next(records, None)
+        meta: Dict[str, Any] = {"success": True}
+        if first is not None and first.get("_type") == "header":
+            first.pop("_type")
+            meta.update(first)
+        elif first is not None:
+            records = itertools.chain([first], records)
+        return meta, (r for r in records if r.get("_type") not in ("header", "footer"))
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    results = data.pop("results", []) or []
+    data.pop("sentiment_statistics", None)
+    return data, iter(results)
+
+
+def _open_sentiment(path: str) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """情感结果：返回 (agent_summary 等元信息, 情感迭代器)"""
+    if not _is_jsonl(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {k: data.get(k, "") for k in _SENTIMENT_META_KEYS}, iter(data.get("results", []))
+
+    meta = {k: "" for k in _SENTIMENT_META_KEYS}
+
+    def records():
+        for record in iter_jsonl(path):
+            if "label" not in record and any(k in record for k in _SENTIMENT_META_KEYS):
+                meta.update({k: record[k] for k in _SENTIMENT_META_KEYS if k in record})
+                continue
+            yield record
+
+    return meta, records()
+
+
+def _apply_meta_overrides(meta: Dict[str, Any], args: argparse.Namespace):
+    """命令行给出的平台、关键词、爬取时间覆盖爬取结果中的元信息"""
+    if args.platform:
+        # 仅在指定平台时导入（crawler 包会检查 AgentBay SDK）
+        from crawler.platform_config import get_platform_config
+        meta["platform"] = args.platform
+        try:
+            meta["platform_display"] = get_platform_config(args.platform).display_name
+        except ValueError:
+            meta["platform_display"] = args.platform
+    if args.keywords:
+        keywords = [kw.strip() for kw in args.keywords.split(",") if kw.strip()]
+        meta["keywords"] = keywords
+        meta["keyword"] = keywords[0] if len(keywords) == 1 else ""
+    if args.crawl_time:
+        meta["crawl_time"] = args.crawl_time
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="合并爬取结果与情感结果，输出 processed JSON（避免手写导致的双引号转义问题）"
     )
-    parser.add_argument("--raw", "-r", required=True, help="爬取结果 JSON 文件路径")
-    parser.add_argument("--sentiment", "-s", required=True, help="情感结果 JSON 文件路径（仅含 results + agent_summary + agent_recommendations）")
-    parser.add_argument("--output", "-o", required=True, help="输出的 processed JSON 路径")
+    parser.add_argument("--raw", "-r", required=True, help="爬取结果 JSON 文件路径（或 .jsonl，每行一条）")
+    parser.add_argument("--sentiment", "-s", required=True, help="情感结果 JSON 文件路径（仅含 results + agent_summary + agent_recommendations，或 .jsonl）")
+    parser.add_argument("--output", "-o", required=True, help="输出的 processed JSON 路径（.jsonl 时输出 JSON Lines 格式）")
+    parser.add_argument("--platform", "-p", help="平台标识（如 weibo），覆盖爬取结果中的 platform；.jsonl 爬取结果无 header 时使用")
+    parser.add_argument("--keywords", "-k", help="搜索关键词，逗号分隔，覆盖爬取结果中的 keywords")
+    parser.add_argument("--crawl-time", help="爬取时间（ISO 格式），覆盖爬取结果中的 crawl_time")
     args = parser.parse_args()
 
-    with open(args.raw, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    with open(args.sentiment, "r", encoding="utf-8") as f:
-        sentiment_data = json.load(f)
-
-    results = data.get("results", [])
-    sentiment_list = sentiment_data.get("results", [])
-
-    if len(sentiment_list) != len(results):
-        raise SystemExit(
-            f"错误：爬取结果共 {len(results)} 条，情感结果共 {len(sentiment_list)} 条，数量不一致。"
-        )
-
-    for i, item in enumerate(results):
-        item["sentiment"] = sentiment_list[i]
-
-    dist = {"正面": 0, "负面": 0, "中性": 0}
-    total_score = 0.0
-    for s in sentiment_list:
-        label = s.get("label", "中性")
-        dist[label] = dist.get(label, 0) + 1
-        total_score += s.get("score", 0.0)
-
-    n = len(results)
-    data["sentiment_statistics"] = {
-        "total_count": n,
-        "sentiment_distribution": dist,
-        "average_score": round(total_score / n, 3) if n else 0,
-        "positive_ratio": round(dist.get("正面", 0) / n, 3) if n else 0,
-        "negative_ratio": round(dist.get("负面", 0) / n, 3) if n else 0,
-        "neutral_ratio": round(dist.get("中性", 0) / n, 3) if n else 0,
-        "positive_count": dist.get("正面", 0),
-        "negative_count": dist.get("负面", 0),
-        "neutral_count": dist.get("中性", 0),
-    }
-    data["processed_time"] = datetime.now().isoformat()
-    data["agent_summary"] = sentiment_data.get("agent_summary", "")
-    data["agent_recommendations"] = sentiment_data.get("agent_recommendations", "")
+    meta, items = _open_raw(args.raw)
+    _apply_meta_overrides(meta, args)
+    if _is_jsonl(args.raw) and not meta.get("platform"):
+        print("⚠️ .jsonl 爬取结果没有 header 元信息，报告中平台与关键词将为空；可用 --platform / --keywords 指定")
+    sentiment_meta, sentiments = _open_sentiment(args.sentiment)
 
     out_path = Path(args.output)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    tmp_path = out_path.with_name(f".{out_path.name}.{os.getpid()}.tmp")
+
+    # 流式写出：元信息 → 逐条 results → 末尾写统计；条目不在内存中累积
+    engine = SentimentStatsEngine()
+    missing = object()
+    n_items = n_sentiments = 0
+    jsonl = _is_jsonl(args.output)
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            if jsonl:
+                header = {k: v for k, v in meta.items() if k != "total_count"}
+                f.write(json.dumps(processed_header(header), ensure_ascii=False) + "\n")
+            else:
+                f.write("{\n")
+                for key, value in meta.items():
+                    if key == "total_count":
+                        # 以实际写出的条数为准，在末尾写出
+                        continue
+                    f.write(f"  {json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)},\n")
+                f.write('  "results": [')
+            for item, sentiment in itertools.zip_longest(items, sentiments, fillvalue=missing):
+                if item is not missing:
+                    n_items += 1
+                if sentiment is not missing:
+                    n_sentiments += 1
+                if item is missing or sentiment is missing:
+                    continue
+                item["sentiment"] = sentiment
+                engine.add(item, sentiment)
+                line = json.dumps(item, ensure_ascii=False)
+                if jsonl:
+                    f.write(line + "\n")
+                else:
+                    f.write(("\n    " if len(engine) == 1 else ",\n    ") + line)
+
+            if n_sentiments != n_items:
+                raise SystemExit(
+                    f"错误：爬取结果共 {n_items} 条，情感结果共 {n_sentiments} 条，数量不一致。"
+                )
+
+            stats = engine.statistics()
+            # 多平台合并结果（crawl.py --platform a,b）：即使只有一个平台有数据也给出按平台统计
+            if meta.get("platform_results") and "platform_breakdown" not in stats:
+                stats["platform_breakdown"] = engine.platform_breakdown()
+            tail = {
+                "total_count": n_items,
+                "sentiment_statistics": stats,
+                "processed_time": datetime.now().isoformat(),
+                **sentiment_meta,
+            }
+            if jsonl:
+                f.write(json.dumps(processed_footer(tail), ensure_ascii=False) + "\n")
+            else:
+                f.write("\n  ]")
+                for key, value in tail.items():
+                    f.write(f",\n  {json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False, indent=2)}")
+                f.write("\n}\n")
+        os.replace(tmp_path, out_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
 
-    print(f"已写入: {out_path}（共 {n} 条，可直接用于 report.py --input）")
+    print(f"已写入: {out_path}（共 {n_items} 条，可直接用于 report.py --input）")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+离线性能基准
+用模拟的 akshare 模块（固定延迟 + 可选随机失败，返回结构相同的小表）测量各环节耗时，不访问网络。
+
+用法:
+  python scripts/benchmark.py fetch [--stocks 40] [--workers 8] [--latency 0.05] [--fail-rate 0.02]
+  python scripts/benchmark.py snapshot [--rows 5000] [--latency 2.0]
+  python scripts/benchmark.py score [--rows 5000] [--repeat 5]
+  python scripts/benchmark.py filter [--rows 5000] [--repeat 5]
+  python scripts/benchmark.py prices [--stocks 20] [--latency 0.05]
+
+依赖: pip install pandas numpy
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import types
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    import pandas as pd
+    import numpy as np
+except ImportError:
+    print("错误: 请先安装依赖库")
+    print("pip install pandas numpy")
+    sys.exit(1)
+
+_scripts_dir = Path(__file__).resolve().parent
+if str(_scripts_dir) not in sys.path:
+    sys.path.insert(0, str(_scripts_dir))
+
+
+def stub_spot_frame(rows: int = 5000, seed: int = 0) -> pd.DataFrame:
+    """与 ak.stock_zh_a_spot_em() 列名一致的合成全市场行情表（含少量缺失值与负 PE）"""
+    rng = np.random.default_rng(seed)
+    price = np.round(rng.lognormal(2.5, 0.8, rows), 2)
+    pe = np.round(rng.normal(30, 25, rows), 2)
+    pb = np.round(rng.lognormal(0.7, 0.6, rows), 2)
+    change = np.round(rng.normal(0, 2.5, rows), 2)
+    market_cap = np.round(rng.lognormal(23, 1.1, rows), 0)
+    df = pd.DataFrame({
+        "序号": np.arange(1, rows + 1),
+        "代码": [f"{(600000 if i % 2 else 0) + i:06d}" for i in range(rows)],
+        "名称": [f"股票{i}" for i in range(rows)],
+        "最新价": price,
+        "涨跌幅": change,
+        "涨跌额": np.round(price * change / 100, 2),
+        "成交量": rng.integers(1e4, 1e7, rows),
+        "成交额": np.round(rng.lognormal(18, 1.2, rows), 0),
+        "振幅": np.round(np.abs(rng.normal(3, 1.5, rows)), 2),
+        "最高": np.round(price * 1.02, 2),
+        "最低": np.round(price * 0.98, 2),
+        "今开": price,
+        "昨收": price,
+        "量比": np.round(rng.lognormal(0, 0.3, rows), 2),
+        "换手率": np.round(rng.lognormal(0.5, 0.8, rows), 2),
+        "市盈率-动态": pe,
+        "市净率": pb,
+        "总市值": market_cap,
+        "流通市值": np.round(market_cap * rng.uniform(0.3, 1.0, rows), 0),
+        "涨速": np.round(rng.normal(0, 0.3, rows), 2),
+        "5分钟涨跌": np.round(rng.normal(0, 0.5, rows), 2),
+        "60日涨跌幅": np.round(rng.normal(0, 15, rows), 2),
+        "年初至今涨跌幅": np.round(rng.normal(0, 25, rows), 2),
+    })
+    # 停牌股等：部分字段缺失
+    missing = rng.random(rows) < 0.03
+    df.loc[missing, ["市盈率-动态", "市净率", "涨跌幅"]] = np.nan
+    return df
+
+
+def _stub_frame(name: str, symbol: str = "", spot_rows: int = 5000, **kwargs) -> pd.DataFrame:
+    """按接口返回与真实接口列名一致的小表"""
+    if name == "stock_individual_info_em":
+        return pd.DataFrame({
+            "item": ["股票简称", "行业", "总市值", "流通市值", "总股本", "流通股", "市盈率(动态)", "市净率", "上市时间"],
+            "value": [f"模拟{symbol}", "模拟行业", 1.2e11, 1.0e11, 1.0e9, 8.0e8, 15.3, 2.1, "20100101"],
+        })
+    if name == "stock_a_ttm_lyr":
+        return pd.DataFrame({"pe_ttm": np.linspace(10, 30, 250), "pb": np.linspace(1, 4, 250)})
+    if name == "stock_zh_a_hist":
+        # 按 start_date/end_date 返回工作日 K 线；价格只由代码和日期决定，重叠下载的结果一致
+        end = pd.Timestamp(kwargs.get("end_date") or datetime.now().strftime("%Y%m%d"))
+        start = pd.Timestamp(kwargs["start_date"]) if kwargs.get("start_date") else end - timedelta(days=60)
+        days = pd.bdate_range(start, end)
+        ordinal = days.to_julian_date().to_numpy()
+        close = np.round(10 + int(symbol or 0) % 50 + 3 * np.sin(ordinal / 9) + np.cos(ordinal / 2.3), 2)
+        return pd.DataFrame({
+            "日期": days.strftime("%Y-%m-%d"), "开盘": close, "收盘": close, "最高": close * 1.01,
+            "最低": close * 0.99, "成交量": 1e6, "成交额": close * 1e6, "振幅": 2.0, "涨跌幅": 0.5,
+            "涨跌额": 0.05, "换手率": 1.2,
+        })
+    if name == "stock_zh_a_spot_em":
+        return stub_spot_frame(spot_rows)
+    if name == "index_stock_cons":
+        return pd.DataFrame({"品种代码": [f"{i:06d}" for i in range(300)]})
+    return pd.DataFrame({"报告期": [(datetime.now() - timedelta(days=90 * i)).strftime("%Y%m%d") for i in range(12)],
+                         "数值": np.arange(12, dtype=float)})
+
+
+def make_stub_akshare(latency: float = 0.05, fail_rate: float = 0.0, seed: int = 0,
+                      spot_latency: float = None, spot_rows: int = 5000) -> types.ModuleType:
+    """
+    生成模拟的 akshare 模块：每个接口 sleep(latency × 0.8~1.2) 后返回小表，
+    以 fail_rate 的概率抛出异常（用于触发重试）；全市场行情接口的延迟与行数可用 spot_latency、spot_rows 指定
+    """
+    rng = random.Random(seed)
+    module = types.ModuleType("akshare")
+    module.__version__ = "stub"
+    module.call_count = 0
+
+    def endpoint(name):
+        def api(*args, **kwargs):
+            module.call_count += 1
+            delay = spot_latency if name == "stock_zh_a_spot_em" and spot_latency is not None else latency
+            time.sleep(delay * rng.uniform(0.8, 1.2))
+            if fail_rate and rng.random() < fail_rate:
+                raise ConnectionError(f"{name}: 模拟接口限流")
+            return _stub_frame(name, spot_rows=spot_rows, **kwargs)
+        api.__name__ = name
+        return api
+
+    for name in (
+        "stock_individual_info_em", "stock_balance_sheet_by_report_em", "stock_profit_sheet_by_report_em",
+        "stock_cash_flow_sheet_by_report_em", "stock_financial_abstract", "stock_financial_analysis_indicator",
+        "stock_a_ttm_lyr", "stock_gdfx_top_10_em", "stock_zh_a_gdhs", "stock_dividend_cninfo",
+        "stock_history_dividend_detail", "stock_zh_a_hist", "index_stock_cons", "stock_zh_a_spot_em",
+    ):
+        setattr(module, name, endpoint(name))
+    return module
+
+
+def install_stub_akshare(**kwargs) -> types.ModuleType:
+    """把模拟模块注册为 akshare（须在导入各脚本之前调用）"""
+    module = make_stub_akshare(**kwargs)
+    sys.modules["akshare"] = module
+    return module
+
+
+def bench_fetch(args):
+    """批量获取：逐只串行 vs 线程池并发（各接口令牌桶限速）"""
+    stub = install_stub_akshare(latency=args.latency, fail_rate=args.fail_rate)
+    import data_fetcher
+    from price_store import PriceStore
+
+    if args.rate:
+        data_fetcher.set_rate_limit(args.rate)
+    data_fetcher.API_BACKOFF = 0.05
+    codes = [f"{600000 + i:06d}" for i in range(args.stocks)]
+
+    timings = {}
+    for label, workers in (("串行", 1), (f"并发({args.workers} 线程)", args.workers)):
+        stub.call_count = 0
+        # 每轮使用空的本地价格库，两轮下载量相同
+        with tempfile.TemporaryDirectory() as tmp:
+            data_fetcher.price_store = PriceStore(root=tmp, fetch=data_fetcher._download_history)
+            start = time.perf_counter()
+            result = data_fetcher.fetch_multiple_stocks(codes, data_type=args.data_type, use_cache=False,
+                                                        workers=workers)
+            timings[label] = time.perf_counter() - start
+        print(f"==> {label}: 成功 {result['success_count']}/{len(codes)}，{timings[label]:.2f} 秒，"
+              f"接口调用 {stub.call_count} 次\n")
+
+    serial, parallel = timings.values()
+    # 旧实现在每只股票之间固定 sleep(0.5)
+    legacy = serial + 0.5 * (len(codes) - 1)
+    print(f"{len(codes)} 只 × data_type={args.data_type}，接口延迟 {args.latency * 1000:.0f} ms：")
+    print(f"  并发相对串行加速 {serial / parallel:.1f}x，相对旧实现（含固定间隔，约 {legacy:.1f} 秒）加速 {legacy / parallel:.1f}x")
+
+
+def bench_snapshot(args):
+    """全市场行情快照：每次下载 vs 进程内复用 vs 磁盘快照（模拟另一次命令行调用）"""
+    stub = install_stub_akshare(spot_latency=args.latency, spot_rows=args.rows)
+    import market_snapshot
+
+    with tempfile.TemporaryDirectory() as tmp:
+        market_snapshot.CACHE_DIR = tmp
+        print(f"磁盘格式: {'Feather（pyarrow，内存映射读取）' if market_snapshot.PYARROW_AVAILABLE else 'pickle（未安装 pyarrow）'}")
+        for label in ("首次（下载并写入快照）", "同一进程再次获取", "新进程读取磁盘快照"):
+            if label.startswith("新进程"):
+                market_snapshot._memory = None
+            start = time.perf_counter()
+            df = market_snapshot.get_spot_snapshot()
+            print(f"  {label}: {(time.perf_counter() - start) * 1000:.1f} ms（{len(df)} 行）")
+        print(f"下载次数: {stub.call_count}（原实现每个调用点各下载一次，约 {args.latency:.1f} 秒/次）")
+
+
+def _legacy_row_score(row: pd.Series) -> float:
+    """原逐行评分（df.apply(axis=1) 调用），用于对照；ROE 列原实现查找不到，故此处同样不计"""
+    score = 50
+
+    def value(column):
+        try:
+            return float(pd.to_numeric(row.get(column), errors='coerce'))
+        except (TypeError, ValueError):
+            return np.nan
+
+    pe = value('市盈率-动态')
+    if not np.isnan(pe) and pe > 0:
+        if pe < 10:
+            score += 15
+        elif pe < 15:
+            score += 10
+        elif pe < 20:
+            score += 5
+        elif pe > 50:
+            score -= 10
+    pb = value('市净率')
+    if not np.isnan(pb) and pb > 0:
+        if 0.5 < pb < 1.5:
+            score += 10
+        elif 1.5 <= pb < 3:
+            score += 5
+        elif pb > 5:
+            score -= 5
+    change = value('涨跌幅')
+    if not np.isnan(change):
+        if -5 < change < 0:
+            score += 3
+        elif change < -5:
+            score += 5
+    return max(0, min(100, score))
+
+
+def bench_score(args):
+    """综合评分：逐行 df.apply vs 整列 np.select"""
+    install_stub_akshare()
+    from stock_screener import ScoringEngine
+
+    df = stub_spot_frame(args.rows)
+    engine = ScoringEngine()
+    timings = {}
+    for label, func in (("逐行 apply", lambda: df.apply(_legacy_row_score, axis=1)),
+                        ("向量化", lambda: engine.score(df))):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            scores = func()
+            best = min(best, time.perf_counter() - start)
+        timings[label] = (best, scores)
+        print(f"  {label}: {best * 1000:.1f} ms")
+
+    (legacy, old_scores), (vectorized, new_scores) = timings.values()
+    same = np.array_equal(old_scores.to_numpy(dtype=float), new_scores.to_numpy(dtype=float))
+    print(f"{args.rows} 行，加速 {legacy / vectorized:.0f}x，结果{'一致' if same else '不一致'}")
+
+
+def _legacy_apply_filters(df: pd.DataFrame, filters: dict) -> pd.DataFrame:
+    """原筛选实现：每个条件单独转换列并筛选一次（先整表复制），用于对照"""
+    def numeric_filter(frame, column, min_val=None, max_val=None):
+        if column not in frame.columns:
+            return frame
+        numeric_col = pd.to_numeric(frame[column], errors='coerce')
+        if min_val is not None:
+            frame = frame[numeric_col >= min_val]
+        if max_val is not None:
+            frame = frame[numeric_col <= max_val]
+        return frame
+
+    filtered = df.copy()
+    filtered = numeric_filter(filtered, '市盈率-动态', filters.get('pe_min'), filters.get('pe_max'))
+    filtered = numeric_filter(filtered, '市净率', filters.get('pb_min'), filters.get('pb_max'))
+    filtered = numeric_filter(filtered, '资产负债率', max_val=filters.get('debt_ratio_max'))
+    if filters.get('market_cap_min') is not None or filters.get('market_cap_max') is not None:
+        filtered['总市值_亿'] = pd.to_numeric(filtered['总市值'], errors='coerce') / 1e8
+        filtered = numeric_filter(filtered, '总市值_亿', filters.get('market_cap_min'), filters.get('market_cap_max'))
+    return filtered
+
+
+def bench_filter(args):
+    """筛选：逐条件复制筛选 vs 表达式一次求掩码"""
+    install_stub_akshare()
+    from stock_screener import StockScreener
+    from filter_expr import compile_filter
+
+    df = stub_spot_frame(args.rows)
+    screener = StockScreener()
+    filters = {"pe_min": 0, "pe_max": 30, "pb_min": 0.5, "pb_max": 4, "market_cap_min": 50, "market_cap_max": 2000}
+    expression = ("pe > 0 and pe < 30 and pb < 4 and market_cap > 50 and turnover > 0.5 and change_ytd > -20 "
+                  "and (change < 0 or volume_ratio > 1.2) and code not in ['000001', '600519']")
+
+    def best_of(func):
+        best, result = float("inf"), None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            result = func()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    # 原实现用上一步的布尔列筛选已缩小的表，pandas 会提示重新对齐索引
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        legacy, old = best_of(lambda: _legacy_apply_filters(df, filters))
+    engine, new = best_of(lambda: screener.apply_filters(df, filters))
+    same = old.index.equals(new.index)
+    print(f"{args.rows} 行 × {len(filters)} 个筛选参数：逐条件 {legacy * 1000:.1f} ms，表达式 {engine * 1000:.1f} ms，"
+          f"加速 {legacy / engine:.1f}x，结果{'一致' if same else '不一致'}（{len(new)} 行）")
+
+    compiled = compile_filter(expression)
+    elapsed, matched = best_of(lambda: compiled.apply(df))
+    print(f"{len(compiled.fields())} 个字段的复合表达式：{elapsed * 1000:.1f} ms（{len(matched)} 行）")
+
+
+def bench_prices(args):
+    """日线：每次下载 60 天 vs 本地价格库（首次全量、同日复用、次日增量）"""
+    stub = install_stub_akshare(latency=args.latency)
+    import data_fetcher
+    from price_store import PriceStore
+
+    codes = [f"{600000 + i:06d}" for i in range(args.stocks)]
+    rows = []
+
+    def counted_fetch(code, start_date, end_date, adjust):
+        df = data_fetcher._download_history(code, start_date, end_date, adjust)
+        rows.append(len(df))
+        return df
+
+    def run(label, func):
+        stub.call_count = 0
+        rows.clear()
+        start = time.perf_counter()
+        for code in codes:
+            func(code)
+        elapsed = time.perf_counter() - start
+        print(f"  {label}: {elapsed:.2f} 秒，接口调用 {stub.call_count} 次，下载 {sum(rows)} 行")
+
+    def legacy(code):
+        end = datetime.now()
+        df = data_fetcher.call_api(stub.stock_zh_a_hist, symbol=code, period="daily",
+                                   start_date=(end - timedelta(days=60)).strftime('%Y%m%d'),
+                                   end_date=end.strftime('%Y%m%d'), adjust="qfq")
+        rows.append(len(df))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(root=tmp, fetch=counted_fetch)
+        data_fetcher.price_store = store
+        print(f"{len(codes)} 只股票，接口延迟 {args.latency * 1000:.0f} ms（stock_zh_a_hist 限速 "
+              f"{data_fetcher.ENDPOINT_RATE_LIMITS['stock_zh_a_hist'][0]:.0f} 次/秒）：")
+        run("原实现（每次下载 60 天）", legacy)
+        run("价格库首次（下载 400 天）", data_fetcher.get_price_data)
+        run("价格库再次获取（收盘后不访问网络，交易时段只重下最后两根）", data_fetcher.get_price_data)
+
+        # 模拟隔了一个交易日：去掉最后一根 K 线并清除检查时间
+        for code in codes:
+            bars = np.array(store.load(code))
+            store._rewrite(code, bars[:-1])
+            meta = store._read_meta(code)
+            meta["checked"] = 0
+            store._write_meta(code, meta)
+        run("价格库次日增量更新", data_fetcher.get_price_data)
+
+        start = time.perf_counter()
+        panel = store.load_panel(codes, field="收盘", bars=250)
+        elapsed = time.perf_counter() - start
+        ma = panel.rolling(60).mean().iloc[-1]
+        print(f"  本地读取 {panel.shape[1]} 只 × {panel.shape[0]} 日收盘价（不访问网络）: {elapsed * 1000:.1f} ms，"
+              f"60 日均线均值 {ma.mean():.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A股分析工具离线性能基准（模拟 akshare）")
+    sub = parser.add_subparsers(dest="target", required=True)
+
+    p = sub.add_parser("fetch", help="批量获取：串行 vs 并发")
+    p.add_argument("--stocks", type=int, default=40)
+    p.add_argument("--data-type", default="all", choices=["all", "basic", "financial", "valuation", "holder"])
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--latency", type=float, default=0.05, help="模拟接口延迟（秒）")
+    p.add_argument("--fail-rate", type=float, default=0.02, help="模拟接口失败概率")
+    p.add_argument("--rate", type=float, help="每个接口每秒最多请求次数（默认使用内置限速）")
+
+    p = sub.add_parser("snapshot", help="全市场行情快照缓存：下载 vs 进程内 vs 磁盘")
+    p.add_argument("--rows", type=int, default=5000)
+    p.add_argument("--latency", type=float, default=2.0, help="模拟全市场行情下载耗时（秒）")
+
+    p = sub.add_parser("score", help="综合评分：逐行 vs 向量化")
+    p.add_argument("--rows", type=int, default=5000)
+    p.add_argument("--repeat", type=int, default=5, help="重复次数（取最快一次）")
+
+    p = sub.add_parser("filter", help="筛选：逐条件 vs 表达式")
+    p.add_argument("--rows", type=int, default=5000)
+    p.add_argument("--repeat", type=int, default=5, help="重复次数（取最快一次）")
+
+    p = sub.add_parser("prices", help="日线：每次下载 vs 本地价格库增量更新")
+    p.add_argument("--stocks", type=int, default=20)
+    p.add_argument("--latency", type=float, default=0.05, help="模拟接口延迟（秒）")
+
+    args = parser.parse_args()
+    if args.target == "fetch":
+        bench_fetch(args)
+    elif args.target == "snapshot":
+        bench_snapshot(args)
+    elif args.target == "score":
+        bench_score(args)
+    elif args.target == "filter":
+        bench_filter(args)
+    elif args.target == "prices":
+        bench_prices(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,22 @@
 """
 A股数据获取模块
 使用akshare获取股票财务数据、行情数据、股东信息等
+批量获取时多只股票在线程池中并发请求，每个上游接口各自用令牌桶限速，单次调用失败按带抖动的指数退避重试
+日线历史存入本地价格库（price_store），每次只下载上次以来缺少的交易日
 
 依赖: pip install akshare pandas
 """
 
 import argparse
 import json
+import random
 import sys
+import threading
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from typing import Optional, Callable
-from functools import wraps
 
 try:
     import akshare as ak
@@ -23,23 +27,98 @@ except ImportError:
     print("pip install akshare pandas")
     sys.exit(1)
 
-
-def retry_on_failure(max_retries: int = 3, delay: float = 1.0):
-    """网络请求重试装饰器"""
-    def decorator(func: Callable):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            last_error = None
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    last_error = e
-                    if attempt < max_retries - 1:
-                        time.sleep(delay * (attempt + 1))  # 递增等待
-            return {"error": f"重试{max_retries}次后失败: {str(last_error)}"}
-        return wrapper
-    return decorator
+from market_snapshot import get_spot_snapshot
+from price_store import HISTORY_DAYS, PriceStore
+
+
+# 每个上游接口的限速：(每秒请求数, 突发容量)；未列出的接口使用默认值
+DEFAULT_RATE_LIMIT = (3.0, 3)
+ENDPOINT_RATE_LIMITS = {
+    "stock_zh_a_spot_em": (0.5, 1),   # 全市场行情表，体积大
+    "stock_zh_a_hist": (5.0, 5),
+    "stock_individual_info_em": (5.0, 5),
+}
+
+# 批量获取的默认并发数
+DEFAULT_WORKERS = 8
+
+# 单次接口调用的重试次数与退避基数（秒）
+API_RETRIES = 3
+API_BACKOFF = 0.5
+
+
+class TokenBucket:
+    """令牌桶限速器（线程安全）：平均每秒 rate 次，允许 capacity 次突发"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，不足时阻塞等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+_rate_override = None
+
+# 接口调用计数（供吞吐统计）
+api_stats = {"calls": 0, "retries": 0, "failures": 0}
+_stats_lock = threading.Lock()
+
+
+def set_rate_limit(rate: float, burst: Optional[int] = None):
+    """统一设置所有接口的限速（每秒请求数），覆盖 ENDPOINT_RATE_LIMITS"""
+    global _rate_override
+    with _buckets_lock:
+        _rate_override = (rate, burst or max(1, int(rate)))
+        _buckets.clear()
+
+
+def _bucket_for(endpoint: str) -> TokenBucket:
+    with _buckets_lock:
+        bucket = _buckets.get(endpoint)
+        if bucket is None:
+            rate, capacity = _rate_override or ENDPOINT_RATE_LIMITS.get(endpoint, DEFAULT_RATE_LIMIT)
+            bucket = _buckets[endpoint] = TokenBucket(rate, capacity)
+        return bucket
+
+
+def _count(key: str):
+    with _stats_lock:
+        api_stats[key] += 1
+
+
+def call_api(func: Callable, *args, retries: int = API_RETRIES, backoff: float = API_BACKOFF, **kwargs):
+    """
+    调用akshare接口：先取该接口的令牌再请求，失败时等待 backoff * 2^n * (0.5~1.5) 秒后重试，
+    抖动避免并发线程同时重试；重试耗尽后抛出最后一次的异常
+    """
+    bucket = _bucket_for(getattr(func, "__name__", repr(func)))
+    for attempt in range(retries):
+        bucket.acquire()
+        _count("calls")
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            if attempt == retries - 1:
+                _count("failures")
+                raise
+            _count("retries")
+            time.sleep(backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
 
 
 def safe_float(value) -> Optional[float]:
@@ -86,11 +165,10 @@ def save_cache(code: str, data_type: str, data: dict):
         pass
 
 
-@retry_on_failure(max_retries=2, delay=1.0)
 def get_stock_info(code: str) -> dict:
     """获取股票基本信息"""
     try:
-        df = ak.stock_individual_info_em(symbol=code)
+        df = call_api(ak.stock_individual_info_em, symbol=code)
         info = {}
         for _, row in df.iterrows():
             info[row['item']] = row['value']
@@ -110,7 +188,6 @@ def get_stock_info(code: str) -> dict:
         return {"code": code, "error": str(e)}
 
 
-@retry_on_failure(max_retries=2, delay=1.0)
 def get_financial_data(code: str, years: int = 3) -> dict:
     """获取财务数据（资产负债表、利润表、现金流量表）"""
     max_records = min(years * 4, 12)
@@ -128,7 +205,7 @@ def get_financial_data(code: str, years: int = 3) -> dict:
 
     for key, fetch_func in fetch_configs:
         try:
-            df = fetch_func(symbol=code)
+            df = call_api(fetch_func, symbol=code)
             if df is not None and not df.empty:
                 result[key] = df.head(max_records).to_dict(orient='records')
         except Exception as e:
@@ -143,7 +220,7 @@ def get_financial_indicators(code: str, limit: int = 8) -> dict:
 
     for api in apis:
         try:
-            df = api(symbol=code)
+            df = call_api(api, symbol=code)
             if df is not None and not df.empty:
                 return df.head(limit).to_dict(orient='records')
         except Exception:
@@ -157,7 +234,7 @@ def get_valuation_data(code: str) -> dict:
     result = {}
 
     try:
-        df = ak.stock_a_ttm_lyr(symbol=code)
+        df = call_api(ak.stock_a_ttm_lyr, symbol=code)
         if df is None or df.empty:
             return result
 
@@ -177,20 +254,19 @@ def get_valuation_data(code: str) -> dict:
     return result
 
 
-@retry_on_failure(max_retries=2, delay=1.0)
 def get_holder_data(code: str) -> dict:
     """获取股东信息"""
     result = {}
 
     try:
-        df_top10 = ak.stock_gdfx_top_10_em(symbol=code)
+        df_top10 = call_api(ak.stock_gdfx_top_10_em, symbol=code)
         if df_top10 is not None and not df_top10.empty:
             result["top_10_holders"] = df_top10.head(10).to_dict(orient='records')
     except Exception as e:
         result["top_10_holders_error"] = str(e)
 
     try:
-        df_holder_num = ak.stock_zh_a_gdhs(symbol=code)
+        df_holder_num = call_api(ak.stock_zh_a_gdhs, symbol=code)
         if df_holder_num is not None and not df_holder_num.empty:
             result["holder_count_history"] = df_holder_num.head(10).to_dict(orient='records')
     except Exception as e:
@@ -199,12 +275,11 @@ def get_holder_data(code: str) -> dict:
     return result
 
 
-@retry_on_failure(max_retries=2, delay=1.0)
 def get_dividend_data(code: str) -> dict:
     """获取分红数据，优先使用主API，失败时降级到备用API"""
     apis = [
-        lambda c: ak.stock_dividend_cninfo(symbol=c),
-        lambda c: ak.stock_history_dividend_detail(symbol=c, indicator="分红"),
+        lambda c: call_api(ak.stock_dividend_cninfo, symbol=c),
+        lambda c: call_api(ak.stock_history_dividend_detail, symbol=c, indicator="分红"),
     ]
 
     for api in apis:
@@ -221,17 +296,25 @@ def get_dividend_data(code: str) -> dict:
     return {"dividend_history": [], "dividend_count": 0}
 
 
-@retry_on_failure(max_retries=2, delay=1.0)
+def _download_history(code: str, start_date: str, end_date: str, adjust: str) -> pd.DataFrame:
+    """下载日线（经限速与重试），供本地价格库增量更新"""
+    return call_api(ak.stock_zh_a_hist, symbol=code, period="daily",
+                    start_date=start_date, end_date=end_date, adjust=adjust)
+
+
+# 前复权日线的本地价格库
+price_store = PriceStore(adjust="qfq", fetch=_download_history)
+
+
 def get_price_data(code: str, days: int = 60) -> dict:
-    """获取价格数据"""
+    """获取价格数据（日线取自本地价格库，只下载缺少的交易日）"""
     try:
-        end_date = datetime.now().strftime('%Y%m%d')
-        start_date = (datetime.now() - timedelta(days=days)).strftime('%Y%m%d')
-
-        df = ak.stock_zh_a_hist(symbol=code, period="daily",
-                                start_date=start_date, end_date=end_date, adjust="qfq")
-        if df is not None and not df.empty:
+        history = price_store.window(code, days=max(days, HISTORY_DAYS))
+        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        df = history[history['日期'] >= cutoff]
+        if not df.empty:
             latest = df.iloc[-1]
+            year = history.tail(250)
             return {
                 "latest_price": safe_float(latest['收盘']),
                 "latest_date": str(latest['日期']),
@@ -241,6 +324,8 @@ def get_price_data(code: str, days: int = 60) -> dict:
                 "high_60d": safe_float(df['最高'].max()),
                 "low_60d": safe_float(df['最低'].min()),
                 "avg_volume_20d": safe_float(df.tail(20)['成交量'].mean()),
+                "high_250d": safe_float(year['最高'].max()),
+                "low_250d": safe_float(year['最低'].min()),
                 "price_data": df.tail(30).to_dict(orient='records')  # 只保留30天
             }
         return {}
@@ -248,7 +333,6 @@ def get_price_data(code: str, days: int = 60) -> dict:
         return {"error": str(e)}
 
 
-@retry_on_failure(max_retries=2, delay=1.0)
 def get_index_constituents(index_name: str) -> list:
     """获取指数成分股"""
     index_map = {
@@ -264,7 +348,7 @@ def get_index_constituents(index_name: str) -> list:
         return []
 
     try:
-        df = ak.index_stock_cons(symbol=index_code)
+        df = call_api(ak.index_stock_cons, symbol=index_code)
         if df is not None and not df.empty:
             return df['品种代码'].tolist()
         return []
@@ -273,10 +357,10 @@ def get_index_constituents(index_name: str) -> list:
         return []
 
 
-def get_all_a_stocks() -> list:
-    """获取全部A股代码"""
+def get_all_a_stocks(snapshot_ttl: Optional[float] = None) -> list:
+    """获取全部A股代码（与筛选器共用全市场行情快照）"""
     try:
-        df = ak.stock_zh_a_spot_em()
+        df = get_spot_snapshot(snapshot_ttl, fetch=lambda: call_api(ak.stock_zh_a_spot_em))
         if df is not None and not df.empty:
             return df['代码'].tolist()
         return []
@@ -285,13 +369,15 @@ def get_all_a_stocks() -> list:
         return []
 
 
-def fetch_stock_data(code: str, data_type: str = "all", years: int = 3, use_cache: bool = True) -> dict:
-    """获取单只股票的数据"""
+def fetch_stock_data(code: str, data_type: str = "all", years: int = 3, use_cache: bool = True,
+                     verbose: bool = True) -> dict:
+    """获取单只股票的数据（verbose=False 时不打印逐项进度，供并发批量获取使用）"""
+    log = print if verbose else (lambda *a, **k: None)
     # 尝试加载缓存
     if use_cache:
         cached = load_cache(code, data_type)
         if cached:
-            print(f"使用缓存数据: {code}")
+            log(f"使用缓存数据: {code}")
             return cached
 
     result = {
@@ -300,40 +386,44 @@ def fetch_stock_data(code: str, data_type: str = "all", years: int = 3, use_cach
         "data_type": data_type
     }
 
-    print(f"正在获取 {code} 的数据...")
+    log(f"正在获取 {code} 的数据...")
 
     if data_type in ["all", "basic"]:
-        print("  - 获取基本信息...")
+        log("  - 获取基本信息...")
         result["basic_info"] = get_stock_info(code)
 
     if data_type in ["all", "financial"]:
-        print("  - 获取财务数据...")
+        log("  - 获取财务数据...")
         result["financial_data"] = get_financial_data(code, years)
-        print("  - 获取财务指标...")
+        log("  - 获取财务指标...")
         result["financial_indicators"] = get_financial_indicators(code)
 
     if data_type in ["all", "valuation"]:
-        print("  - 获取估值数据...")
+        log("  - 获取估值数据...")
         result["valuation"] = get_valuation_data(code)
-        print("  - 获取价格数据...")
+        log("  - 获取价格数据...")
         result["price"] = get_price_data(code)
 
     if data_type in ["all", "holder"]:
-        print("  - 获取股东数据...")
+        log("  - 获取股东数据...")
         result["holder"] = get_holder_data(code)
-        print("  - 获取分红数据...")
+        log("  - 获取分红数据...")
         result["dividend"] = get_dividend_data(code)
 
     # 保存缓存
     if use_cache:
         save_cache(code, data_type, result)
 
-    print(f"数据获取完成: {code}")
+    log(f"数据获取完成: {code}")
     return result
 
 
-def fetch_multiple_stocks(codes: list, data_type: str = "basic") -> dict:
-    """获取多只股票数据"""
+def fetch_multiple_stocks(codes: list, data_type: str = "basic", years: int = 3,
+                          use_cache: bool = True, workers: int = DEFAULT_WORKERS) -> dict:
+    """
+    获取多只股票数据：线程池并发获取，请求节奏由各接口的令牌桶控制；
+    结果按输入顺序排列，并输出进度与吞吐
+    """
     result = {
         "fetch_time": datetime.now().isoformat(),
         "stocks": [],
@@ -342,23 +432,52 @@ def fetch_multiple_stocks(codes: list, data_type: str = "basic") -> dict:
     }
 
     total = len(codes)
-    for i, code in enumerate(codes):
-        print(f"[{i+1}/{total}] 获取 {code}...")
-        try:
-            stock_data = fetch_stock_data(code, data_type, use_cache=True)
-            if "error" not in stock_data.get("basic_info", {}):
-                result["stocks"].append(stock_data)
-                result["success_count"] += 1
-            else:
+    if total == 0:
+        return result
+    workers = max(1, min(workers, total))
+    print(f"开始获取 {total} 只股票（并发 {workers}）...")
+
+    stocks = [None] * total
+    calls_before = api_stats["calls"]
+    start = time.monotonic()
+    done = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(fetch_stock_data, code, data_type, years, use_cache, False): i
+            for i, code in enumerate(codes)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            done += 1
+            try:
+                stock_data = future.result()
+                ok = "error" not in stock_data.get("basic_info", {})
+                if ok:
+                    stocks[i] = stock_data
+                    result["success_count"] += 1
+                else:
+                    result["fail_count"] += 1
+                status = "完成" if ok else "失败"
+            except Exception as e:
                 result["fail_count"] += 1
-        except Exception as e:
-            print(f"  获取失败: {e}")
-            result["fail_count"] += 1
-
-        # 避免请求过快
-        if i < total - 1:
-            time.sleep(0.5)
-
+                status = f"失败: {e}"
+            elapsed = time.monotonic() - start
+            rate = done / elapsed if elapsed > 0 else 0.0
+            eta = (total - done) / rate if rate > 0 else 0.0
+            print(f"[{done}/{total}] {codes[i]} {status} | {rate:.2f} 只/秒 | 预计剩余 {eta:.0f} 秒")
+
+    elapsed = time.monotonic() - start
+    result["stocks"] = [s for s in stocks if s is not None]
+    calls = api_stats["calls"] - calls_before
+    result["throughput"] = {
+        "elapsed_seconds": round(elapsed, 2),
+        "stocks_per_second": round(total / elapsed, 2) if elapsed > 0 else None,
+        "api_calls": calls,
+        "api_calls_per_second": round(calls / elapsed, 2) if elapsed > 0 else None,
+        "workers": workers,
+    }
+    print(f"获取完成: 成功 {result['success_count']}，失败 {result['fail_count']}，"
+          f"耗时 {elapsed:.1f} 秒，接口调用 {calls} 次")
     return result
 
 
@@ -372,9 +491,17 @@ def main():
     parser.add_argument("--years", type=int, default=3, help="获取多少年的历史数据 (默认: 3)")
     parser.add_argument("--scope", type=str, help="筛选范围: hs300/zz500/cyb/kcb/all")
     parser.add_argument("--no-cache", action="store_true", help="不使用缓存")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                       help=f"批量获取的并发数 (默认: {DEFAULT_WORKERS})")
+    parser.add_argument("--rate", type=float,
+                       help="每个接口每秒最多请求次数，覆盖内置限速")
+    parser.add_argument("--snapshot-ttl", type=float,
+                       help="全市场行情快照缓存有效期（秒），默认 600，0 表示重新下载")
     parser.add_argument("--output", type=str, help="输出文件路径 (JSON)")
 
     args = parser.parse_args()
+    if args.rate:
+        set_rate_limit(args.rate)
 
     result = {}
 
@@ -383,10 +510,11 @@ def main():
                                    use_cache=not args.no_cache)
     elif args.codes:
         codes = [c.strip() for c in args.codes.split(",")]
-        result = fetch_multiple_stocks(codes, args.data_type)
+        result = fetch_multiple_stocks(codes, args.data_type, args.years,
+                                       use_cache=not args.no_cache, workers=args.workers)
     elif args.scope:
         if args.scope == "all":
-            codes = get_all_a_stocks()
+            codes = get_all_a_stocks(args.snapshot_ttl)
         else:
             codes = get_index_constituents(args.scope)
         result = {"scope": args.scope, "stocks": codes, "count": len(codes)}
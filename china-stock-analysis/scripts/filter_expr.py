@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+声明式筛选表达式
+把形如 `pe < 15 and pb < 2 and (market_cap > 1000 or change_60d > 10) and code not in ["600000"]` 的条件
+解析为受限的语法树（只允许比较、in/not in、and/or/not、数字与字符串常量），对行情表一次求出布尔掩码。
+
+求值方式：
+- 表达式引用的每一列只转换一次（数值列 pd.to_numeric，字符串列 str）
+- and/or 的各子条件先在抽样行上估计通过率：and 先算最严格的条件，or 先算最宽松的条件，
+  之后的条件只对仍未确定的行计算，条件再多也只对行情表做一次筛选
+
+字段可用别名（见 FIELD_ALIASES，market_cap 等市值字段以"亿"为单位），也可直接写列名；
+含运算符的列名用反引号括起，如 `市盈率-动态` < 20。
+
+依赖: pip install pandas numpy
+"""
+
+import ast
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 字段别名: 名称 -> (候选列名, 换算除数)；市值列以元为单位，除以 1e8 得到"亿"，与 --market-cap-min 等参数一致
+FIELD_ALIASES = {
+    "pe": (["市盈率-动态", "市盈率(动态)", "市盈率"], 1),
+    "pe_ttm": (["市盈率-动态", "市盈率(动态)", "市盈率"], 1),
+    "pb": (["市净率"], 1),
+    "roe": (["净资产收益率", "ROE", "加权净资产收益率"], 1),
+    "debt_ratio": (["资产负债率"], 1),
+    "dividend": (["股息率"], 1),
+    "market_cap": (["总市值"], 1e8),
+    "float_cap": (["流通市值"], 1e8),
+    "price": (["最新价"], 1),
+    "change": (["涨跌幅"], 1),
+    "turnover": (["换手率"], 1),
+    "volume_ratio": (["量比"], 1),
+    "amplitude": (["振幅"], 1),
+    "change_60d": (["60日涨跌幅"], 1),
+    "change_ytd": (["年初至今涨跌幅"], 1),
+    "code": (["代码"], 1),
+    "name": (["名称"], 1),
+    "industry": (["行业", "所属行业"], 1),
+}
+
+# 估计通过率时抽样的行数（上限 / 下限）
+SAMPLE_ROWS = 1000
+MIN_SAMPLE_ROWS = 50
+
+_COMPARE_OPS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+# 常量在左侧时翻转比较方向: 10 < pe 等价于 pe > 10
+_FLIPPED = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE, ast.Eq: ast.Eq, ast.NotEq: ast.NotEq}
+_OP_TEXT = {ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">=", ast.Eq: "==", ast.NotEq: "!=",
+            ast.In: "in", ast.NotIn: "not in"}
+
+_BACKTICK = re.compile(r"`([^`]+)`")
+
+
+class FilterColumns:
+    """表达式求值时的列缓存：每个字段只查找、转换一次"""
+
+    def __init__(self, df: pd.DataFrame, ignore_missing: bool = False):
+        self.df = df
+        self.ignore_missing = ignore_missing
+        self._cache: Dict[Tuple[str, str], Optional[np.ndarray]] = {}
+
+    def resolve(self, field: str) -> Tuple[Optional[str], float]:
+        """字段 -> (实际列名, 换算除数)；找不到时列名为 None"""
+        candidates, divisor = FIELD_ALIASES.get(field, ([field], 1))
+        column = next((c for c in candidates if c in self.df.columns), None)
+        return column, divisor
+
+    def values(self, field: str, kind: str) -> Optional[np.ndarray]:
+        """
+        字段的整列取值
+
+        Args:
+            field: 字段别名或列名
+            kind: "num" 数值（无法转换的记为 NaN）、"str" 字符串（缺失值记为空串）
+                  或 "missing" 缺失值掩码
+
+        Returns:
+            数组；字段不存在且 ignore_missing 时为 None
+        """
+        key = (field, kind)
+        if key not in self._cache:
+            column, divisor = self.resolve(field)
+            if column is None:
+                if not self.ignore_missing:
+                    raise ValueError(f"字段不存在: {field}（可用别名: {', '.join(FIELD_ALIASES)}，或直接使用列名）")
+                self._cache[key] = None
+            elif kind == "num":
+                values = pd.to_numeric(self.df[column], errors='coerce').to_numpy(dtype=float)
+                self._cache[key] = values / divisor if divisor != 1 else values
+            elif kind == "missing":
+                self._cache[key] = self.df[column].isna().to_numpy()
+            else:
+                # 缺失值不能参与字符串比较（float 与 str 比较会抛 TypeError），先替换为空串
+                series = self.df[column]
+                self._cache[key] = series.astype(object).where(series.notna(), "").map(str).to_numpy(dtype=object)
+        return self._cache[key]
+
+
+def _take(values: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+    return values if rows is None else values[rows]
+
+
+class _Node(ABC):
+    """条件节点：mask(columns, rows) 返回 rows（None 表示全部行）上的布尔数组"""
+
+    @abstractmethod
+    def mask(self, columns: FilterColumns, rows: Optional[np.ndarray]) -> np.ndarray:
+        """在 rows 上求值"""
+
+    @abstractmethod
+    def fields(self) -> List[str]:
+        """引用的字段"""
+
+
+class _Compare(_Node):
+    """字段与常量（或另一字段）的比较"""
+
+    def __init__(self, field: str, op, operand):
+        self.field = field
+        self.op = op
+        # 常量，或 ("field", 名称) 表示另一字段
+        self.operand = operand
+        self.kind = "str" if isinstance(operand, str) else "num"
+
+    def mask(self, columns, rows):
+        left = columns.values(self.field, self.kind)
+        if isinstance(self.operand, tuple):
+            right = columns.values(self.operand[1], "num")
+            if right is None:
+                left = None
+            else:
+                right = _take(right, rows)
+        else:
+            right = self.operand
+        if left is None:
+            return np.ones(columns.df.shape[0] if rows is None else len(rows), dtype=bool)
+        with np.errstate(invalid="ignore"):
+            result = _COMPARE_OPS[self.op](_take(left, rows), right)
+        if self.kind == "str" and self.op not in (ast.Eq, ast.NotEq):
+            # 与数值列的 NaN 一致：缺失值在大小比较中一律不满足
+            result &= ~_take(columns.values(self.field, "missing"), rows)
+        return result
+
+    def fields(self):
+        return [self.field] + ([self.operand[1]] if isinstance(self.operand, tuple) else [])
+
+    def __repr__(self):
+        operand = self.operand[1] if isinstance(self.operand, tuple) else repr(self.operand)
+        return f"{self.field} {_OP_TEXT[self.op]} {operand}"
+
+
+class _In(_Node):
+    """字段取值属于（或不属于）常量列表"""
+
+    def __init__(self, field: str, items: list, negate: bool = False):
+        self.field = field
+        self.negate = negate
+        self.kind = "str" if any(isinstance(v, str) for v in items) else "num"
+        self.items = [str(v) for v in items] if self.kind == "str" else items
+
+    def mask(self, columns, rows):
+        values = columns.values(self.field, self.kind)
+        if values is None:
+            return np.ones(columns.df.shape[0] if rows is None else len(rows), dtype=bool)
+        result = pd.Series(_take(values, rows), copy=False).isin(self.items).to_numpy()
+        return ~result if self.negate else result
+
+    def fields(self):
+        return [self.field]
+
+    def __repr__(self):
+        return f"{self.field} {'not in' if self.negate else 'in'} {self.items!r}"
+
+
+class _Not(_Node):
+    def __init__(self, child: _Node):
+        self.child = child
+
+    def mask(self, columns, rows):
+        return ~self.child.mask(columns, rows)
+
+    def fields(self):
+        return self.child.fields()
+
+    def __repr__(self):
+        return f"not ({self.child!r})"
+
+
+class _BoolOp(_Node):
+    """and / or：按抽样通过率排序子条件，后面的条件只对尚未确定的行求值"""
+
+    def __init__(self, is_and: bool, children: List[_Node]):
+        self.is_and = is_and
+        self.children = children
+
+    def ordered(self, columns: FilterColumns) -> List[_Node]:
+        """and 按通过率升序、or 按通过率降序排列子条件"""
+        # 抽样不超过总行数的 1/10，行数太少时保持书写顺序
+        size = min(SAMPLE_ROWS, columns.df.shape[0] // 10)
+        if len(self.children) < 2 or size < MIN_SAMPLE_ROWS:
+            return self.children
+        sample = np.linspace(0, columns.df.shape[0] - 1, size).astype(np.intp)
+        rates = [child.mask(columns, sample).mean() for child in self.children]
+        order = sorted(range(len(self.children)), key=lambda i: rates[i], reverse=not self.is_and)
+        return [self.children[i] for i in order]
+
+    def mask(self, columns, rows):
+        size = columns.df.shape[0] if rows is None else len(rows)
+        # pending: 结果尚未确定的行在 rows 中的位置
+        pending = np.arange(size)
+        sub_rows = rows
+        result = np.zeros(size, dtype=bool)
+        for child in self.ordered(columns):
+            hit = child.mask(columns, sub_rows)
+            if self.is_and:
+                pending = pending[hit]
+            else:
+                result[pending[hit]] = True
+                pending = pending[~hit]
+            if pending.size == 0:
+                break
+            sub_rows = pending if rows is None else rows[pending]
+        if self.is_and:
+            result[pending] = True
+        return result
+
+    def fields(self):
+        return [f for child in self.children for f in child.fields()]
+
+    def __repr__(self):
+        joiner = " and " if self.is_and else " or "
+        return "(" + joiner.join(repr(c) for c in self.children) + ")"
+
+
+class FilterExpression:
+    """编译后的筛选表达式"""
+
+    def __init__(self, text: str, root: _Node):
+        self.text = text
+        self.root = root
+
+    def fields(self) -> List[str]:
+        """表达式引用的字段（去重，保持出现顺序）"""
+        return list(dict.fromkeys(self.root.fields()))
+
+    def mask(self, df: pd.DataFrame, ignore_missing: bool = False) -> np.ndarray:
+        """
+        对整张表求布尔掩码
+
+        Args:
+            df: 行情表
+            ignore_missing: 字段不存在时视为条件成立（兼容旧的筛选参数），否则抛出 ValueError
+
+        Returns:
+            与 df 行数相同的布尔数组
+        """
+        return self.root.mask(FilterColumns(df, ignore_missing), None)
+
+    def apply(self, df: pd.DataFrame, ignore_missing: bool = False) -> pd.DataFrame:
+        """返回满足条件的行"""
+        if df.empty:
+            return df
+        return df[self.mask(df, ignore_missing)]
+
+    def __repr__(self):
+        return f"FilterExpression({self.text!r})"
+
+
+def _constant(node: ast.AST, text: str):
+    """数字、字符串常量（含负数）"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) \
+            and not isinstance(node.value, bool):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _constant(node.operand, text)
+        if isinstance(value, (int, float)):
+            return -value if isinstance(node.op, ast.USub) else value
+    raise ValueError(f"筛选表达式只支持数字或字符串常量: {ast.get_source_segment(text, node) or ast.dump(node)}")
+
+
+class _Parser:
+    def __init__(self, text: str, columns: Dict[str, str]):
+        self.text = text
+        self.columns = columns
+
+    def field(self, node: ast.AST) -> Optional[str]:
+        if isinstance(node, ast.Name):
+            return self.columns.get(node.id, node.id)
+        return None
+
+    def comparison(self, left: ast.AST, op: ast.cmpop, right: ast.AST) -> _Node:
+        if isinstance(op, (ast.In, ast.NotIn)):
+            field = self.field(left)
+            if field is None or not isinstance(right, (ast.List, ast.Tuple, ast.Set)):
+                raise ValueError("in / not in 的左侧须为字段、右侧须为常量列表")
+            items = [_constant(item, self.text) for item in right.elts]
+            if any(isinstance(v, str) for v in items) and not all(isinstance(v, str) for v in items):
+                raise ValueError("in 列表中不能混用数字与字符串")
+            return _In(field, items, negate=isinstance(op, ast.NotIn))
+        if type(op) not in _COMPARE_OPS:
+            raise ValueError(f"不支持的比较运算: {type(op).__name__}")
+        left_field, right_field = self.field(left), self.field(right)
+        if left_field is not None and right_field is not None:
+            return _Compare(left_field, type(op), ("field", right_field))
+        if left_field is not None:
+            return _Compare(left_field, type(op), _constant(right, self.text))
+        if right_field is not None:
+            return _Compare(right_field, _FLIPPED[type(op)], _constant(left, self.text))
+        _constant(left, self.text)
+        raise ValueError("比较的两侧至少有一侧须为字段")
+
+    def node(self, node: ast.AST) -> _Node:
+        if isinstance(node, ast.BoolOp):
+            return _BoolOp(isinstance(node.op, ast.And), [self.node(v) for v in node.values])
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return _Not(self.node(node.operand))
+        if isinstance(node, ast.Compare):
+            # 链式比较 10 < pe < 20 拆成 and
+            operands = [node.left] + node.comparators
+            parts = [self.comparison(operands[i], op, operands[i + 1]) for i, op in enumerate(node.ops)]
+            return parts[0] if len(parts) == 1 else _BoolOp(True, parts)
+        segment = ast.get_source_segment(self.text, node) or type(node).__name__
+        raise ValueError(f"筛选表达式中不支持: {segment}")
+
+
+def compile_filter(text: str) -> FilterExpression:
+    """
+    解析筛选表达式
+
+    Args:
+        text: 如 'pe_ttm < 15 and pb < 2 and code not in ["600000", "601988"]'
+
+    Returns:
+        FilterExpression
+
+    Raises:
+        ValueError: 语法错误或使用了不支持的语法
+    """
+    columns = {}
+
+    def quote(match):
+        name = f"__col{len(columns)}"
+        columns[name] = match.group(1)
+        return name
+
+    source = _BACKTICK.sub(quote, text.strip())
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"筛选表达式语法错误: {text} ({e.msg})") from None
+    return FilterExpression(text, _Parser(source, columns).node(tree.body))
+
+
+# 旧的筛选参数 -> 表达式（市值以亿为单位）
+FILTER_KEYS = {
+    "pe_min": ("pe", ">="),
+    "pe_max": ("pe", "<="),
+    "pb_min": ("pb", ">="),
+    "pb_max": ("pb", "<="),
+    "roe_min": ("roe", ">="),
+    "debt_ratio_max": ("debt_ratio", "<="),
+    "dividend_min": ("dividend", ">="),
+    "market_cap_min": ("market_cap", ">="),
+    "market_cap_max": ("market_cap", "<="),
+}
+
+
+def filters_to_expression(filters: Dict) -> str:
+    """把 {pe_max: 15, roe_min: 10, ...} 形式的筛选参数转换为表达式文本"""
+    parts = [
+        f"{field} {op} {float(filters[key])!r}"
+        for key, (field, op) in FILTER_KEYS.items()
+        if filters.get(key) is not None
+    ]
+    return " and ".join(parts)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+全市场行情快照缓存
+ak.stock_zh_a_spot_em() 每次下载 5000+ 行的全A股实时行情表；筛选器与数据获取模块共用本模块的快照：
+同一进程内只下载一次，并以列式格式（安装 pyarrow 时为 Feather，内存映射读取；否则为 pickle）写入磁盘，
+有效期内的其它命令行调用直接读取本地文件。
+
+有效期默认 600 秒，可用环境变量 STOCK_SNAPSHOT_TTL 或各脚本的 --snapshot-ttl 参数修改（0 表示不使用缓存）。
+
+依赖: pip install akshare pandas（可选 pyarrow）
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+DEFAULT_SNAPSHOT_TTL = 600
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+_lock = threading.Lock()
+# 进程内快照: (下载时间戳, DataFrame)
+_memory = None
+
+
+def snapshot_ttl(ttl: Optional[float] = None) -> float:
+    """有效期（秒）：参数优先，其次环境变量 STOCK_SNAPSHOT_TTL，默认 DEFAULT_SNAPSHOT_TTL"""
+    if ttl is not None:
+        return ttl
+    try:
+        return float(os.environ.get("STOCK_SNAPSHOT_TTL", DEFAULT_SNAPSHOT_TTL))
+    except ValueError:
+        return DEFAULT_SNAPSHOT_TTL
+
+
+def _paths():
+    return (os.path.join(CACHE_DIR, "spot_em.feather"), os.path.join(CACHE_DIR, "spot_em.pkl"))
+
+
+def _load_disk(ttl: float) -> Optional[tuple]:
+    """读取未过期的磁盘快照，返回 (写入时间戳, DataFrame)"""
+    for path in _paths():
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        if time.time() - mtime > ttl:
+            continue
+        try:
+            if path.endswith(".feather"):
+                if not PYARROW_AVAILABLE:
+                    continue
+                df = feather.read_table(path, memory_map=True).to_pandas()
+            else:
+                df = pd.read_pickle(path)
+            return mtime, df
+        except Exception:
+            continue
+    return None
+
+
+def _save_disk(df: pd.DataFrame):
+    """写入磁盘快照（先写临时文件再替换，并发调用不会读到半个文件）"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    feather_path, pickle_path = _paths()
+    if PYARROW_AVAILABLE:
+        tmp = f"{feather_path}.{os.getpid()}.tmp"
+        try:
+            feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), tmp)
+            os.replace(tmp, feather_path)
+            if os.path.exists(pickle_path):
+                os.remove(pickle_path)
+            return
+        except Exception:
+            # 列中混有无法转为 Arrow 的类型时退回 pickle
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    tmp = f"{pickle_path}.{os.getpid()}.tmp"
+    try:
+        df.to_pickle(tmp)
+        os.replace(tmp, pickle_path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _download() -> pd.DataFrame:
+    import akshare as ak
+    return ak.stock_zh_a_spot_em()
+
+
+def get_spot_snapshot(ttl: Optional[float] = None, fetch: Optional[Callable[[], pd.DataFrame]] = None,
+                      refresh: bool = False) -> pd.DataFrame:
+    """
+    获取全A股实时行情快照：进程内缓存 → 磁盘缓存 → 下载
+
+    Args:
+        ttl: 有效期（秒），见 snapshot_ttl；为 0 时总是重新下载
+        fetch: 下载函数（调用方可传入带重试/限速的封装），默认 ak.stock_zh_a_spot_em
+        refresh: 忽略缓存强制重新下载
+
+    Returns:
+        行情表（浅拷贝，调用方可以增加列而不影响缓存）
+    """
+    global _memory
+    ttl = snapshot_ttl(ttl)
+    with _lock:
+        now = time.time()
+        if not refresh and ttl > 0:
+            if _memory is not None and now - _memory[0] <= ttl:
+                return _memory[1].copy(deep=False)
+            cached = _load_disk(ttl)
+            if cached is not None:
+                _memory = cached
+                return cached[1].copy(deep=False)
+
+        df = (fetch or _download)()
+        if df is None:
+            df = pd.DataFrame()
+        if not df.empty:
+            _memory = (now, df)
+            if ttl > 0:
+                _save_disk(df)
+        return df.copy(deep=False)
+
+
+def clear_snapshot_cache():
+    """清空进程内与磁盘上的快照"""
+    global _memory
+    with _lock:
+        _memory = None
+        for path in _paths():
+            if os.path.exists(path):
+                os.remove(path)
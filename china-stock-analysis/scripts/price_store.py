@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+本地日线价格库
+每只股票的日线 (OHLCV) 以定长记录保存在一个二进制文件中，读取时用 np.memmap 映射，
+任意回看窗口（60 日、250 日……）直接切片，不必每次重新下载。
+
+更新方式：
+- 首次获取下载 HISTORY_DAYS 天的历史；之后只下载上次最后几根 K 线以来的数据
+- 重新下载的重叠 K 线用于校验：前复权价格因分红送转整体变化时重写整个文件，
+  盘中写入的当日 K 线在之后的更新中被替换
+- 非交易时段，上一个收盘时刻（工作日 15:00）之后已检查过的股票不再访问网络；
+  交易时段内最后一根 K 线随时在变，距上次检查超过 INTRADAY_REFRESH_SECONDS 即重新获取
+- 文件总是先写临时文件再原子替换，其他进程已映射的旧文件内容不受影响
+
+全市场的指标可用 load_panel() 直接读本地库计算，不访问网络。
+
+依赖: pip install akshare pandas numpy
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'prices')
+
+# 首次获取的历史长度（自然日），覆盖 250 个交易日
+HISTORY_DAYS = 400
+
+# 行情接口列名 -> 记录字段
+COLUMNS = {
+    "开盘": "open",
+    "收盘": "close",
+    "最高": "high",
+    "最低": "low",
+    "成交量": "volume",
+    "成交额": "amount",
+    "振幅": "amplitude",
+    "涨跌幅": "pct_change",
+    "涨跌额": "change",
+    "换手率": "turnover",
+}
+
+BAR_DTYPE = np.dtype([("date", "M8[D]")] + [(field, "f8") for field in COLUMNS.values()])
+
+# 文件格式版本，记录结构变化时递增（旧文件随之失效）
+STORE_VERSION = 1
+
+# 交易时段内同一股票两次访问网络的最小间隔（秒）
+INTRADAY_REFRESH_SECONDS = 60
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def last_market_close(now: Optional[datetime] = None) -> float:
+    """最近一个已过去的收盘时刻（工作日 15:00）的时间戳；节假日按工作日处理，最多多检查一次"""
+    now = now or datetime.now()
+    close = now.replace(hour=15, minute=0, second=0, microsecond=0)
+    if now < close:
+        close -= timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= timedelta(days=1)
+    return close.timestamp()
+
+
+def market_open(now: Optional[datetime] = None) -> bool:
+    """是否处于交易时段（工作日 9:15-15:00，含午间休市；节假日按工作日处理）"""
+    now = now or datetime.now()
+    if now.weekday() >= 5:
+        return False
+    return now.replace(hour=9, minute=15, second=0, microsecond=0) <= now < now.replace(hour=15, minute=0, second=0, microsecond=0)
+
+
+def is_fresh(checked: float, now: Optional[datetime] = None) -> bool:
+    """上次检查时间为 checked 的数据现在是否无需更新"""
+    now = now or datetime.now()
+    if market_open(now):
+        return now.timestamp() - checked < INTRADAY_REFRESH_SECONDS
+    return checked >= last_market_close(now)
+
+
+def _download(code: str, start_date: str, end_date: str, adjust: str) -> pd.DataFrame:
+    import akshare as ak
+    return ak.stock_zh_a_hist(symbol=code, period="daily", start_date=start_date, end_date=end_date, adjust=adjust)
+
+
+def frame_to_bars(df: pd.DataFrame) -> np.ndarray:
+    """行情接口返回的日线表 -> 按日期升序、日期唯一的记录数组"""
+    if df is None or df.empty or "日期" not in df.columns:
+        return np.empty(0, dtype=BAR_DTYPE)
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars["date"] = pd.to_datetime(df["日期"]).to_numpy().astype("M8[D]")
+    for column, field in COLUMNS.items():
+        if column in df.columns:
+            bars[field] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+        else:
+            bars[field] = np.nan
+    bars = bars[np.argsort(bars["date"], kind="stable")]
+    # 同一日期保留最后一条
+    keep = np.append(bars["date"][1:] != bars["date"][:-1], True)
+    return bars[keep]
+
+
+def bars_to_frame(bars: np.ndarray) -> pd.DataFrame:
+    """记录数组 -> 与行情接口列名一致的 DataFrame（日期为 YYYY-MM-DD 字符串）"""
+    df = pd.DataFrame({"日期": np.datetime_as_string(bars["date"], unit="D")})
+    for column, field in COLUMNS.items():
+        df[column] = bars[field]
+    return df
+
+
+class PriceStore:
+    """按股票代码分文件的日线价格库"""
+
+    def __init__(self, root: str = None, adjust: str = "qfq",
+                 fetch: Callable[[str, str, str, str], pd.DataFrame] = None):
+        """
+        Args:
+            root: 存储目录，默认 scripts/.cache/prices
+            adjust: 复权方式 (qfq/hfq/空字符串为不复权)，不同复权方式分目录存放
+            fetch: 下载函数 fetch(code, start_date, end_date, adjust)，日期为 YYYYMMDD，
+                   默认直接调用 ak.stock_zh_a_hist（调用方可传入带重试/限速的封装）
+        """
+        self.root = root or CACHE_DIR
+        self.adjust = adjust
+        self.fetch = fetch or _download
+        self.directory = os.path.join(self.root, f"{adjust or 'none'}_v{STORE_VERSION}")
+
+    def _path(self, code: str) -> str:
+        return os.path.join(self.directory, f"{code}.bin")
+
+    def _meta_path(self, code: str) -> str:
+        return os.path.join(self.directory, f"{code}.json")
+
+    def _read_meta(self, code: str) -> dict:
+        try:
+            with open(self._meta_path(code), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, code: str, meta: dict):
+        tmp = f"{self._meta_path(code)}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(code))
+
+    def codes(self) -> List[str]:
+        """库中已有的股票代码"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith(".bin"))
+
+    def load(self, code: str) -> np.ndarray:
+        """某只股票已存储的全部 K 线（只读内存映射；没有数据时为空数组）"""
+        path = self._path(code)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return np.empty(0, dtype=BAR_DTYPE)
+        count = size // BAR_DTYPE.itemsize
+        if count == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+
+    def _read(self, code: str, bars: int = None, since: date = None) -> np.ndarray:
+        """在锁内复制一段已存储的 K 线（避免与更新时的截断/替换交错）"""
+        with _lock_for(os.path.join(self.directory, code)):
+            stored = self.load(code)
+            if since is not None and len(stored):
+                stored = stored[np.searchsorted(stored["date"], np.datetime64(since, "D")):]
+            if bars is not None:
+                stored = stored[-bars:] if bars > 0 else stored[:0]
+            return np.array(stored)
+
+    def _rewrite(self, code: str, bars: np.ndarray):
+        """写临时文件后原子替换：其他进程已映射的旧文件不会被截断"""
+        path = self._path(code)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        bars.tofile(tmp)
+        os.replace(tmp, path)
+
+    def _append(self, code: str, keep: int, bars: np.ndarray):
+        """保留前 keep 条记录，其后接上 bars（整体写新文件后替换，不原地截断）"""
+        kept = np.fromfile(self._path(code), dtype=BAR_DTYPE, count=keep)
+        self._rewrite(code, np.concatenate([kept, bars]))
+
+    def _download_bars(self, code: str, start: date, end: date) -> np.ndarray:
+        df = self.fetch(code, start.strftime("%Y%m%d"), end.strftime("%Y%m%d"), self.adjust)
+        return frame_to_bars(df)
+
+    def update(self, code: str, start: Optional[date] = None, refresh: bool = False) -> int:
+        """
+        把某只股票的日线补齐到最新
+
+        Args:
+            code: 股票代码
+            start: 需要覆盖的最早日期，默认 HISTORY_DAYS 天前；早于已存储范围时重新下载整段
+            refresh: 忽略"数据仍新鲜"的判断（见 is_fresh），强制访问网络
+
+        Returns:
+            新增的 K 线条数
+        """
+        today = date.today()
+        start = start or today - timedelta(days=HISTORY_DAYS)
+        with _lock_for(os.path.join(self.directory, code)):
+            os.makedirs(self.directory, exist_ok=True)
+            meta = self._read_meta(code)
+            stored = self.load(code)
+            count = len(stored)
+            # 从倒数第二根 K 线开始重新下载：它用于校验复权价格，最后一根可能是盘中数据
+            anchor = count - 2 if count >= 2 else count - 1
+            if count:
+                anchor_date = stored["date"][anchor]
+                anchor_close = float(stored["close"][anchor])
+            # 改写文件前释放内存映射
+            del stored
+            covered = meta.get("start") is not None and meta["start"] <= start.isoformat()
+            # 本地没有 K 线（首次下载为空、.bin 丢失）时不论 checked 都重新下载
+            if covered and count and not refresh and is_fresh(meta.get("checked", 0)):
+                return 0
+
+            if not covered or not count:
+                bars = self._download_bars(code, start, today)
+                self._rewrite(code, bars)
+                # 下载为空时不记 checked，下次读取仍会访问网络
+                meta = {"start": start.isoformat()}
+                if len(bars):
+                    meta["checked"] = time.time()
+                self._write_meta(code, meta)
+                return len(bars)
+
+            fresh = self._download_bars(code, anchor_date.astype(object), today)
+            same = fresh[fresh["date"] == anchor_date]
+            if len(same) and np.isclose(same["close"][0], anchor_close, rtol=1e-6, equal_nan=True):
+                new = fresh[fresh["date"] > anchor_date]
+                added = len(new) - (count - anchor - 1)
+                self._append(code, anchor + 1, new)
+            elif len(fresh) == 0:
+                added = 0
+            else:
+                # 复权价格已变化（或重叠的 K 线缺失）：整段重新下载
+                bars = self._download_bars(code, date.fromisoformat(meta["start"]), today)
+                self._rewrite(code, bars)
+                added = len(bars) - count
+            meta["checked"] = time.time()
+            self._write_meta(code, meta)
+            return max(added, 0)
+
+    def window(self, code: str, bars: int = None, days: int = None, update: bool = True) -> pd.DataFrame:
+        """
+        读取回看窗口
+
+        Args:
+            code: 股票代码
+            bars: 最近 N 根 K 线（交易日）
+            days: 最近 N 个自然日；与 bars 同时给出时取两者中较短的窗口
+            update: 先补齐到最新（False 时只读本地数据，不访问网络）
+
+        Returns:
+            与行情接口列名一致的日线表，日期升序
+        """
+        if update:
+            # 交易日约占自然日的 2/3，多取一些保证 N 根 K 线
+            needed = max(days or 0, int((bars or 0) * 1.5) + 10, HISTORY_DAYS)
+            self.update(code, date.today() - timedelta(days=needed))
+        since = date.today() - timedelta(days=days) if days is not None else None
+        return bars_to_frame(self._read(code, bars, since))
+
+    def load_panel(self, codes: List[str] = None, field: str = "收盘", bars: int = 250) -> pd.DataFrame:
+        """
+        只读本地库，把多只股票的某个字段拼成 日期 × 代码 的宽表（用于全市场指标计算）
+
+        Args:
+            codes: 股票代码，默认库中全部
+            field: 列名（见 COLUMNS，如 收盘、成交量）
+            bars: 每只股票取最近 N 根 K 线
+
+        Returns:
+            行索引为日期（YYYY-MM-DD）、列为股票代码的 DataFrame
+        """
+        key = COLUMNS[field]
+        series = {}
+        for code in codes if codes is not None else self.codes():
+            stored = self._read(code, bars)
+            if len(stored):
+                series[code] = pd.Series(stored[key],
+                                         index=np.datetime_as_string(stored["date"], unit="D"))
+        return pd.DataFrame(series).sort_index()
@@ -2,6 +2,8 @@
 """
 A股股票筛选器
 根据多种财务指标筛选符合条件的股票
+综合评分按整列向量化计算（np.select），评分规则可用 JSON 文件配置
+筛选条件由 filter_expr 编译为一个表达式，对行情表一次求出布尔掩码
 
 依赖: pip install akshare pandas numpy
 """
@@ -23,6 +25,9 @@ except ImportError:
     print("pip install akshare pandas numpy")
     sys.exit(1)
 
+from filter_expr import compile_filter, filters_to_expression
+from market_snapshot import get_spot_snapshot
+
 
 def retry_on_failure(max_retries: int = 3, delay: float = 1.0):
     """网络请求重试装饰器"""
@@ -43,6 +48,87 @@ def retry_on_failure(max_retries: int = 3, delay: float = 1.0):
     return decorator
 
 
+# 综合评分规则：基础分 + 各指标的分档加减分 × 权重，最后截断到 [min, max]
+# 每条规则按 columns 中第一个存在的列取值；positive_only 时只对正值评分；
+# bands 自上而下取第一个匹配的分档（gt/ge/lt/le 为开/闭区间边界），均不匹配或值缺失时不加减分
+DEFAULT_SCORING_RULES = {
+    "base": 50,
+    "min": 0,
+    "max": 100,
+    "rules": [
+        # PE评分 (越低越好, 负数除外)
+        {"name": "pe", "columns": ["市盈率-动态"], "positive_only": True, "weight": 1,
+         "bands": [{"lt": 10, "points": 15}, {"lt": 15, "points": 10}, {"lt": 20, "points": 5},
+                   {"gt": 50, "points": -10}]},
+        # PB评分
+        {"name": "pb", "columns": ["市净率"], "positive_only": True, "weight": 1,
+         "bands": [{"gt": 0.5, "lt": 1.5, "points": 10}, {"ge": 1.5, "lt": 3, "points": 5},
+                   {"gt": 5, "points": -5}]},
+        # ROE评分
+        {"name": "roe", "columns": ["净资产收益率", "ROE", "加权净资产收益率"], "weight": 1,
+         "bands": [{"gt": 20, "points": 15}, {"gt": 15, "points": 10}, {"gt": 10, "points": 5},
+                   {"lt": 5, "points": -5}]},
+        # 涨跌幅评分 (下跌可能是机会)
+        {"name": "change", "columns": ["涨跌幅"], "weight": 1,
+         "bands": [{"gt": -5, "lt": 0, "points": 3}, {"lt": -5, "points": 5}]},
+    ],
+}
+
+_BOUND_OPS = {
+    "gt": np.greater,
+    "ge": np.greater_equal,
+    "lt": np.less,
+    "le": np.less_equal,
+}
+
+
+class ScoringEngine:
+    """向量化评分：每条规则只解析一次列名、对整列做一次 np.select"""
+
+    def __init__(self, rules: Dict = None):
+        self.rules = rules or DEFAULT_SCORING_RULES
+
+    @classmethod
+    def from_file(cls, path: str) -> "ScoringEngine":
+        """从 JSON 文件加载评分规则（结构同 DEFAULT_SCORING_RULES，未给出的顶层键取默认值）"""
+        with open(path, 'r', encoding='utf-8') as f:
+            rules = json.load(f)
+        return cls({**DEFAULT_SCORING_RULES, **rules})
+
+    @staticmethod
+    def _rule_points(values: np.ndarray, rule: Dict) -> np.ndarray:
+        """单条规则对整列的加减分"""
+        valid = ~np.isnan(values)
+        if rule.get("positive_only"):
+            valid &= np.greater(values, 0, where=valid, out=np.zeros_like(valid))
+        conditions = []
+        choices = []
+        with np.errstate(invalid="ignore"):
+            for band in rule["bands"]:
+                cond = valid.copy()
+                for op, func in _BOUND_OPS.items():
+                    if op in band:
+                        cond &= func(values, band[op])
+                conditions.append(cond)
+                choices.append(band["points"])
+        return np.select(conditions, choices, default=0) * rule.get("weight", 1)
+
+    def score(self, df: pd.DataFrame) -> pd.Series:
+        """计算每行的综合评分 (默认 0-100)"""
+        total = np.full(len(df), float(self.rules.get("base", 50)))
+        for rule in self.rules.get("rules", []):
+            column = next((c for c in rule["columns"] if c in df.columns), None)
+            if column is None:
+                continue
+            values = pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+            total += self._rule_points(values, rule)
+        total = np.clip(total, self.rules.get("min", 0), self.rules.get("max", 100))
+        # 规则分值均为整数时保持整数评分
+        if np.array_equal(total, np.round(total)):
+            total = total.astype(int)
+        return pd.Series(total, index=df.index)
+
+
 INDEX_CODE_MAP = {
     "hs300": "000300",
     "zz500": "000905",
@@ -55,8 +141,14 @@ INDEX_CODE_MAP = {
 class StockScreener:
     """股票筛选器"""
 
-    def __init__(self):
+    def __init__(self, snapshot_ttl: float = None, scoring: ScoringEngine = None):
+        """
+        snapshot_ttl: 全市场行情快照有效期（秒），默认见 market_snapshot
+        scoring: 评分引擎，默认使用 DEFAULT_SCORING_RULES
+        """
         self.all_stocks_data = None
+        self.snapshot_ttl = snapshot_ttl
+        self.scoring = scoring or ScoringEngine()
 
     def load_stock_data(self, scope: str = "hs300", custom_codes: List[str] = None) -> pd.DataFrame:
         """加载股票数据"""
@@ -64,14 +156,14 @@ class StockScreener:
 
         try:
             if scope == "all":
-                df = ak.stock_zh_a_spot_em()
+                df = self._get_all_stocks_realtime()
             elif scope in INDEX_CODE_MAP:
                 df = self._get_index_stocks_data(INDEX_CODE_MAP[scope])
             elif scope.startswith("custom:") or custom_codes:
                 codes = custom_codes or scope.replace("custom:", "").split(",")
                 df = self._get_custom_stocks_data(codes)
             else:
-                df = ak.stock_zh_a_spot_em()
+                df = self._get_all_stocks_realtime()
 
             self.all_stocks_data = df
             print(f"已加载 {len(df)} 只股票数据")
@@ -82,10 +174,14 @@ class StockScreener:
             return pd.DataFrame()
 
     @retry_on_failure(max_retries=3, delay=2.0)
-    def _get_all_stocks_realtime(self) -> pd.DataFrame:
-        """获取全部A股实时数据（带重试）"""
+    def _download_all_stocks_realtime(self) -> pd.DataFrame:
+        """下载全部A股实时数据（带重试）"""
         return ak.stock_zh_a_spot_em()
 
+    def _get_all_stocks_realtime(self) -> pd.DataFrame:
+        """全部A股实时数据：有效期内复用进程内/磁盘上的行情快照"""
+        return get_spot_snapshot(self.snapshot_ttl, fetch=self._download_all_stocks_realtime)
+
     @retry_on_failure(max_retries=3, delay=2.0)
     def _get_index_constituents(self, index_code: str) -> list:
         """获取指数成分股列表（带重试）"""
@@ -119,129 +215,37 @@ class StockScreener:
             print(f"获取自定义股票数据失败: {e}")
             return pd.DataFrame()
 
-    def _apply_numeric_filter(self, df: pd.DataFrame, column: str,
-                               min_val: float = None, max_val: float = None) -> pd.DataFrame:
-        """应用数值筛选条件"""
-        if column not in df.columns:
+    def apply_filters(self, df: pd.DataFrame, filters: Dict = None, expression: str = None) -> pd.DataFrame:
+        """
+        应用筛选条件
+
+        Args:
+            df: 行情表
+            filters: 筛选参数 {pe_max, pe_min, pb_max, pb_min, roe_min, debt_ratio_max,
+                     dividend_min, market_cap_min, market_cap_max}，数据中没有的指标不参与筛选
+            expression: 筛选表达式（见 filter_expr），与 filters 同时给出时取交集
+
+        Returns:
+            满足条件的行
+        """
+        legacy = filters_to_expression(filters or {})
+        parts = []
+        if legacy:
+            parts.append(compile_filter(legacy).mask(df, ignore_missing=True))
+        if expression:
+            parts.append(compile_filter(expression).mask(df))
+        if not parts:
             return df
-
-        numeric_col = pd.to_numeric(df[column], errors='coerce')
-        if min_val is not None:
-            df = df[numeric_col >= min_val]
-        if max_val is not None:
-            df = df[numeric_col <= max_val]
-        return df
-
-    def _find_column(self, df: pd.DataFrame, candidates: List[str]) -> str:
-        """从候选列名中找到存在的列"""
-        for col in candidates:
-            if col in df.columns:
-                return col
-        return None
-
-    def apply_filters(self, df: pd.DataFrame, filters: Dict) -> pd.DataFrame:
-        """应用筛选条件"""
-        filtered = df.copy()
-
-        # PE筛选
-        filtered = self._apply_numeric_filter(
-            filtered, '市盈率-动态',
-            min_val=filters.get('pe_min'),
-            max_val=filters.get('pe_max')
-        )
-
-        # PB筛选
-        filtered = self._apply_numeric_filter(
-            filtered, '市净率',
-            min_val=filters.get('pb_min'),
-            max_val=filters.get('pb_max')
-        )
-
-        # ROE筛选
-        if filters.get('roe_min') is not None:
-            roe_col = self._find_column(filtered, ['净资产收益率', 'ROE', '加权净资产收益率'])
-            if roe_col:
-                filtered = self._apply_numeric_filter(filtered, roe_col, min_val=filters['roe_min'])
-
-        # 资产负债率筛选
-        filtered = self._apply_numeric_filter(
-            filtered, '资产负债率',
-            max_val=filters.get('debt_ratio_max')
-        )
-
-        # 总市值筛选（转换为亿）
-        if '总市值' in filtered.columns:
-            if filters.get('market_cap_min') is not None or filters.get('market_cap_max') is not None:
-                filtered['总市值_亿'] = pd.to_numeric(filtered['总市值'], errors='coerce') / 1e8
-                filtered = self._apply_numeric_filter(
-                    filtered, '总市值_亿',
-                    min_val=filters.get('market_cap_min'),
-                    max_val=filters.get('market_cap_max')
-                )
-
-        return filtered
-
-    def _get_numeric_value(self, row: pd.Series, column: str) -> float:
-        """从行中获取数值，无效返回 NaN"""
-        return pd.to_numeric(row.get(column, np.nan), errors='coerce')
+        mask = parts[0] if len(parts) == 1 else parts[0] & parts[1]
+        return df[mask]
 
     def calculate_score(self, row: pd.Series) -> float:
-        """计算综合评分 (0-100)"""
-        score = 50
-
-        try:
-            # PE评分 (越低越好, 负数除外)
-            pe = self._get_numeric_value(row, '市盈率-动态')
-            if not np.isnan(pe) and pe > 0:
-                if pe < 10:
-                    score += 15
-                elif pe < 15:
-                    score += 10
-                elif pe < 20:
-                    score += 5
-                elif pe > 50:
-                    score -= 10
-
-            # PB评分
-            pb = self._get_numeric_value(row, '市净率')
-            if not np.isnan(pb) and pb > 0:
-                if 0.5 < pb < 1.5:
-                    score += 10
-                elif 1.5 <= pb < 3:
-                    score += 5
-                elif pb > 5:
-                    score -= 5
-
-            # ROE评分
-            roe_col = self._find_column(row.index.to_frame(), ['净资产收益率', 'ROE', '加权净资产收益率'])
-            if roe_col:
-                roe = self._get_numeric_value(row, roe_col)
-                if not np.isnan(roe):
-                    if roe > 20:
-                        score += 15
-                    elif roe > 15:
-                        score += 10
-                    elif roe > 10:
-                        score += 5
-                    elif roe < 5:
-                        score -= 5
-
-            # 涨跌幅评分 (下跌可能是机会)
-            change = self._get_numeric_value(row, '涨跌幅')
-            if not np.isnan(change):
-                if -5 < change < 0:
-                    score += 3
-                elif change < -5:
-                    score += 5
-
-        except Exception:
-            pass
-
-        return max(0, min(100, score))
+        """计算单行的综合评分 (0-100)；整表评分请用 self.scoring.score(df)"""
+        return self.scoring.score(row.to_frame().T).iloc[0]
 
     def screen(self, scope: str = "hs300", filters: Dict = None,
-              sort_by: str = "score", top_n: int = None) -> List[Dict]:
-        """执行筛选"""
+              sort_by: str = "score", top_n: int = None, expression: str = None) -> List[Dict]:
+        """执行筛选（expression 为可选的筛选表达式，见 filter_expr）"""
         # 加载数据
         if scope.startswith("custom:"):
             codes = scope.replace("custom:", "").split(",")
@@ -253,14 +257,14 @@ class StockScreener:
             return []
 
         # 应用筛选条件
-        if filters:
-            df = self.apply_filters(df, filters)
+        if filters or expression:
+            df = self.apply_filters(df, filters, expression)
 
         if df.empty:
             return []
 
-        # 计算评分
-        df['评分'] = df.apply(self.calculate_score, axis=1)
+        # 计算评分（整列向量化）
+        df = df.assign(**{'评分': self.scoring.score(df)})
 
         # 排序
         if sort_by == "score":
@@ -311,11 +315,17 @@ def main():
     parser.add_argument("--dividend-min", type=float, help="最小股息率 (%)")
     parser.add_argument("--market-cap-min", type=float, help="最小市值 (亿)")
     parser.add_argument("--market-cap-max", type=float, help="最大市值 (亿)")
+    parser.add_argument("--filter", type=str,
+                       help='筛选表达式，如 "pe_ttm < 15 and pb < 2 and (market_cap > 1000 or change_60d > 10)"')
     parser.add_argument("--sort-by", type=str, default="score",
                        choices=["score", "pe", "pb", "market_cap"],
                        help="排序方式")
     parser.add_argument("--top", type=int, default=50, help="返回前N只股票")
     parser.add_argument("--output", type=str, help="输出文件路径 (JSON)")
+    parser.add_argument("--snapshot-ttl", type=float,
+                       help="全市场行情快照缓存有效期（秒），默认 600，0 表示重新下载")
+    parser.add_argument("--score-rules", type=str,
+                       help="评分规则 JSON 文件（结构同 DEFAULT_SCORING_RULES），用于调整分档与权重")
 
     args = parser.parse_args()
 
@@ -330,20 +340,29 @@ def main():
         if getattr(args, k.replace('-', '_')) is not None
     }
 
-    # 执行筛选
-    screener = StockScreener()
-    results = screener.screen(
-        scope=args.scope,
-        filters=filters if filters else None,
-        sort_by=args.sort_by,
-        top_n=args.top
-    )
+    # 执行筛选（筛选表达式有语法错误或引用了数据中没有的字段时给出提示）
+    scoring = ScoringEngine.from_file(args.score_rules) if args.score_rules else None
+    screener = StockScreener(snapshot_ttl=args.snapshot_ttl, scoring=scoring)
+    try:
+        if args.filter:
+            compile_filter(args.filter)
+        results = screener.screen(
+            scope=args.scope,
+            filters=filters if filters else None,
+            sort_by=args.sort_by,
+            top_n=args.top,
+            expression=args.filter
+        )
+    except ValueError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
 
     # 输出结果
     output = {
         "screen_time": datetime.now().isoformat(),
         "scope": args.scope,
         "filters": filters,
+        "filter_expression": args.filter,
         "count": len(results),
         "results": results
     }